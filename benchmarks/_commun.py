@@ -0,0 +1,39 @@
+"""Utilitaires partagés par les scripts de benchmark."""
+import os
+import statistics
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHEMIN_SOURCE = os.path.join(RACINE, 'modern-renewable-energy-consumption.xlsx')
+
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+from tableau_energie.donnees import nettoyer_et_preparer_donnees  # noqa: E402
+from tableau_energie.instantane import charger_avec_instantane  # noqa: E402
+
+
+def charger_donnees_brutes():
+    """Charge le classeur de référence (via son instantané Parquet)."""
+    return charger_avec_instantane(CHEMIN_SOURCE, dossier_cache=os.path.join(RACINE, '.cache_donnees'))
+
+
+def charger_donnees_reference(schema_compact=False):
+    """Charge le classeur de référence nettoyé, au format long."""
+    return nettoyer_et_preparer_donnees(charger_donnees_brutes(), schema_compact=schema_compact)[0]
+
+
+def charger_cube_reference():
+    """Construit le cube [pays, année, source] du classeur de référence."""
+    return nettoyer_et_preparer_donnees(charger_donnees_brutes())[1]
+
+
+def chronometrer(fonction, repetitions=20):
+    """Exécute `fonction` plusieurs fois et retourne la durée médiane en millisecondes."""
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append((time.perf_counter() - debut) * 1000)
+    return statistics.median(durees)
@@ -0,0 +1,42 @@
+"""Micro-benchmark de l'« Analyse Filtrée » : filtrage du format long contre tranches du cube."""
+import argparse
+
+from _commun import charger_donnees_brutes, chronometrer
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+
+COLONNES = ['production_totale_twh', 'hydro_twh', 'solaire_twh', 'eolien_twh']
+
+
+def ancienne_selection(df, pays, debut, fin):
+    df_filtre = df[(df['annee'] >= debut) & (df['annee'] <= fin) & (df['pays'].isin(pays))].copy()
+    df_filtre.groupby(['annee', 'pays'], observed=True).agg({'production_totale_twh': 'sum'}).reset_index()
+    df_filtre.groupby('pays', observed=True).agg({'production_totale_twh': 'sum'}).reset_index() \
+        .sort_values('production_totale_twh', ascending=True)
+    df_filtre[['pays', 'annee'] + COLONNES].sort_values(['pays', 'annee'], ascending=[True, False])
+
+
+def nouvelle_selection(cube, pays, debut, fin):
+    cube.tableau_selection(pays, debut, fin, colonnes=['production_totale_twh'], par_annee=True)
+    cube.sommes_par_pays(pays, debut, fin).sort_values('production_totale_twh', ascending=True)
+    cube.tableau_selection(pays, debut, fin, colonnes=COLONNES, annees_decroissantes=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    df, cube = nettoyer_et_preparer_donnees(charger_donnees_brutes())
+    debut, fin = int(cube.annees.min()), int(cube.annees.max())
+    tous_les_pays = [p for p in cube.pays if p != 'World']
+
+    print(f"{'Pays':>6}{'filtre + groupby (ms)':>24}{'cube (ms)':>12}{'gain':>8}")
+    for nb_pays in (5, 50, len(tous_les_pays)):
+        pays = tous_les_pays[:nb_pays]
+        ancien = chronometrer(lambda: ancienne_selection(df, pays, debut, fin), args.repetitions)
+        nouveau = chronometrer(lambda: nouvelle_selection(cube, pays, debut, fin), args.repetitions)
+        print(f"{len(pays):>6}{ancien:>24.2f}{nouveau:>12.2f}{ancien / nouveau:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""Charge utile et allers-retours serveur pour parcourir toutes les années de la carte mondiale."""
+import gzip
+
+import plotly.io as pio
+
+from _commun import charger_cube_reference
+from tableau_energie.cartes import creer_carte_animee, creer_carte_mondiale
+
+
+def tailles(figure):
+    spec = pio.to_json(figure, validate=False).encode('utf-8')
+    return len(spec), len(gzip.compress(spec))
+
+
+def main():
+    cube = charger_cube_reference()
+    annees = [int(annee) for annee in cube.annees]
+
+    par_annee = [tailles(creer_carte_mondiale(cube, annee)) for annee in annees]
+    brut_par_annee = sum(t[0] for t in par_annee)
+    gzip_par_annee = sum(t[1] for t in par_annee)
+    brut_anime, gzip_anime = tailles(creer_carte_animee(cube))
+
+    print(f"Parcours de {len(annees)} années ({annees[0]}-{annees[-1]})")
+    print(f"{'Mode':<22}{'allers-retours':>16}{'octets bruts':>15}{'octets gzip':>14}")
+    print(f"{'Une carte par année':<22}{len(annees):>16}{brut_par_annee:>15,}{gzip_par_annee:>14,}")
+    print(f"{'Carte animée':<22}{1:>16}{brut_anime:>15,}{gzip_anime:>14,}")
+    print(f"Réduction : x{brut_par_annee / brut_anime:.1f} (brut), x{gzip_par_annee / gzip_anime:.1f} (gzip)")
+
+
+if __name__ == '__main__':
+    main()
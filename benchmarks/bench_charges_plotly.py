@@ -0,0 +1,62 @@
+"""Octets envoyés au navigateur par graphique, avant et après compaction, et coût de la compaction."""
+import argparse
+
+from _commun import charger_donnees_brutes, chronometrer
+from tableau_energie import cartes, figures
+from tableau_energie.compaction import compacter_figure, taille_json
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+from tableau_energie.jeu_donnees import JeuDonnees
+
+ENERGIES = ['hydro_twh', 'solaire_twh', 'eolien_twh']
+
+
+def graphiques(jeu, nb_pays):
+    """Figures non compactées de chaque graphique (constructeurs d'origine, sans le décorateur)."""
+    cube = jeu.cube
+    pays = 'France' if 'France' in cube.index_pays else cube.pays[0]
+    annee = int(cube.annees.max())
+    debut = int(cube.annees.min())
+    groupe = [p for p in ('France', 'Germany', 'China', 'Brazil', 'India') if p in cube.index_pays]
+    selection = tuple(sorted(p for p in cube.pays if p != 'World')[:nb_pays])
+    comparaison = figures.creer_comparaison_pays.__wrapped__
+    empilees, parts = comparaison(jeu, groupe, annee, ENERGIES, 'empile')
+    return {
+        "Carte (une année)": cartes.creer_carte_mondiale.__wrapped__(cube, annee),
+        "Carte animée": cartes.creer_carte_animee.__wrapped__(cube),
+        "Tendance (pays)": figures.creer_graphe_tendance.__wrapped__(
+            jeu, pays, 'production_totale_twh', "Production totale", '#1f7e3f'),
+        "Mix énergétique": figures.creer_mix_energie_pays.__wrapped__(jeu, pays, annee),
+        "Comparaison groupée": comparaison(jeu, groupe, annee, ENERGIES, 'group')[0],
+        "Comparaison empilée": empilees,
+        "Comparaison (parts)": parts,
+        "Treemap": figures.creer_treemap_distribution.__wrapped__(jeu),
+        f"Tendance filtrée ({len(selection)} pays)": figures.creer_tendance_filtree.__wrapped__(
+            jeu, selection, debut, annee),
+        f"Barres filtrées ({len(selection)} pays)": figures.creer_barres_filtrees.__wrapped__(
+            jeu, selection, debut, annee),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pays', type=int, default=40, help="pays sélectionnés dans l'analyse filtrée")
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    df, cube = nettoyer_et_preparer_donnees(charger_donnees_brutes())
+    jeu = JeuDonnees(df, cube, version='bench')
+
+    print(f"{'Graphique':<30}{'avant (o)':>11}{'après (o)':>11}{'gain':>8}{'compaction (ms)':>17}")
+    total_avant = total_apres = 0
+    for libelle, fig in graphiques(jeu, args.pays).items():
+        avant = taille_json(fig)
+        apres = taille_json(compacter_figure(fig))
+        duree = chronometrer(lambda: compacter_figure(fig), args.repetitions)
+        total_avant += avant
+        total_apres += apres
+        print(f"{libelle:<30}{avant:>11,}{apres:>11,}{avant / apres:>7.1f}x{duree:>17.1f}".replace(',', ' '))
+    print(f"{'Total':<30}{total_avant:>11,}{total_apres:>11,}{total_avant / total_apres:>7.1f}x".replace(',', ' '))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Micro-benchmark de l'onglet Comparaison : boucles iterrows contre calcul vectorisé partagé."""
+import argparse
+
+import pandas as pd
+
+from _commun import charger_cube_reference, chronometrer
+from tableau_energie.comparaison import calculer_comparaison, pivoter_comparaison
+
+
+def _valeurs_ligne(row, energies):
+    total_pays = 0
+    valeurs = {}
+    for energie in energies:
+        if energie in row and pd.notna(row[energie]):
+            valeur = row[energie] if row[energie] > 0 else 0
+            valeurs[energie] = valeur
+            total_pays += valeur
+        else:
+            valeurs[energie] = 0
+    return valeurs, total_pays
+
+
+def ancienne_comparaison(df_comparaison, energies):
+    """Reproduction des boucles d'origine : graphique, tableau des pourcentages et des valeurs absolues."""
+    data_list = []
+    for _, row in df_comparaison.iterrows():
+        valeurs, total = _valeurs_ligne(row, energies)
+        for energie in energies:
+            data_list.append({'Pays': row['pays'], "Type d'énergie": energie.replace('_twh', '').title(),
+                              'Production (TWh)': valeurs[energie],
+                              'Pourcentage (%)': (valeurs[energie] / total * 100) if total > 0 else 0})
+    pd.DataFrame(data_list)
+
+    for pourcentages in (True, False):
+        tableau_data = []
+        for _, row in df_comparaison.iterrows():
+            valeurs, total = _valeurs_ligne(row, energies)
+            ligne = {'Pays': row['pays'], 'Total (TWh)': total}
+            for energie in energies:
+                valeur = (valeurs[energie] / total * 100 if total > 0 else 0) if pourcentages else valeurs[energie]
+                ligne[energie.replace('_twh', '').title()] = valeur
+            tableau_data.append(ligne)
+        pd.DataFrame(tableau_data).sort_values('Total (TWh)', ascending=False)
+
+
+def nouvelle_comparaison(cube, pays, annee, energies):
+    df_comparaison = calculer_comparaison(cube, pays, annee, energies)
+    pivoter_comparaison(df_comparaison, 'Pourcentage (%)')
+    pivoter_comparaison(df_comparaison, 'Production (TWh)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    cube = charger_cube_reference()
+    annee = int(cube.annees.max())
+    energies = list(cube.sources)
+    tous_les_pays = [p for p in cube.pays[cube.presence[:, -1]] if p != 'World']
+
+    print(f"{'Pays':>6}{'iterrows (ms)':>16}{'vectorisé (ms)':>17}{'gain':>8}")
+    for nb_pays in (10, 100, len(tous_les_pays)):
+        pays = tous_les_pays[:nb_pays]
+        df_comparaison = cube.tableau_annee(annee, pays=pays)
+        ancien = chronometrer(lambda: ancienne_comparaison(df_comparaison, energies), args.repetitions)
+        nouveau = chronometrer(lambda: nouvelle_comparaison(cube, pays, annee, energies), args.repetitions)
+        print(f"{len(pays):>6}{ancien:>16.2f}{nouveau:>17.2f}{ancien / nouveau:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
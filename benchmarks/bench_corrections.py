@@ -0,0 +1,36 @@
+"""Coût d'une correction ligne à ligne : nettoyage complet contre agrégateur incrémental et registre."""
+import argparse
+
+from _commun import charger_donnees_brutes, chronometrer
+from tableau_energie.agregats import MODIFIER, AgregateurIncremental, Correction
+from tableau_energie.cube import COLONNE_TOTAL
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+from tableau_energie.jeu_donnees import JeuDonnees
+from tableau_energie.registre import RegistreAgregats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    df_brut = charger_donnees_brutes()
+    df, cube = nettoyer_et_preparer_donnees(df_brut)
+    colonnes = cube.sources + [COLONNE_TOTAL]
+    agregateur = AgregateurIncremental.depuis_dataframe(df[df['pays'] != 'World'], colonnes, colonne_total=COLONNE_TOTAL)
+    registre = RegistreAgregats(JeuDonnees(df, cube, version='bench'))
+    annee = int(cube.annees.max())
+    correction = Correction(MODIFIER, 'France', annee, {'hydro_twh': 60.0})
+
+    complet = chronometrer(lambda: nettoyer_et_preparer_donnees(df_brut), args.repetitions)
+    incremental = chronometrer(lambda: agregateur.appliquer(correction), args.repetitions * 50)
+    publication = chronometrer(lambda: registre.appliquer_corrections([correction]), args.repetitions)
+
+    print(f"Lignes du jeu de données              : {len(df)}")
+    print(f"Nettoyage complet (ms)                : {complet:.3f}")
+    print(f"Agrégateur, une correction (ms)       : {incremental:.4f}")
+    print(f"Registre, lot d'une correction (ms)   : {publication:.3f}")
+
+
+if __name__ == '__main__':
+    main()
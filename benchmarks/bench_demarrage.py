@@ -0,0 +1,59 @@
+"""Démarrage à froid : lecture du classeur Excel contre lecture de l'instantané Parquet mappé."""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHEMIN_SOURCE = os.path.join(RACINE, 'modern-renewable-energy-consumption.xlsx')
+
+SCRIPT_EXCEL = """
+import time
+debut = time.perf_counter()
+import pandas as pd
+df = pd.read_excel({source!r})
+print(time.perf_counter() - debut)
+"""
+
+SCRIPT_INSTANTANE = """
+import sys, time
+debut = time.perf_counter()
+sys.path.insert(0, {racine!r})
+from tableau_energie.instantane import charger_avec_instantane
+df = charger_avec_instantane({source!r}, dossier_cache={cache!r})
+print(time.perf_counter() - debut)
+"""
+
+
+def mesurer(script, repetitions):
+    durees = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True)
+        durees.append(float(sortie.stdout.strip().splitlines()[-1]))
+    return durees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier_cache:
+        script_instantane = SCRIPT_INSTANTANE.format(racine=RACINE, source=CHEMIN_SOURCE, cache=dossier_cache)
+
+        # Premier chargement : construction de l'instantané
+        construction = mesurer(script_instantane, 1)[0]
+        excel = mesurer(SCRIPT_EXCEL.format(source=CHEMIN_SOURCE), args.repetitions)
+        instantane = mesurer(script_instantane, args.repetitions)
+
+    print(f"{'Chemin':<32}{'médiane (s)':>12}{'min (s)':>10}")
+    print(f"{'Excel (pd.read_excel)':<32}{statistics.median(excel):>12.3f}{min(excel):>10.3f}")
+    print(f"{'Construction instantané':<32}{construction:>12.3f}{construction:>10.3f}")
+    print(f"{'Instantané Parquet (mmap)':<32}{statistics.median(instantane):>12.3f}{min(instantane):>10.3f}")
+    print(f"Accélération : x{statistics.median(excel) / statistics.median(instantane):.1f}")
+
+
+if __name__ == '__main__':
+    main()
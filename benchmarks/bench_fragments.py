@@ -0,0 +1,117 @@
+"""Coût d'une interaction (Comparaison, Analyse Filtrée) avec et sans sections isolées (fragments)."""
+import argparse
+import functools
+import json
+import os
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+import streamlit as st
+from streamlit.logger import set_log_level
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.testing.v1 import AppTest
+
+from _commun import RACINE
+
+SCRIPT = os.path.join(RACINE, 'energy.py')
+
+# (libellé, section qui contient le widget, action sur la session de test au tour i)
+INTERACTIONS = [
+    ("Type de graphique", 'afficher_comparaison',
+     lambda at, i: at.radio(key='type_graphique_comparaison').set_value(
+         "Barres empilées" if i % 2 == 0 else "Barres groupées")),
+    ("Année de comparaison", 'afficher_comparaison',
+     lambda at, i: at.selectbox(key='annee_comparaison').set_value(
+         at.selectbox(key='annee_comparaison').options[-2 - i % 5])),
+    ("Pays comparés", 'afficher_comparaison',
+     lambda at, i: at.multiselect(key='pays_comparaison').set_value(
+         at.multiselect(key='pays_comparaison').options[i % 7:i % 7 + 4])),
+    ("Plage annuelle (filtres)", 'afficher_analyse_filtree',
+     lambda at, i: at.slider(key='annee_curseur_detaille').set_value(
+         (at.slider(key='annee_curseur_detaille').min + 1 + i % 5, at.slider(key='annee_curseur_detaille').max))),
+    ("Pays filtrés", 'afficher_analyse_filtree',
+     lambda at, i: at.multiselect(key='pays_filtre_detaille').set_value(
+         sorted(at.multiselect(key='pays_filtre_detaille').options)[i % 7:i % 7 + 5])),
+]
+
+
+def lire_derniere_ligne(chemin):
+    with open(chemin, encoding='utf-8') as fichier:
+        return json.loads(fichier.readlines()[-1])
+
+
+def executer(at, fragment_id=None):
+    """Réexécute la session, limitée au fragment `fragment_id` s'il est donné ; retourne la durée en ms."""
+    donnees = functools.partial(RerunData, fragment_id=fragment_id) if fragment_id else RerunData
+    debut = time.perf_counter()
+    with mock.patch('streamlit.testing.v1.local_script_runner.RerunData', donnees):
+        at.run()
+    duree = (time.perf_counter() - debut) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return duree
+
+
+def identifier_fragments(at, journal):
+    """Associe chaque section isolée à l'identifiant de son fragment (en réexécutant chacun une fois)."""
+    fragments = {}
+    for fragment_id in list(at._fragment_storage._fragments):
+        executer(at, fragment_id)
+        fragments[lire_derniere_ligne(journal)['portee']] = fragment_id
+    return fragments
+
+
+def mesurer(fragments_actifs, repetitions, journal):
+    os.environ['ENERGIE_FRAGMENTS'] = '1' if fragments_actifs else '0'
+    # Mêmes succès et échecs du cache de figures dans les deux modes
+    st.cache_data.clear()
+    at = AppTest.from_file(SCRIPT, default_timeout=300)
+    # Les widgets de comparaison n'existent que lorsque leur onglet est affiché
+    at.session_state['onglet_actif'] = "⚖️ Comparaison"
+    executer(at)
+    fragments = identifier_fragments(at, journal) if fragments_actifs else {}
+
+    resultats = {}
+    for libelle, section, action in INTERACTIONS:
+        durees_serveur, octets, durees_client = [], [], []
+        for i in range(repetitions):
+            if fragments:
+                executer(at)
+            action(at, i)
+            durees_client.append(executer(at, fragments.get(section)))
+            ligne = lire_derniere_ligne(journal)
+            durees_serveur.append(ligne['duree_ms'])
+            octets.append(ligne['octets'])
+        resultats[libelle] = (statistics.median(durees_serveur), statistics.median(octets),
+                              statistics.median(durees_client))
+    return resultats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+    set_log_level('error')
+
+    os.chdir(RACINE)
+    journal = os.path.join(tempfile.mkdtemp(), 'performances.jsonl')
+    os.environ['ENERGIE_JOURNAL_PERFORMANCES'] = journal
+    os.environ['ENERGIE_INTERVALLE_ACTUALISATION'] = '0'
+
+    avant = mesurer(False, args.repetitions, journal)
+    apres = mesurer(True, args.repetitions, journal)
+
+    print(f"Médianes sur {args.repetitions} interactions (durée serveur et octets : journal d'instrumentation)\n")
+    print(f"{'Interaction':<26}{'serveur avant':>15}{'après (ms)':>12}{'octets avant':>14}{'après':>10}"
+          f"{'client avant':>14}{'après (ms)':>12}")
+    for libelle, *_ in INTERACTIONS:
+        serveur_avant, octets_avant, client_avant = avant[libelle]
+        serveur_apres, octets_apres, client_apres = apres[libelle]
+        print(f"{libelle:<26}{serveur_avant:>15.0f}{serveur_apres:>12.0f}{octets_avant:>14,.0f}{octets_apres:>10,.0f}"
+              f"{client_avant:>14.0f}{client_apres:>12.0f}".replace(',', ' '))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Profil du hachage des arguments des fonctions mises en cache lors d'une réexécution."""
+import argparse
+import hashlib
+
+import pandas as pd
+from streamlit.runtime.caching.cache_type import CacheType
+from streamlit.runtime.caching.hashing import update_hash
+
+from _commun import CHEMIN_SOURCE, charger_donnees_reference, chronometrer
+from tableau_energie.cube import construire_cube
+from tableau_energie.instantane import calculer_empreinte
+from tableau_energie.jeu_donnees import HACHAGE_JEU_DONNEES, JeuDonnees
+
+
+def hacher(arguments, hash_funcs=None):
+    for valeur in arguments:
+        update_hash(valeur, hashlib.new('md5'), CacheType.DATA, hash_funcs=hash_funcs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=20)
+    parser.add_argument('--facteur', type=int, default=1,
+                        help="Réplique le jeu de données N fois pour simuler un jeu plus volumineux")
+    args = parser.parse_args()
+
+    df_principal = charger_donnees_reference()
+    if args.facteur > 1:
+        df_principal = pd.concat([df_principal] * args.facteur, ignore_index=True)
+    df_brut = df_principal.copy()
+    pays = df_principal['pays'].iloc[0]
+    df_pays = df_principal[df_principal['pays'] == pays]
+    jeu = JeuDonnees(df_principal, construire_cube(df_principal.drop_duplicates(['pays', 'annee'])),
+                     version=calculer_empreinte(CHEMIN_SOURCE))
+
+    # Arguments DataFrame hachés par réexécution dans la version d'origine
+    avant = [
+        ('nettoyer_et_preparer_donnees', [df_brut]),
+        ('creer_carte_mondiale', [df_principal]),
+        ('creer_graphe_tendance x4', [df_pays] * 4),
+        ('creer_mix_energie_pays', [df_pays]),
+        ('creer_comparaison_pays', [df_principal]),
+        ('creer_tableau_valeurs_absolues', [df_principal]),
+        ('creer_treemap_distribution', [df_principal]),
+    ]
+    # Même réexécution avec la poignée versionnée
+    apres = [
+        ('charger_jeu_donnees', []),
+        ('obtenir_magasin_cartes', [jeu]),
+        ('creer_graphe_tendance x4', [jeu] * 4),
+        ('creer_mix_energie_pays', [jeu]),
+        ('preparer_comparaison x2', [jeu] * 2),
+        ('creer_comparaison_pays', [jeu]),
+        ('creer_tableau_valeurs_absolues', [jeu]),
+        ('creer_treemap_distribution', [jeu]),
+    ]
+
+    print(f"Jeu de données : {len(df_principal):,} lignes")
+    for titre, appels, hash_funcs in (('Avant (DataFrame)', avant, None),
+                                      ('Après (JeuDonnees)', apres, HACHAGE_JEU_DONNEES)):
+        print(f"\n{titre}")
+        total = 0.0
+        for nom, arguments in appels:
+            duree = chronometrer(lambda: hacher(arguments, hash_funcs), args.repetitions)
+            total += duree
+            print(f"  {nom:<34}{duree:>9.3f} ms")
+        print(f"  {'Total par réexécution':<34}{total:>9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
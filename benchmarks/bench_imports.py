@@ -0,0 +1,51 @@
+"""Temps d'import à froid de chaque module de `tableau_energie`, et absence d'import de Streamlit."""
+import argparse
+import json
+import os
+import pkgutil
+import statistics
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {racine!r})
+debut = time.perf_counter()
+import {module}
+duree = time.perf_counter() - debut
+print(json.dumps({{'duree': duree, 'streamlit': 'streamlit' in sys.modules, 'plotly': 'plotly' in sys.modules}}))
+"""
+
+
+def mesurer(module, repetitions):
+    resultats = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, '-c', SCRIPT.format(racine=RACINE, module=module)],
+                                capture_output=True, text=True, check=True, cwd=RACINE).stdout
+        resultats.append(json.loads(sortie.strip().splitlines()[-1]))
+    return (statistics.median(r['duree'] for r in resultats) * 1000,
+            resultats[-1]['streamlit'], resultats[-1]['plotly'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=3)
+    args = parser.parse_args()
+
+    modules = sorted(f"tableau_energie.{info.name}"
+                     for info in pkgutil.iter_modules([os.path.join(RACINE, 'tableau_energie')]))
+    print(f"{'Module':<36}{'import (ms)':>12}{'plotly':>8}{'streamlit':>11}")
+    fautifs = []
+    for module in modules:
+        duree, avec_streamlit, avec_plotly = mesurer(module, args.repetitions)
+        print(f"{module:<36}{duree:>12.0f}{'oui' if avec_plotly else 'non':>8}{'OUI' if avec_streamlit else 'non':>11}")
+        if avec_streamlit:
+            fautifs.append(module)
+    if fautifs:
+        sys.exit(f"Modules important Streamlit : {', '.join(fautifs)}")
+
+
+if __name__ == '__main__':
+    main()
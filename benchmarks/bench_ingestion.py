@@ -0,0 +1,69 @@
+"""Mémoire de pointe et durée de lecture d'une source large : lecture complète contre lecture par lots."""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from _commun import charger_donnees_brutes
+from tableau_energie.donnees import COLONNES_PROJETEES, preparer_colonnes
+from tableau_energie.ingestion import lire_source_projetee
+
+
+def construire_source_large(facteur, nb_colonnes):
+    df = charger_donnees_brutes()
+    df = pd.concat([df] * facteur, ignore_index=True)
+    # Années décalées à chaque répétition pour garder des lignes (pays, année) distinctes
+    df['Year'] = df['Year'] + np.repeat(np.arange(facteur) * 100, len(df) // facteur)
+    generateur = np.random.default_rng(0)
+    inutilisees = pd.DataFrame(generateur.random((len(df), nb_colonnes)),
+                               columns=[f"indicateur_{i}" for i in range(nb_colonnes)])
+    return pd.concat([df, inutilisees], axis=1)
+
+
+def lecture_complete(chemin):
+    lecteur = pd.read_parquet if chemin.endswith('.parquet') else pd.read_csv
+    df = preparer_colonnes(lecteur(chemin))
+    return df[[col for col in COLONNES_PROJETEES if col in df.columns]]
+
+
+def mesurer(fonction):
+    """Retourne (durée en s, mémoire de pointe en Mio, nombre de lignes)."""
+    tracemalloc.start()
+    debut = time.perf_counter()
+    resultat = fonction()
+    duree = time.perf_counter() - debut
+    pointe = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    return duree, pointe, len(resultat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facteur', type=int, default=10)
+    parser.add_argument('--colonnes', type=int, default=120)
+    parser.add_argument('--taille-lot', type=int, default=20_000)
+    args = parser.parse_args()
+
+    source = construire_source_large(args.facteur, args.colonnes)
+    print(f"Source synthétique : {len(source)} lignes × {source.shape[1]} colonnes")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemins = {'CSV': os.path.join(dossier, 'source.csv'), 'Parquet': os.path.join(dossier, 'source.parquet')}
+        source.to_csv(chemins['CSV'], index=False)
+        source.to_parquet(chemins['Parquet'], index=False, row_group_size=args.taille_lot)
+        del source
+
+        print(f"{'Format':<9}{'Lecture':<12}{'Durée (s)':>11}{'Pointe (Mio)':>14}{'Lignes':>9}")
+        for format_source, chemin in chemins.items():
+            for nom, fonction in (('complète', lambda: lecture_complete(chemin)),
+                                  ('par lots', lambda: lire_source_projetee(chemin, args.taille_lot))):
+                duree, pointe, lignes = mesurer(fonction)
+                print(f"{format_source:<9}{nom:<12}{duree:>11.2f}{pointe:>14.1f}{lignes:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Durée de construction des figures d'une réexécution, sans cache, selon la taille du pool de fils."""
+import argparse
+import os
+
+from _commun import charger_donnees_brutes, chronometrer
+from tableau_energie import figures
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+from tableau_energie.jeu_donnees import JeuDonnees
+from tableau_energie.planification import PlanificateurFigures
+
+
+def ensembles(jeu, nb_pays):
+    """Constructions (nom, fonction, arguments) de chaque ensemble de figures d'une réexécution."""
+    cube = jeu.cube
+    pays = 'France' if 'France' in cube.index_pays else cube.pays[0]
+    debut, fin = int(cube.annees.min()), int(cube.annees.max())
+    selection = tuple(sorted(p for p in cube.pays if p != 'World')[:nb_pays])
+    return {
+        "Analyse Pays (5 figures)": [
+            ('tendance', figures.creer_graphe_tendance, (jeu, pays, 'production_totale_twh', "Production totale",
+                                                          '#1f7e3f', debut, fin)),
+            ('mix', figures.creer_mix_energie_pays, (jeu, pays, fin)),
+            ('hydro', figures.creer_graphe_tendance, (jeu, pays, 'hydro_twh', "Hydro", '#2196f3', debut, fin)),
+            ('eolien', figures.creer_graphe_tendance, (jeu, pays, 'eolien_twh', "Éolien", '#4caf50', debut, fin)),
+            ('solaire', figures.creer_graphe_tendance, (jeu, pays, 'solaire_twh', "Solaire", '#ff9800', debut, fin)),
+        ],
+        f"Treemap + analyse filtrée ({len(selection)} pays)": [
+            ('treemap', figures.creer_treemap_distribution, (jeu,)),
+            ('tendance_filtree', figures.creer_tendance_filtree, (jeu, selection, debut, fin)),
+            ('barres_filtrees', figures.creer_barres_filtrees, (jeu, selection, debut, fin)),
+        ],
+    }
+
+
+def construire(planificateur, constructions):
+    """Soumet toutes les constructions puis récupère leurs résultats, dans l'ordre d'affichage."""
+    en_cours = [planificateur.soumettre(nom, fonction, *arguments) for nom, fonction, arguments in constructions]
+    return [construction.resultat() for construction in en_cours]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fils', type=int, nargs='+', default=[1, 2, 4], help="tailles de pool comparées")
+    parser.add_argument('--pays', type=int, default=40, help="pays sélectionnés dans l'analyse filtrée")
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    df, cube = nettoyer_et_preparer_donnees(charger_donnees_brutes())
+    jeu = JeuDonnees(df, cube, version='bench')
+    planificateurs = {nombre: PlanificateurFigures(nombre) for nombre in args.fils}
+
+    print(f"Cœurs disponibles : {os.cpu_count()}\n")
+    print(f"{'Ensemble':<42}{'fils':>6}{'durée (ms)':>12}{'gain':>8}")
+    for libelle, constructions in ensembles(jeu, args.pays).items():
+        construire(planificateurs[args.fils[0]], constructions)
+        reference = None
+        for nombre, planificateur in planificateurs.items():
+            duree = chronometrer(lambda: construire(planificateur, constructions), args.repetitions)
+            reference = reference or duree
+            print(f"{libelle:<42}{nombre:>6}{duree:>12.0f}{reference / duree:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Projection et prédicats poussés jusqu'à la lecture de l'instantané Parquet découpé par année, puis par pays."""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from _commun import CHEMIN_SOURCE, chronometrer
+from tableau_energie.ingestion import construire_filtres, lire_source_projetee
+from tableau_energie.instantane import LIGNES_MAX_PAR_GROUPE, ecrire_instantane, lire_instantane
+from tableau_energie.regions import charger_correspondance, codes_de_region
+
+
+def part_lue(chemin, annee_min, codes_iso):
+    """Part des octets de l'instantané dans les groupes de lignes que les statistiques min/max n'écartent pas."""
+    metadonnees = pq.ParquetFile(chemin).metadata
+    noms = pq.read_schema(chemin).names
+    index_annee, index_code = noms.index('annee'), noms.index('code_iso')
+    codes_iso = sorted(codes_iso) if codes_iso is not None else None
+    total = lus = 0
+    for i in range(metadonnees.num_row_groups):
+        groupe = metadonnees.row_group(i)
+        total += groupe.total_byte_size
+        if annee_min is not None and groupe.column(index_annee).statistics.max < annee_min:
+            continue
+        statistiques_codes = groupe.column(index_code).statistics
+        if codes_iso is not None and statistiques_codes.has_min_max and not any(
+                statistiques_codes.min <= code <= statistiques_codes.max for code in codes_iso):
+            continue
+        lus += groupe.total_byte_size
+    return lus / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facteur', type=int, default=20)
+    parser.add_argument('--repetitions', type=int, default=10)
+    parser.add_argument('--lignes-par-groupe', type=int, default=LIGNES_MAX_PAR_GROUPE,
+                        help="Taille maximale d'un groupe de lignes (une année du classeur en compte environ 300)")
+    args = parser.parse_args()
+
+    df = lire_source_projetee(CHEMIN_SOURCE)
+    etendue = int(df['annee'].max() - df['annee'].min() + 1)
+    copies = []
+    for k in range(args.facteur):
+        copie = df.copy()
+        copie['annee'] = copie['annee'] - k * etendue
+        copies.append(copie)
+    df = pd.concat(copies, ignore_index=True)
+
+    annee_max = int(df['annee'].max())
+    europe = codes_de_region(charger_correspondance(os.path.join(os.path.dirname(CHEMIN_SOURCE), 'regions.csv')),
+                             'Europe')
+    scenarios = {
+        'complet': (None, None),
+        'dix dernières années': (annee_max - 9, None),
+        'Europe': (None, europe),
+        'Europe, dix ans': (annee_max - 9, europe),
+        'France': (None, ['FRA']),
+    }
+
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, 'instantane.parquet')
+        ecrire_instantane(df, chemin, colonne_groupes='annee', colonnes_tri=['code_iso'],
+                          lignes_max_par_groupe=args.lignes_par_groupe)
+        print(f"Instantané : {len(df)} lignes, {pq.ParquetFile(chemin).metadata.num_row_groups} groupes de lignes, "
+              f"{os.path.getsize(chemin) / 2 ** 20:.1f} Mio")
+
+        print(f"{'Scénario':<22}{'Durée (ms)':>12}{'Lignes':>9}{'Octets lus':>12}")
+        for nom, (annee_min, codes_iso) in scenarios.items():
+            filtres = construire_filtres(annee_min=annee_min, codes_iso=codes_iso)
+            duree = chronometrer(lambda: lire_instantane(chemin, filtres=filtres), args.repetitions)
+            lignes = len(lire_instantane(chemin, filtres=filtres))
+            print(f"{nom:<22}{duree:>12.2f}{lignes:>9}{part_lue(chemin, annee_min, codes_iso):>11.0%}")
+
+
+if __name__ == '__main__':
+    main()
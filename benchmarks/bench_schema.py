@@ -0,0 +1,80 @@
+"""Mémoire et durées du schéma actuel du jeu de données nettoyé contre le schéma compact."""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tracemalloc
+
+import pandas as pd
+
+from _commun import RACINE, charger_donnees_brutes, charger_donnees_reference
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+
+SCRIPT_LATENCE = """
+import json, os, statistics, time
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+set_log_level('error')
+os.chdir({racine!r})
+at = AppTest.from_file(os.path.join({racine!r}, 'energy.py'), default_timeout=300)
+at.run()
+durees = []
+annees = at.sidebar.select_slider[0].options
+for i in range({reexecutions}):
+    at.sidebar.select_slider[0].set_value(annees[i % len(annees)])
+    debut = time.perf_counter()
+    at.run()
+    durees.append(time.perf_counter() - debut)
+assert not at.exception, at.exception[0].message
+print(json.dumps(statistics.median(durees)))
+"""
+
+
+def memoire(df):
+    return df.memory_usage(deep=True).sum(), len(pickle.dumps(df, pickle.HIGHEST_PROTOCOL))
+
+
+def pic_nettoyage(df_brut, schema_compact):
+    """Pic d'allocation du nettoyage : le schéma compact n'est appliqué qu'à la copie conservée."""
+    tracemalloc.start()
+    try:
+        nettoyer_et_preparer_donnees(df_brut, schema_compact=schema_compact)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def latence(schema_compact, reexecutions):
+    env = dict(os.environ, ENERGIE_SCHEMA_COMPACT='1' if schema_compact else '0')
+    sortie = subprocess.run([sys.executable, '-c', SCRIPT_LATENCE.format(racine=RACINE, reexecutions=reexecutions)],
+                            env=env, check=True, capture_output=True, text=True)
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reexecutions', type=int, default=5)
+    parser.add_argument('--facteur', type=int, default=1,
+                        help="Réplique le jeu de données N fois pour la mesure mémoire")
+    args = parser.parse_args()
+
+    df_brut = charger_donnees_brutes()
+    print(f"{'Schéma':<10}{'mémoire (Kio)':>15}{'sérialisé (Kio)':>17}{'pic nettoyage (Kio)':>21}"
+          f"{'réexécution (ms)':>18}")
+    for nom, compact in (('actuel', False), ('compact', True)):
+        df = charger_donnees_reference(schema_compact=compact)
+        if args.facteur > 1:
+            df = pd.concat([df] * args.facteur, ignore_index=True)
+            if compact:
+                df = df.astype({'pays': 'category', 'code_iso': 'category'})
+        en_memoire, serialise = memoire(df)
+        duree = latence(compact, args.reexecutions)
+        pic = pic_nettoyage(df_brut, compact)
+        print(f"{nom:<10}{en_memoire / 1024:>15,.0f}{serialise / 1024:>17,.0f}{pic / 1024:>21,.0f}"
+              f"{duree * 1000:>18.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Test de charge : N sessions Streamlit concurrentes (AppTest) sur le même processus."""
+import argparse
+import gc
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+from _commun import RACINE
+
+SCRIPT = os.path.join(RACINE, 'energy.py')
+
+
+def simuler_session(numero, nb_interactions, latences, sessions, verrou, erreurs=None):
+    try:
+        _simuler_session(numero, nb_interactions, latences, sessions, verrou)
+    except Exception as erreur:
+        if erreurs is None:
+            raise
+        with verrou:
+            erreurs.append(f"session {numero} : {erreur!r}")
+
+
+def _simuler_session(numero, nb_interactions, latences, sessions, verrou):
+    os.chdir(RACINE)
+    at = AppTest.from_file(SCRIPT, default_timeout=300)
+    durees = []
+
+    debut = time.perf_counter()
+    at.run()
+    durees.append(time.perf_counter() - debut)
+
+    pays = at.selectbox(key="pays_analyse").options
+    annees = at.sidebar.select_slider[0].options
+    # Seul l'onglet affiché est exécuté : chaque interaction sélectionne l'onglet de son widget
+    # (les widgets de l'autre onglet, absents de l'arbre, sont modifiés par leur clé)
+    actions = [
+        lambda i: at.session_state.__setitem__("pays_analyse", pays[(numero + i) % len(pays)]),
+        lambda i: at.session_state.__setitem__("type_graphique_comparaison",
+                                               "Barres empilées" if i % 2 == 0 else "Barres groupées"),
+        lambda i: at.sidebar.select_slider[0].set_value(annees[(numero * 3 + i) % len(annees)]),
+    ]
+    onglets = ["📈 Analyse Pays", "⚖️ Comparaison", "📈 Analyse Pays"]
+    for i in range(nb_interactions):
+        actions[i % len(actions)](i)
+        at.session_state["onglet_actif"] = onglets[i % len(actions)]
+        debut = time.perf_counter()
+        at.run()
+        durees.append(time.perf_counter() - debut)
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    with verrou:
+        latences.extend(durees)
+        sessions.append(at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--interactions', type=int, default=3)
+    args = parser.parse_args()
+    set_log_level('error')
+
+    # Une première session « à froid » charge les données et remplit les caches partagés
+    simuler_session(0, 0, [], [], threading.Lock())
+
+    gc.collect()
+    tracemalloc.start()
+    memoire_initiale = tracemalloc.get_traced_memory()[0]
+
+    latences, sessions, erreurs, verrou = [], [], [], threading.Lock()
+    threads = [threading.Thread(target=simuler_session,
+                                args=(n, args.interactions, latences, sessions, verrou, erreurs))
+               for n in range(1, args.sessions + 1)]
+    debut = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duree_totale = time.perf_counter() - debut
+
+    gc.collect()
+    memoire_par_session = (tracemalloc.get_traced_memory()[0] - memoire_initiale) / max(len(sessions), 1)
+    tracemalloc.stop()
+
+    if not latences:
+        print("Aucune session n'a abouti.")
+        for erreur in erreurs:
+            print(f"Échec : {erreur}")
+        return
+
+    latences.sort()
+    p95 = latences[min(len(latences) - 1, int(round(0.95 * (len(latences) - 1))))]
+    print(f"Sessions : {len(sessions)}/{args.sessions}, réexécutions : {len(latences)}, durée totale : {duree_totale:.1f} s")
+    print(f"Latence de réexécution : médiane {statistics.median(latences) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+    print(f"Mémoire par session : {memoire_par_session / 1024 ** 2:.2f} Mio")
+    for erreur in erreurs:
+        print(f"Échec : {erreur}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Statistiques de période : réductions pandas contre sommes préfixes, résultats comparés à 1e-12 près."""
+import argparse
+import time
+
+import numpy as np
+
+from _commun import charger_cube_reference, chronometrer
+from tableau_energie.statistiques import StatistiquesPeriode
+
+COLONNES = ['production_totale_twh', 'hydro_twh', 'solaire_twh', 'eolien_twh']
+
+
+def anciennes_statistiques(cube, pays, debut, fin):
+    df = cube.tableau_pays(pays, debut, fin)
+    serie = df['production_totale_twh']
+    resultats = {'annee_max': df.loc[serie.idxmax(), 'annee'], 'annee_min': df.loc[serie.idxmin(), 'annee']}
+    for colonne in COLONNES:
+        resultats[colonne] = (df[colonne].sum(), df[colonne].mean(), df[colonne].max(), df[colonne].min())
+    return resultats
+
+
+def nouvelles_statistiques(statistiques, pays, debut, fin):
+    total = statistiques.statistiques(pays, debut, fin)
+    resultats = {'annee_max': total['annee_max'], 'annee_min': total['annee_min']}
+    for colonne in COLONNES:
+        stats = statistiques.statistiques(pays, debut, fin, colonne)
+        resultats[colonne] = (stats['total'], stats['moyenne'], stats['max'], stats['min'])
+    return resultats
+
+
+def identiques(anciennes, nouvelles):
+    # Sommes et moyennes dépendent de l'ordre d'addition : comparées à une tolérance relative près
+    return all(np.allclose(anciennes[cle], nouvelles[cle], rtol=1e-12, atol=0.0, equal_nan=True) for cle in anciennes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=200)
+    args = parser.parse_args()
+
+    cube = charger_cube_reference()
+    pays = 'France' if 'France' in cube.index_pays else cube.pays[0]
+    debut_construction = time.perf_counter()
+    statistiques = StatistiquesPeriode(cube)
+    nouvelles_statistiques(statistiques, pays, None, None)
+    print(f"Construction (sommes préfixes, puis tables du pays à sa première requête) : "
+          f"{(time.perf_counter() - debut_construction) * 1000:.1f} ms")
+
+    annees = [int(annee) for annee in cube.annees]
+    print(f"{'Années':>7}{'tranche + pandas (ms)':>24}{'préfixes (ms)':>14}{'gain':>8}{'identique':>11}")
+    for nb_annees in (1, 10, len(annees)):
+        debut, fin = annees[-nb_annees], annees[-1]
+        ancien = chronometrer(lambda: anciennes_statistiques(cube, pays, debut, fin), args.repetitions)
+        nouveau = chronometrer(lambda: nouvelles_statistiques(statistiques, pays, debut, fin), args.repetitions)
+        identique = identiques(anciennes_statistiques(cube, pays, debut, fin), nouvelles_statistiques(statistiques, pays, debut, fin))
+        print(f"{nb_annees:>7}{ancien:>24.3f}{nouveau:>14.3f}{ancien / nouveau:>7.1f}x{'oui' if identique else 'NON':>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Tendance filtrée selon le nombre de pays : SVG, WebGL et bande « Autres pays » (durée, octets)."""
+import argparse
+import json
+
+from plotly.offline import get_plotlyjs
+
+from _commun import charger_donnees_brutes, chronometrer
+from tableau_energie import figures
+from tableau_energie.compaction import taille_json
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+from tableau_energie.jeu_donnees import JeuDonnees
+
+PAYS_PRINCIPAUX = 10
+
+# (libellé, arguments du constructeur) : seuil forcé pour comparer SVG et WebGL à nombre égal
+MODES = [
+    ("SVG", dict(seuil_webgl=float('inf'))),
+    ("WebGL", dict(seuil_webgl=0)),
+    (f"{PAYS_PRINCIPAUX} pays + autres", dict(pays_principaux=PAYS_PRINCIPAUX)),
+]
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Tendance filtrée : SVG contre WebGL</title>
+<script>{plotlyjs}</script></head>
+<body><table id="resultats" border="1" cellpadding="4">
+<tr><th>Pays</th><th>Mode</th><th>newPlot (ms)</th><th>zoom (ms)</th><th>survol (ms)</th></tr></table>
+<div id="graphique" style="width:900px;height:500px"></div>
+<script>
+const FIGURES = {figures};
+const REPETITIONS = {repetitions};
+const mediane = valeurs => valeurs.slice().sort((a, b) => a - b)[Math.floor(valeurs.length / 2)];
+
+async function mesurer(figure) {{
+  const div = document.getElementById('graphique');
+  const durees = {{rendu: [], zoom: [], survol: []}};
+  for (let i = 0; i < REPETITIONS; i++) {{
+    let debut = performance.now();
+    await Plotly.newPlot(div, figure.spec.data, figure.spec.layout);
+    durees.rendu.push(performance.now() - debut);
+    const plage = div._fullLayout.xaxis.range;
+    debut = performance.now();
+    await Plotly.relayout(div, {{'xaxis.range': [plage[0], (plage[0] + plage[1]) / 2]}});
+    durees.zoom.push(performance.now() - debut);
+    debut = performance.now();
+    Plotly.Fx.hover(div, [{{curveNumber: 0, pointNumber: 0}}]);
+    durees.survol.push(performance.now() - debut);
+    Plotly.purge(div);
+  }}
+  return durees;
+}}
+
+(async () => {{
+  const tableau = document.getElementById('resultats');
+  for (const figure of FIGURES) {{
+    const durees = await mesurer(figure);
+    const ligne = tableau.insertRow();
+    for (const valeur of [figure.pays, figure.mode, mediane(durees.rendu).toFixed(0),
+                          mediane(durees.zoom).toFixed(0), mediane(durees.survol).toFixed(1)]) {{
+      ligne.insertCell().textContent = valeur;
+    }}
+  }}
+}})();
+</script></body></html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--html', help="page de mesure du rendu dans le navigateur à écrire")
+    args = parser.parse_args()
+
+    df, cube = nettoyer_et_preparer_donnees(charger_donnees_brutes())
+    jeu = JeuDonnees(df, cube, version='bench')
+    tous_les_pays = tuple(sorted(p for p in cube.pays if p != 'World'))
+    debut, fin = int(cube.annees.min()), int(cube.annees.max())
+
+    print(f"{'Pays':>6}{'Mode':>22}{'courbes':>9}{'construction (ms)':>19}{'octets':>10}")
+    figures_html = []
+    for nb_pays in (10, 30, 50, 100, len(tous_les_pays)):
+        pays = tous_les_pays[:nb_pays]
+        for libelle, options in MODES:
+            if 'pays_principaux' in options and nb_pays <= PAYS_PRINCIPAUX:
+                continue
+            construire = lambda: figures.creer_tendance_filtree(jeu, pays, debut, fin, **options)
+            duree = chronometrer(construire, args.repetitions)
+            fig = construire()
+            print(f"{nb_pays:>6}{libelle:>22}{len(fig.data):>9}{duree:>19.0f}{taille_json(fig):>10,}".replace(',', ' '))
+            figures_html.append({'pays': nb_pays, 'mode': libelle, 'spec': json.loads(fig.to_json())})
+
+    if args.html:
+        with open(args.html, 'w', encoding='utf-8') as fichier:
+            fichier.write(PAGE.format(plotlyjs=get_plotlyjs(), figures=json.dumps(figures_html),
+                                      repetitions=args.repetitions))
+        print(f"\nPage de mesure du rendu écrite dans {args.html} (à ouvrir dans un navigateur)")
+
+
+if __name__ == '__main__':
+    main()
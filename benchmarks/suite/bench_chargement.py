@@ -0,0 +1,52 @@
+"""Lecture des sources, nettoyage et construction du jeu de données, à chaque échelle."""
+import os
+import shutil
+
+from conftest import RACINE
+from tableau_energie.configuration import Configuration
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+from tableau_energie.ingestion import lire_source_projetee
+from tableau_energie.registre import RegistreAgregats
+
+
+def bench_lecture_sources_sans_instantane(benchmark, configuration, tmp_path):
+    """Premier chargement : lecture par lots de la source puis écriture de son instantané Parquet."""
+    def preparer():
+        dossier = tmp_path / 'instantanes'
+        shutil.rmtree(dossier, ignore_errors=True)
+        return (Configuration(sources=configuration.sources, dossier_instantanes=str(dossier),
+                              chemin_regions=configuration.chemin_regions),), {}
+
+    df = benchmark.pedantic(lambda c: c.lire_sources(), setup=preparer, rounds=3)
+    assert not df.empty
+
+
+def bench_lecture_sources_instantane(benchmark, configuration):
+    """Chargements suivants : lecture de l'instantané Parquet des colonnes projetées."""
+    configuration.lire_sources()
+    df = benchmark(configuration.lire_sources)
+    assert not df.empty
+
+
+def bench_lecture_classeur_fourni(benchmark):
+    """Lecture par lots du classeur Excel fourni (openpyxl), sans instantané."""
+    chemin = os.path.join(RACINE, 'modern-renewable-energy-consumption.xlsx')
+    df = benchmark.pedantic(lire_source_projetee, args=(chemin,), rounds=3)
+    assert not df.empty
+
+
+def bench_nettoyage(benchmark, df_brut):
+    df, cube = benchmark(nettoyer_et_preparer_donnees, df_brut)
+    assert cube is not None
+
+
+def bench_construction_jeu_donnees(benchmark, configuration, df_brut):
+    """Nettoyage, cube, cubes régionaux et jeton de version."""
+    jeu = benchmark(configuration.construire_jeu_donnees, df_brut)
+    assert jeu.regions is not None
+
+
+def bench_agregats_registre(benchmark, jeu):
+    """Agrégats partagés (indicateurs mondiaux, leaders, dominance, statistiques de période)."""
+    registre = RegistreAgregats(jeu)
+    benchmark(lambda: registre._publier_vue(jeu, prechauffer=True))
@@ -0,0 +1,34 @@
+"""Chaque constructeur de figure `creer_*`, appelé directement (sans le cache de Streamlit)."""
+import pytest
+
+from tableau_energie import figures
+from tableau_energie.cartes import creer_carte_animee, creer_carte_mondiale
+
+
+def _derniere_annee(jeu):
+    return int(jeu.cube.annees.max())
+
+
+CONSTRUCTEURS = {
+    'graphe_tendance': lambda jeu, pays: figures.creer_graphe_tendance(
+        jeu, pays[0], 'production_totale_twh', "Tendance", '#1f7e3f'),
+    'mix_energie_pays': lambda jeu, pays: figures.creer_mix_energie_pays(jeu, pays[0], _derniere_annee(jeu)),
+    'comparaison_groupees': lambda jeu, pays: figures.creer_comparaison_pays(
+        jeu, pays[:5], _derniere_annee(jeu), jeu.cube.sources, 'group')[0],
+    'comparaison_empilees': lambda jeu, pays: figures.creer_comparaison_pays(
+        jeu, pays[:5], _derniere_annee(jeu), jeu.cube.sources, 'empile')[0],
+    'tendance_filtree': lambda jeu, pays: figures.creer_tendance_filtree(
+        jeu, tuple(sorted(pays)), int(jeu.cube.annees.min()), _derniere_annee(jeu)),
+    'barres_filtrees': lambda jeu, pays: figures.creer_barres_filtrees(
+        jeu, tuple(sorted(pays)), int(jeu.cube.annees.min()), _derniere_annee(jeu)),
+    'treemap_pays': lambda jeu, pays: figures.creer_treemap_distribution(jeu),
+    'treemap_continents': lambda jeu, pays: figures.creer_treemap_distribution(jeu, niveau='Continent'),
+    'carte_mondiale': lambda jeu, pays: creer_carte_mondiale(jeu.cube, _derniere_annee(jeu)),
+    'carte_animee': lambda jeu, pays: creer_carte_animee(jeu.cube),
+}
+
+
+@pytest.mark.parametrize('constructeur', list(CONSTRUCTEURS))
+def bench_figure(benchmark, constructeur, echelle, jeu, pays_references):
+    fig = benchmark(CONSTRUCTEURS[constructeur], jeu, pays_references)
+    assert fig is not None
@@ -0,0 +1,65 @@
+"""Exécution scriptée de la page complète (streamlit.testing.AppTest) sur les sources synthétiques."""
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from conftest import RACINE
+
+SCRIPT = os.path.join(RACINE, 'energy.py')
+DELAI_MAX = 900
+
+
+@pytest.fixture
+def environnement_page(dossier_synthetique, monkeypatch):
+    """La page lit la source synthétique ; regions.csv et les instantanés sont relatifs au dossier courant."""
+    monkeypatch.chdir(dossier_synthetique)
+    monkeypatch.setenv('ENERGIE_SOURCES', str(dossier_synthetique / 'energie.csv'))
+    monkeypatch.setenv('ENERGIE_INTERVALLE_ACTUALISATION', '0')
+    yield
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _nouvelle_session():
+    return AppTest.from_file(SCRIPT, default_timeout=DELAI_MAX)
+
+
+def _executer(session):
+    session.run()
+    assert not session.exception, session.exception
+    return session
+
+
+def bench_page_premier_rendu(benchmark, echelle, environnement_page):
+    """Première session après un redémarrage : caches vides, instantanés déjà écrits."""
+    _executer(_nouvelle_session())
+
+    def preparer():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        return (_nouvelle_session(),), {}
+
+    benchmark.pedantic(_executer, setup=preparer, rounds=3)
+
+
+def bench_page_reexecution(benchmark, echelle, environnement_page):
+    """Réexécution sans changement d'une session ouverte (caches chauds)."""
+    session = _executer(_nouvelle_session())
+    benchmark.pedantic(_executer, args=(session,), rounds=5, warmup_rounds=1)
+
+
+def bench_page_changement_pays(benchmark, echelle, environnement_page):
+    """Interaction type : choix d'un autre pays dans l'onglet « Analyse Pays »."""
+    session = _executer(_nouvelle_session())
+    selecteur = session.selectbox(key='pays_analyse')
+    options = selecteur.options
+    etat = {'indice': 0}
+
+    def preparer():
+        etat['indice'] = (etat['indice'] + 1) % len(options)
+        session.selectbox(key='pays_analyse').set_value(options[etat['indice']])
+        return (session,), {}
+
+    benchmark.pedantic(_executer, setup=preparer, rounds=5)
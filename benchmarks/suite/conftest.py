@@ -0,0 +1,80 @@
+"""Fixtures de la suite de benchmarks : sources synthétiques et jeux de données par échelle."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DOSSIER_REFERENCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'references')
+
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+from synthetique import ECHELLES, generer_correspondance, generer_source  # noqa: E402
+from tableau_energie.configuration import Configuration  # noqa: E402
+
+
+def pytest_addoption(parser):
+    parser.addoption('--echelles', default=','.join(str(e) for e in ECHELLES),
+                     help="Échelles des jeux synthétiques, séparées par des virgules (parmi 1, 10, 100)")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Références JSON rangées à côté de la suite, quel que soit le dossier de lancement
+    if config.getoption('benchmark_storage', None) == 'file://./.benchmarks':
+        config.option.benchmark_storage = f"file://{DOSSIER_REFERENCES}"
+
+
+def pytest_generate_tests(metafunc):
+    if 'echelle' in metafunc.fixturenames:
+        echelles = [int(e) for e in metafunc.config.getoption('echelles').split(',')]
+        metafunc.parametrize('echelle', echelles, ids=[f"{e}x" for e in echelles], scope='session')
+
+
+@pytest.fixture(autouse=True)
+def groupe_par_echelle(request):
+    """Regroupe les résultats par échelle dans le rapport (le classeur fourni à part)."""
+    if 'benchmark' in request.fixturenames:
+        parametres = getattr(request.node, 'callspec', None)
+        echelle = parametres.params.get('echelle') if parametres is not None else None
+        request.getfixturevalue('benchmark').group = f"échelle {echelle}x" if echelle else "classeur fourni"
+
+
+@pytest.fixture(scope='session')
+def dossier_synthetique(echelle, tmp_path_factory):
+    """Dossier contenant la source synthétique (CSV) et sa table de régions."""
+    dossier = tmp_path_factory.mktemp(f"synthetique_{echelle}x")
+    df_source = generer_source(echelle)
+    df_source.to_csv(dossier / 'energie.csv', index=False)
+    generer_correspondance(df_source).to_csv(dossier / 'regions.csv', index=False)
+    return dossier
+
+
+@pytest.fixture(scope='session')
+def configuration(dossier_synthetique):
+    return Configuration(sources=[str(dossier_synthetique / 'energie.csv')],
+                         dossier_instantanes=str(dossier_synthetique / 'instantanes'),
+                         chemin_regions=str(dossier_synthetique / 'regions.csv'),
+                         intervalle_actualisation=0)
+
+
+@pytest.fixture(scope='session')
+def df_brut(configuration):
+    return configuration.lire_sources()
+
+
+@pytest.fixture(scope='session')
+def jeu(configuration, df_brut):
+    return configuration.construire_jeu_donnees(df_brut)
+
+
+@pytest.fixture(scope='session')
+def pays_references(jeu):
+    """Les dix plus gros producteurs de la dernière année, du plus gros au plus petit."""
+    cube = jeu.cube
+    derniere = np.nan_to_num(cube.totaux[:, -1], nan=-1.0)
+    ordre = [i for i in derniere.argsort()[::-1] if cube.pays[i] != 'World']
+    return [str(cube.pays[i]) for i in ordre[:10]]
+
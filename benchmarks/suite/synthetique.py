@@ -0,0 +1,65 @@
+"""Générateur de sources synthétiques au format du classeur fourni, à plusieurs échelles."""
+import itertools
+import string
+
+import numpy as np
+import pandas as pd
+
+NB_ENTITES_BASE = 300
+PART_AGREGATS = 0.25
+DERNIERE_ANNEE = 2023
+NB_ANNEES_BASE = 24
+
+# Échelle -> (facteur sur le nombre d'entités, facteur sur le nombre d'années). Seuls les pays et les
+# années croissent : l'ingestion ne retient que les trois sources du classeur (hydro, solaire, éolien).
+ECHELLES = {
+    1: (1, 1),
+    10: (5, 2),
+    100: (25, 4),
+}
+
+CONTINENTS = ['Afrique', 'Amérique du Nord', 'Amérique du Sud', 'Asie', 'Europe', 'Océanie']
+
+
+def _codes_iso(nombre):
+    """Codes ISO fictifs à trois lettres, uniques (AAA, AAB, ...)."""
+    return [''.join(lettres) for lettres in itertools.islice(itertools.product(string.ascii_uppercase, repeat=3), nombre)]
+
+
+def generer_source(echelle=1, graine=0):
+    """Retourne le DataFrame brut (noms de colonnes du classeur) d'une source synthétique."""
+    facteur_entites, facteur_annees = ECHELLES[echelle]
+    rng = np.random.default_rng(graine)
+    nb_entites = NB_ENTITES_BASE * facteur_entites
+    annees = np.arange(DERNIERE_ANNEE - NB_ANNEES_BASE * facteur_annees + 1, DERNIERE_ANNEE + 1)
+
+    nb_agregats = int(nb_entites * PART_AGREGATS)
+    noms = [f"Agrégat {i:05d}" for i in range(nb_agregats)] + [f"Pays {i:05d}" for i in range(nb_entites - nb_agregats)]
+    codes = [None] * nb_agregats + _codes_iso(nb_entites - nb_agregats)
+
+    # Comme dans le classeur, la plupart des entités couvrent toutes les années ;
+    # les autres commencent plus tard (et couvrent au moins la moitié de la période)
+    premieres = np.where(rng.random(nb_entites) < 0.3, rng.integers(0, len(annees) // 2 + 1, size=nb_entites), 0)
+    lignes_entites = np.concatenate([np.full(len(annees) - p, i) for i, p in enumerate(premieres)])
+    lignes_annees = np.concatenate([annees[p:] for p in premieres])
+    progression = (lignes_annees - annees[0]) / max(len(annees) - 1, 1)
+
+    # Productions : échelle log-normale par entité, hydro stable, solaire et éolien en croissance
+    taille = rng.lognormal(mean=0.0, sigma=2.0, size=nb_entites)[lignes_entites]
+    bruit = rng.lognormal(mean=0.0, sigma=0.1, size=(len(lignes_entites), 3))
+    df = pd.DataFrame({
+        'Country': np.asarray(noms, dtype=object)[lignes_entites],
+        'Code': np.asarray(codes, dtype=object)[lignes_entites],
+        'Year': lignes_annees,
+        'Hydro generation - TWh': np.round(taille * bruit[:, 0], 3),
+        'Solar generation - TWh': np.round(taille * 0.3 * progression ** 3 * bruit[:, 1], 3),
+        'Wind generation - TWh': np.round(taille * 0.5 * progression ** 2 * bruit[:, 2], 3),
+    })
+    return df
+
+
+def generer_correspondance(df_source, graine=0):
+    """Table de correspondance code ISO -> continent des pays d'une source synthétique."""
+    rng = np.random.default_rng(graine)
+    codes = df_source['Code'].dropna().unique()
+    return pd.DataFrame({'code_iso': codes, 'Continent': rng.choice(CONTINENTS, size=len(codes))})
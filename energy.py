@@ -1,11 +1,20 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 import warnings
-import os
+import functools
+import threading
+from contextlib import contextmanager
+
+from tableau_energie import figures
+from tableau_energie.comparaison import calculer_comparaison, pivoter_comparaison
+from tableau_energie.cartes import creer_magasin_cartes
+from tableau_energie.configuration import Configuration
+from tableau_energie.instrumentation import (compter_octets, demarrer_reexecution, ecrire_journal, etape,
+                                             instrumenter_cache, journal_courant, terminer_reexecution)
+from tableau_energie.jeu_donnees import HACHAGE_JEU_DONNEES
+from tableau_energie.regions import NIVEAU_PAYS
 
 warnings.filterwarnings('ignore')
 
@@ -74,447 +83,239 @@ st.markdown("""
 
 # --- FONCTIONS DE CHARGEMENT ET NETTOYAGE DES DONNÉES ---
 
-@st.cache_data
+# Sources, périmètre servi et actualisation, lus dans les variables ENERGIE_* (voir tableau_energie.configuration)
+CONFIGURATION = Configuration.depuis_environnement()
+
 def charger_donnees():
-    """Charge les données de production d'énergie renouvelable à partir du fichier Excel."""
+    """Charge les données de production d'énergie renouvelable à partir des sources configurées."""
     try:
-        chemin_fichier = 'modern-renewable-energy-consumption.xlsx' 
-        df = pd.read_excel(chemin_fichier)
+        with etape('lecture_sources'):
+            df = CONFIGURATION.lire_sources()
         return df
-    except FileNotFoundError:
-        st.error(f"❌ Erreur: Le fichier {chemin_fichier} n'a pas été trouvé. Veuillez vérifier le nom ou le chemin.")
+    except FileNotFoundError as e:
+        st.error(f"❌ Erreur: Le fichier {e.filename} n'a pas été trouvé. Veuillez vérifier le nom ou le chemin.")
         return None
     except Exception as e:
         st.error(f"❌ Erreur lors du chargement des données: {e}")
         return None
 
-@st.cache_data
-def nettoyer_et_preparer_donnees(df):
-    """
-    Nettoie, renomme, convertit les colonnes et RECALCULE le total mondial 
-    en sommant tous les pays pour garantir des KPIs non nuls.
-    """
-    if df is None:
+@instrumenter_cache(st.cache_resource)
+def obtenir_registre():
+    """Charge les données une seule fois pour tout le serveur et retourne le registre partagé."""
+    df_brut = charger_donnees()
+    with etape('nettoyage'):
+        jeu = CONFIGURATION.construire_jeu_donnees(df_brut)
+    if jeu is None:
         return None
+    if jeu.regions is None:
+        st.warning(f"⚠️ Table des régions {CONFIGURATION.chemin_regions} introuvable : seul le niveau pays est disponible.")
     
-    # 1. Renommer les colonnes et convertir les types
-    # La colonne "Autres renouvelables" est retirée du renommage
-    df_nettoye = df.rename(columns={
-        'Country': 'pays', 'Code': 'code_iso', 'Year': 'annee',
-        'Hydro generation - TWh': 'hydro_twh', 'Solar generation - TWh': 'solaire_twh',
-        'Wind generation - TWh': 'eolien_twh',
-    }, errors='ignore').copy()
-    
-    df_nettoye['annee'] = pd.to_numeric(df_nettoye['annee'], errors='coerce').astype('Int64')
-    
-    # Définir les colonnes de production uniquement avec les colonnes confirmées (Hydro, Solaire, Éolien)
-    colonnes_production = ['hydro_twh', 'solaire_twh', 'eolien_twh']
-    
-    # On filtre les colonnes existantes au cas où une source soit totalement absente
-    colonnes_production_existantes = [col for col in colonnes_production if col in df_nettoye.columns]
-    
-    for col in colonnes_production_existantes:
-        df_nettoye[col] = pd.to_numeric(df_nettoye[col], errors='coerce')
-        
-    # Créer une colonne de production totale
-    df_nettoye['production_totale_twh'] = df_nettoye[colonnes_production_existantes].sum(axis=1)
-    
-    # Nettoyer les lignes essentielles
-    df_nettoye = df_nettoye.dropna(subset=['code_iso', 'annee']).copy()
-    
-    # 4. CRÉATION DU TOTAL MONDIAL PAR CALCUL 
-    df_pays_seuls = df_nettoye[df_nettoye['pays'] != 'World'].copy()
-    
-    # Préparer le dictionnaire d'agrégation pour le total mondial
-    aggregation_dict = {col: 'sum' for col in colonnes_production_existantes}
-    aggregation_dict['production_totale_twh'] = 'sum'
-    
-    df_mondial_calcule = df_pays_seuls.groupby('annee').agg(aggregation_dict).reset_index()
-    
-    df_mondial_calcule['pays'] = 'World'
-    df_mondial_calcule['code_iso'] = 'WLD'
-    
-    # Concaténation
-    df_nettoye = df_nettoye[df_nettoye['pays'] != 'World'].copy()
-    df_final = pd.concat([df_nettoye, df_mondial_calcule], ignore_index=True)
-    
-    return df_final
+    return CONFIGURATION.ouvrir_registre(jeu)
 
 # --- FONCTIONS DE VISUALISATION PLOTLY ---
 
-@st.cache_data
-def creer_carte_mondiale(df_filtre, annee_selectionnee):
-    """Crée une carte choroplèthe de la production totale par pays pour une année donnée."""
-    df_annee = df_filtre[df_filtre['annee'] == annee_selectionnee]
-    df_carte = df_annee.groupby(['pays', 'code_iso'])['production_totale_twh'].sum().reset_index()
-    df_carte = df_carte[df_carte['pays'] != 'World']
-    
-    fig = px.choropleth(df_carte, locations="code_iso", locationmode='ISO-3', color="production_totale_twh",
-                        hover_name="pays", color_continuous_scale=px.colors.sequential.Viridis,
-                        title=f"Production Totale d'Énergies Renouvelables dans le Monde ({annee_selectionnee})",
-                        labels={'production_totale_twh': 'Production Totale (TWh)'})
-    fig.update_geos(showframe=False, showcoastlines=False, showland=True, landcolor="lightgray", projection_type="natural earth")
-    fig.update_layout(height=600, margin={"r":0,"t":50,"l":0,"b":0})
-    return fig
-
-@st.cache_data
-def creer_graphe_tendance(df_filtre, pays_selectionne, colonne_data, titre, couleur):
-    """Crée un graphique linéaire générique pour une colonne spécifique (Hydro, Solar, etc.) d'un pays."""
-    
-    df_pays = df_filtre[df_filtre['pays'] == pays_selectionne].sort_values('annee')
-    
-    if colonne_data not in df_pays.columns:
-        return None
-    
-    fig = px.line(df_pays,
-                  x='annee',
-                  y=colonne_data,
-                  markers=True,
-                  title=f"{titre} pour {pays_selectionne}",
-                  labels={colonne_data: 'Production (TWh)', 'annee': 'Année'},
-                  color_discrete_sequence=[couleur]
-                 )
-    
-    fig.update_layout(hovermode="x unified", template='plotly_white')
-    return fig
-
-@st.cache_data
-def creer_mix_energie_pays(df_filtre, pays_selectionne, annee_max):
-    """Crée un graphique à barres montrant le mix énergétique d'un pays pour l'année la plus récente."""
-    
-    df_mix_line = df_filtre[(df_filtre['pays'] == pays_selectionne) & 
-                            (df_filtre['annee'] == annee_max)]
-    
-    if df_mix_line.empty: return None
-    
-    # Sélectionner toutes les colonnes de TWh (UNIQUEMENT Hydro, Solaire, Eolien)
-    colonnes_twh = ['hydro_twh', 'solaire_twh', 'eolien_twh']
-    colonnes_twh_existantes = [col for col in colonnes_twh if col in df_mix_line.columns]
-    
-    df_mix = df_mix_line[colonnes_twh_existantes].T.reset_index()
-    df_mix.columns = ['type_energie', 'production_twh']
-    
-    # Nettoyer les noms et définir les couleurs
-    couleurs_map = {'Hydro': '#2196f3', 'Solaire': '#ff9800', 'Eolien': '#4caf50'}
-    df_mix['type_energie'] = df_mix['type_energie'].str.replace('_twh', '').str.title()
-    df_mix = df_mix[df_mix['production_twh'] > 0]
-    
-    if df_mix.empty: return None
-    
-    fig = px.bar(df_mix, x='type_energie', y='production_twh', color='type_energie',
-                  title=f"Mix Énergétique Renouvelable au {pays_selectionne} en {annee_max}",
-                  labels={'production_twh': 'Production (TWh)', 'type_energie': 'Type d\'Énergie'},
-                  color_discrete_map={k.title(): v for k, v in couleurs_map.items()})
-    
-    fig.update_layout(template='plotly_white')
-    return fig
-
-@st.cache_data
-def creer_comparaison_pays(df, pays_selectionnes, annee_comparaison, energies_selectionnees, type_graphique="group"):
-    """Crée un graphique en colonnes pour comparer les pays selon les types d'énergie sélectionnés."""
-    
-    # Filtrer les données
-    df_comparaison = df[(df['pays'].isin(pays_selectionnes)) & 
-                        (df['annee'] == annee_comparaison)].copy()
-    
-    if df_comparaison.empty:
-        return None, None
-    
-    # Préparer les données pour le graphique
-    data_list = []
-    data_list_pourcent = []
-    
-    for index, row in df_comparaison.iterrows():
-        # Calculer le total pour ce pays
-        total_pays = 0
-        valeurs_energies = {}
-        
-        for energie in energies_selectionnees:
-            if energie in row and pd.notna(row[energie]):
-                valeur = row[energie] if row[energie] > 0 else 0
-                valeurs_energies[energie] = valeur
-                total_pays += valeur
-            else:
-                valeurs_energies[energie] = 0
-        
-        # Ajouter les données absolues
-        for energie in energies_selectionnees:
-            valeur = valeurs_energies[energie]
-            # Convertir le nom de l'énergie pour l'affichage
-            nom_energie = energie.replace('_twh', '').title()
-            data_list.append({
-                'Pays': row['pays'],
-                'Type d\'énergie': nom_energie,
-                'Production (TWh)': valeur,
-                'Pourcentage (%)': (valeur / total_pays * 100) if total_pays > 0 else 0
-            })
-        
-        # Ajouter les données en pourcentage
-        for energie in energies_selectionnees:
-            valeur = valeurs_energies[energie]
-            pourcentage = (valeur / total_pays * 100) if total_pays > 0 else 0
-            nom_energie = energie.replace('_twh', '').title()
-            data_list_pourcent.append({
-                'Pays': row['pays'],
-                'Type d\'énergie': nom_energie,
-                'Pourcentage (%)': pourcentage,
-                'Production (TWh)': valeur
-            })
-    
-    if not data_list:
-        return None, None
-    
-    df_plot = pd.DataFrame(data_list)
-    df_plot_pourcent = pd.DataFrame(data_list_pourcent)
-    
-    # Définir les couleurs par type d'énergie
-    couleurs_map = {'Hydro': '#2196f3', 'Solaire': '#ff9800', 'Eolien': '#4caf50'}
-    
-    # Créer le graphique selon le type choisi
-    if type_graphique == "empile":
-        barmode = "stack"
-        title = f"Comparaison des pays en {annee_comparaison} - Barres Empilées (TWh)"
-        
-        # Créer un deuxième graphique avec les pourcentages
-        title_pourcent = f"Répartition des énergies par pays en {annee_comparaison} - Parts (%)"
-        
-        fig = px.bar(df_plot, 
-                     x='Pays', 
-                     y='Production (TWh)', 
-                     color='Type d\'énergie',
-                     barmode=barmode,
-                     title=title,
-                     color_discrete_map=couleurs_map,
-                     labels={'Production (TWh)': 'Production (TWh)'},
-                     hover_data=['Pourcentage (%)'])
-        
-        # Créer un graphique pour les pourcentages
-        fig_pourcent = px.bar(df_plot_pourcent, 
-                              x='Pays', 
-                              y='Pourcentage (%)', 
-                              color='Type d\'énergie',
-                              barmode='stack',
-                              title=title_pourcent,
-                              color_discrete_map=couleurs_map,
-                              labels={'Pourcentage (%)': 'Part (%)'},
-                              hover_data=['Production (TWh)'])
-        
-        fig_pourcent.update_layout(
-            xaxis_title="Pays",
-            yaxis_title="Part (%)",
-            template='plotly_white',
-            hovermode="x unified",
-            legend_title="Type d'énergie",
-            yaxis=dict(ticksuffix="%", range=[0, 100])
-        )
-        
-        return fig, fig_pourcent
-        
-    else:
-        barmode = "group"
-        title = f"Comparaison des pays en {annee_comparaison} - Barres Groupées"
-        
-        fig = px.bar(df_plot, 
-                     x='Pays', 
-                     y='Production (TWh)', 
-                     color='Type d\'énergie',
-                     barmode=barmode,
-                     title=title,
-                     color_discrete_map=couleurs_map,
-                     labels={'Production (TWh)': 'Production (TWh)'})
-        
-        fig.update_layout(
-            xaxis_title="Pays",
-            yaxis_title="Production (TWh)",
-            template='plotly_white',
-            hovermode="x unified",
-            legend_title="Type d'énergie"
-        )
-        
-        return fig, None
-
-@st.cache_data
-def creer_tableau_pourcentages(df, pays_selectionnes, annee_comparaison, energies_selectionnees):
+# Entrées conservées par fonction mise en cache : chaque version publiée par l'actualisation
+# ajoute les siennes, les moins récemment utilisées sont évincées au-delà de cette limite
+ENTREES_MAX_CACHE = 256
+
+@instrumenter_cache(st.cache_resource(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=2))
+def obtenir_magasin_cartes(jeu):
+    """Magasin de cartes partagé de la version courante, préchauffé en arrière-plan."""
+    return creer_magasin_cartes(jeu)
+
+def transmettre_contexte_streamlit():
+    """Capture le contexte de la session pour l'activer dans le fil du pool de figures."""
+    ctx = get_script_run_ctx()
+    
+    @contextmanager
+    def activer():
+        # Le fil du pool sert ensuite d'autres sessions : ses attributs (dont le contexte qu'y range
+        # Streamlit) sont remis dans leur état précédent, au lieu de garder le contexte de celle-ci
+        fil = threading.current_thread()
+        attributs_precedents = dict(vars(fil))
+        add_script_run_ctx(fil, ctx)
+        try:
+            yield
+        finally:
+            for nom in set(vars(fil)) - set(attributs_precedents):
+                delattr(fil, nom)
+            vars(fil).update(attributs_precedents)
+    
+    return activer
+
+@instrumenter_cache(st.cache_resource)
+def obtenir_planificateur():
+    """Pool de construction parallèle des figures, partagé par toutes les sessions (ENERGIE_FILS_FIGURES)."""
+    return CONFIGURATION.ouvrir_planificateur(transmettre_contexte_streamlit)
+
+# Constructeurs de figures du paquet (sans Streamlit), mis en cache par version du jeu de données.
+# Chaque appel est une étape instrumentée : succès ou échec du cache, temps de calcul et surcoût du cache.
+# Ils sont soumis au planificateur : sans indicateur de chargement, qu'un fil du pool écrirait
+# dans la page en même temps que le script
+creer_graphe_tendance = instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE, show_spinner=False))(figures.creer_graphe_tendance)
+creer_mix_energie_pays = instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE, show_spinner=False))(figures.creer_mix_energie_pays)
+creer_tendance_filtree = instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE, show_spinner=False))(figures.creer_tendance_filtree)
+creer_barres_filtrees = instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE, show_spinner=False))(figures.creer_barres_filtrees)
+creer_treemap_distribution = instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE, show_spinner=False))(figures.creer_treemap_distribution)
+
+@instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE))
+def preparer_comparaison(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees):
+    """Calcule une seule fois les valeurs, totaux et parts partagés par le graphique et les tableaux de comparaison."""
+    return calculer_comparaison(jeu.cube, pays_selectionnes, annee_comparaison, energies_selectionnees)
+
+@instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE))
+def creer_comparaison_pays(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees, type_graphique="group"):
+    """Crée les graphiques de comparaison à partir du calcul partagé avec les tableaux."""
+    df_comparaison = preparer_comparaison(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees)
+    return figures.creer_comparaison_pays(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees,
+                                          type_graphique, df_comparaison=df_comparaison)
+
+@instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE))
+def creer_tableau_pourcentages(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees):
     """Crée un tableau des pourcentages pour chaque pays et chaque type d'énergie."""
     
-    # Filtrer les données
-    df_comparaison = df[(df['pays'].isin(pays_selectionnes)) & 
-                        (df['annee'] == annee_comparaison)].copy()
+    df_comparaison = preparer_comparaison(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees)
     
-    if df_comparaison.empty:
+    if df_comparaison is None:
         return None
     
-    # Préparer les données pour le tableau
-    tableau_data = []
-    
-    for index, row in df_comparaison.iterrows():
-        pays = row['pays']
-        total_pays = 0
-        valeurs = {}
-        
-        # Récupérer les valeurs
-        for energie in energies_selectionnees:
-            if energie in row and pd.notna(row[energie]):
-                valeur = row[energie] if row[energie] > 0 else 0
-                valeurs[energie] = valeur
-                total_pays += valeur
-            else:
-                valeurs[energie] = 0
-        
-        # Calculer les pourcentages
-        pourcentages = {}
-        for energie in energies_selectionnees:
-            pourcentage = (valeurs[energie] / total_pays * 100) if total_pays > 0 else 0
-            nom_energie = energie.replace('_twh', '').title()
-            pourcentages[nom_energie] = pourcentage
-        
-        # Ajouter une ligne au tableau
-        ligne = {'Pays': pays, 'Total (TWh)': total_pays}
-        ligne.update(pourcentages)
-        tableau_data.append(ligne)
-    
-    if not tableau_data:
-        return None
-    
-    df_tableau = pd.DataFrame(tableau_data)
-    
-    # Trier par total décroissant
-    df_tableau = df_tableau.sort_values('Total (TWh)', ascending=False)
-    
-    return df_tableau
+    return pivoter_comparaison(df_comparaison, 'Pourcentage (%)')
 
-@st.cache_data
-def creer_tableau_valeurs_absolues(df, pays_selectionnes, annee_comparaison, energies_selectionnees):
+@instrumenter_cache(st.cache_data(hash_funcs=HACHAGE_JEU_DONNEES, max_entries=ENTREES_MAX_CACHE))
+def creer_tableau_valeurs_absolues(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees):
     """Crée un tableau des valeurs absolues pour chaque pays et chaque type d'énergie."""
     
-    # Filtrer les données
-    df_comparaison = df[(df['pays'].isin(pays_selectionnes)) & 
-                        (df['annee'] == annee_comparaison)].copy()
-    
-    if df_comparaison.empty:
-        return None
-    
-    # Préparer les données pour le tableau
-    tableau_data = []
+    df_comparaison = preparer_comparaison(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees)
     
-    for index, row in df_comparaison.iterrows():
-        pays = row['pays']
-        total_pays = 0
-        valeurs = {}
-        
-        # Récupérer les valeurs
-        for energie in energies_selectionnees:
-            if energie in row and pd.notna(row[energie]):
-                valeur = row[energie] if row[energie] > 0 else 0
-                valeurs[energie] = valeur
-                total_pays += valeur
-            else:
-                valeurs[energie] = 0
-        
-        # Ajouter une ligne au tableau
-        ligne = {'Pays': pays, 'Total (TWh)': total_pays}
-        for energie in energies_selectionnees:
-            nom_energie = energie.replace('_twh', '').title()
-            ligne[nom_energie] = valeurs[energie]
-        
-        tableau_data.append(ligne)
-    
-    if not tableau_data:
+    if df_comparaison is None:
         return None
     
-    df_tableau = pd.DataFrame(tableau_data)
-    
-    # Trier par total décroissant
-    df_tableau = df_tableau.sort_values('Total (TWh)', ascending=False)
-    
-    return df_tableau
-
-@st.cache_data
-def creer_treemap_distribution(df):
-    """Crée un Treemap montrant la distribution de la part énergétique par pays."""
-    
-    # Filtrer les données pour l'année la plus récente
-    annee_max = df['annee'].max()
-    df_annee = df[df['annee'] == annee_max].copy()
-    
-    # Préparer les données pour le treemap - nous avons besoin de fondre les colonnes d'énergie
-    colonnes_energie = ['hydro_twh', 'solaire_twh', 'eolien_twh']
-    colonnes_energie_existantes = [col for col in colonnes_energie if col in df_annee.columns]
-    
-    # Créer une version fondue du dataframe pour avoir une colonne type_energie
-    id_vars = ['pays', 'code_iso', 'annee', 'production_totale_twh']
-    df_fondu = df_annee.melt(
-        id_vars=id_vars,
-        value_vars=colonnes_energie_existantes,
-        var_name='type_energie',
-        value_name='production_twh'
-    )
-    
-    # Nettoyer les noms des types d'énergie
-    df_fondu['type_energie'] = df_fondu['type_energie'].str.replace('_twh', '').str.title()
-    
-    # Filtrer les lignes avec production positive
-    df_fondu = df_fondu[df_fondu['production_twh'] > 0]
-    
-    # Créer la structure hiérarchique : Racine -> Pays -> Types d'Énergie
-    etiquette_racine = 'Monde'
-    
-    # Préparer les listes d'étiquettes et de parents
-    etiquettes = [etiquette_racine]
-    parents = ['']
-    valeurs = [df_fondu['production_twh'].sum()]
-    
-    # Ajouter les pays comme niveau intermédiaire
-    for pays in df_fondu['pays'].unique():
-        if pays != 'World':  # Exclure World pour éviter la duplication
-            etiquettes.append(pays)
-            parents.append(etiquette_racine)
-            total_pays = df_fondu[df_fondu['pays'] == pays]['production_twh'].sum()
-            valeurs.append(total_pays)
-    
-    # Ajouter les types d'énergie sous les pays
-    for pays in df_fondu['pays'].unique():
-        if pays != 'World':
-            for type_energie in df_fondu[df_fondu['pays'] == pays]['type_energie'].unique():
-                etiquettes.append(f"{type_energie}")
-                parents.append(pays)
-                valeur = df_fondu[(df_fondu['pays'] == pays) & 
-                                  (df_fondu['type_energie'] == type_energie)]['production_twh'].sum()
-                valeurs.append(valeur)
-    
-    fig = go.Figure(go.Treemap(
-        labels=etiquettes,
-        parents=parents,
-        values=valeurs,
-        marker=dict(colorscale='Greens', cmid=np.median(valeurs)),
-        hovertemplate='<b>%{label}</b><br>Production: %{value:,.0f} TWh<extra></extra>',
-        textinfo="label+value"
-    ))
-    
-    fig.update_layout(
-        title=f"Distribution de l'Énergie Renouvelable par Pays ({annee_max})",
-        height=600,
-        margin=dict(t=50, l=0, r=0, b=0)
-    )
-    
-    return fig
+    return pivoter_comparaison(df_comparaison, 'Production (TWh)')
+
+def afficher_graphique(nom, fig):
+    """Affiche une figure Plotly : sa sérialisation et son envoi forment une étape instrumentée."""
+    with etape(f"affichage_{nom}"):
+        st.plotly_chart(fig, use_container_width=True)
+
+# --- INSTRUMENTATION DES RÉEXÉCUTIONS ---
+
+def diagnostic_demande():
+    """Panneau de diagnostic activé par la configuration ou par le paramètre d'URL ?diagnostic=1."""
+    return CONFIGURATION.diagnostic or st.query_params.get('diagnostic') == '1'
+
+def instrumentation_demandee():
+    return diagnostic_demande() or CONFIGURATION.journal_performances is not None
+
+# `_enqueue` est une API privée de Streamlit : elle n'est remplacée que si elle existe, jamais deux fois,
+# et l'original est remis en place à la fin de la réexécution (ou avant un arrêt anticipé). Une
+# réexécution interrompue par une exception le laisse en place jusqu'à la suivante : il ne compte
+# alors rien, faute de journal ouvert.
+def compter_octets_envoyes(ctx):
+    """Fait compter au journal courant les octets de chaque message envoyé au navigateur."""
+    envoyer = getattr(ctx, '_enqueue', None)
+    if not callable(envoyer) or getattr(ctx, 'envoi_original', None) is not None:
+        return
+    
+    def envoyer_en_comptant(msg):
+        if journal_courant() is not None:
+            compter_octets(msg.ByteSize())
+        envoyer(msg)
+    
+    ctx.envoi_original = envoyer
+    ctx._enqueue = envoyer_en_comptant
+
+def restaurer_envoi():
+    """Remet en place la fonction d'envoi de Streamlit remplacée par `compter_octets_envoyes`."""
+    ctx = get_script_run_ctx()
+    envoi_original = getattr(ctx, 'envoi_original', None)
+    if envoi_original is not None:
+        ctx._enqueue = envoi_original
+        ctx.envoi_original = None
+
+def demarrer_instrumentation(portee='page'):
+    """Ouvre le journal de la réexécution et compte les octets envoyés pendant chaque étape."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    compter_octets_envoyes(ctx)
+    numero = st.session_state.get('numero_reexecution', 0) + 1
+    st.session_state['numero_reexecution'] = numero
+    demarrer_reexecution(session=ctx.session_id, numero=numero, portee=portee)
+
+def afficher_diagnostic(journal):
+    """Panneau de la barre latérale : durée, état du cache et octets envoyés par étape."""
+    duree_etapes = sum(e['duree_ms'] for e in journal.etapes if e['profondeur'] == 0)
+    with st.sidebar.expander("Diagnostic des performances", expanded=True):
+        st.markdown(f"**Réexécution n° {journal.numero}** (données version n° {journal.version_donnees})")
+        st.write(f"Durée totale : {journal.duree_ms:,.0f} ms, dont {journal.duree_ms - duree_etapes:,.0f} ms hors étapes")
+        st.write(f"Envoyé au navigateur : {journal.octets / 1024:,.1f} Ko")
+        st.dataframe(pd.DataFrame({
+            'Étape': ['\u2003' * e['profondeur'] + e['nom'] for e in journal.etapes],
+            'Durée (ms)': [round(e['duree_ms'], 1) for e in journal.etapes],
+            'Calcul (ms)': [round(e['calcul_ms'], 1) if 'calcul_ms' in e else None for e in journal.etapes],
+            'Cache': [e['cache'] for e in journal.etapes],
+            'Octets': [e['octets'] for e in journal.etapes],
+        }), use_container_width=True, hide_index=True)
+
+def conclure_instrumentation(version_donnees):
+    """Clôt le journal de la réexécution : ligne JSON et, pour la page entière, panneau de diagnostic."""
+    restaurer_envoi()
+    journal = terminer_reexecution()
+    if journal is None:
+        return
+    journal.version_donnees = version_donnees
+    if CONFIGURATION.journal_performances:
+        ecrire_journal(CONFIGURATION.journal_performances, journal)
+    if journal.portee == 'page' and diagnostic_demande():
+        afficher_diagnostic(journal)
+
+# --- SECTIONS ISOLÉES ---
+
+def section_isolee(fonction):
+    """Rend la section dans un fragment Streamlit : ses widgets ne réexécutent qu'elle."""
+    if not CONFIGURATION.fragments:
+        return fonction
+    
+    @functools.wraps(fonction)
+    def section(*args, **kwargs):
+        if journal_courant() is not None or not instrumentation_demandee():
+            return fonction(*args, **kwargs)
+        demarrer_instrumentation(portee=fonction.__name__)
+        try:
+            return fonction(*args, **kwargs)
+        finally:
+            conclure_instrumentation(registre.numero)
+    
+    return st.fragment(section)
 
 # --------------------------------------------------------------------------------
 # LOGIQUE PRINCIPALE DE L'APPLICATION
 # --------------------------------------------------------------------------------
 
+# Journal des étapes de cette réexécution (panneau de diagnostic et/ou fichier JSON Lines)
+if instrumentation_demandee():
+    demarrer_instrumentation()
+
 # CHARGEMENT DES DONNÉES
 with st.spinner("Chargement des données..."):
-    df_brut = charger_donnees()
-    df_principal = nettoyer_et_preparer_donnees(df_brut)
+    registre_partage = obtenir_registre()
+
+# Une seule vue par réexécution : une actualisation publiée en cours de route ne mélange pas deux versions
+registre = None if registre_partage is None else registre_partage.vue()
 
-if df_principal is None or df_principal.empty:
+if registre is None or registre.df.empty:
     st.error("❌ Le jeu de données est vide après le nettoyage. Veuillez vérifier le contenu de votre fichier Excel.")
+    restaurer_envoi()
     st.stop()
 
+# Vues en lecture seule sur les données partagées par toutes les sessions
+jeu_principal = registre.jeu
+df_principal = registre.df
+cube_principal = registre.cube
+
 # PRÉPARATION DES VALEURS CLÉS GLOBALES
-annees_disponibles = sorted(df_principal['annee'].unique())
-pays_disponibles = sorted([p for p in df_principal['pays'].unique() if p != 'World'])
+annees_disponibles = list(registre.annees_disponibles())
+pays_disponibles = list(registre.pays_disponibles())
 annee_max = df_principal['annee'].max()
 annee_min = df_principal['annee'].min()
 
@@ -528,6 +329,30 @@ annee_carte = st.sidebar.select_slider(
     value=annee_max
 )
 
+mode_animation_carte = st.sidebar.toggle(
+    "Carte animée (toutes les années)",
+    value=False,
+    key="mode_animation_carte",
+    help="Envoie une seule carte contenant toutes les années : le parcours des années se fait dans le navigateur, sans rechargement."
+)
+
+# Niveau d'agrégation : les cubes régionaux sont précalculés, changer de niveau est instantané
+niveaux_disponibles = jeu_principal.niveaux()
+niveau_agregation = NIVEAU_PAYS
+if len(niveaux_disponibles) > 1:
+    niveau_agregation = st.sidebar.radio(
+        "Niveau d'agrégation (Carte, Métriques et Treemap)",
+        options=niveaux_disponibles,
+        key="niveau_agregation",
+        horizontal=True
+    )
+
+st.sidebar.caption(f"Données : version n° {registre.numero}")
+
+# Le treemap ne dépend que du niveau d'agrégation : construit en parallèle de la carte et des onglets
+construction_treemap = obtenir_planificateur().soumettre(
+    'treemap', creer_treemap_distribution, jeu_principal, niveau=niveau_agregation)
+
 # --- AFFICHAGE DU CONTENU ---
 
 # TITRES PRINCIPAUX
@@ -561,31 +386,19 @@ st.header("Aperçu Mondial 📊")
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
-# Calcul des métriques mondiales
-df_mondial = df_principal[df_principal['pays'] == 'World'].copy()
-
-if df_mondial.empty or df_mondial['annee'].empty:
-    prod_min_annee = 0
-    prod_max_annee = 0
-    prod_mondiale_annee_ref = 0
-    prod_moyenne_annuelle = 0
-else:
-    annee_mondiale_min = df_mondial['annee'].min()
-    annee_mondiale_max = df_mondial['annee'].max()
-    
-    prod_min_annee = df_mondial[df_mondial['annee'] == annee_mondiale_min]['production_totale_twh'].values[0]
-    prod_max_annee = df_mondial[df_mondial['annee'] == annee_mondiale_max]['production_totale_twh'].values[0]
-    
-    prod_ref_serie = df_mondial[df_mondial['annee'] == annee_carte]['production_totale_twh']
-    prod_mondiale_annee_ref = prod_ref_serie.values[0] if prod_ref_serie.size > 0 else 0
-    
-    prod_moyenne_annuelle = df_mondial['production_totale_twh'].mean()
+# Métriques mondiales (calculées une seule fois pour toutes les sessions)
+indicateurs_mondiaux = registre.indicateurs_mondiaux()
+prod_min_annee = indicateurs_mondiaux['prod_min_annee']
+prod_max_annee = indicateurs_mondiaux['prod_max_annee']
+prod_mondiale_annee_ref = indicateurs_mondiaux['production_par_annee'].get(int(annee_carte), 0)
+prod_moyenne_annuelle = indicateurs_mondiaux['prod_moyenne_annuelle']
 
 taux_croissance_mondiale = 0
 if prod_min_annee > 0 and prod_max_annee > 0:
     taux_croissance_mondiale = ((prod_max_annee / prod_min_annee) - 1) * 100
     
 nb_pays_analyses = len(pays_disponibles) 
+nb_regions_analysees = len(jeu_principal.cube_niveau(niveau_agregation).pays)
 nb_types_energie = 3 
 annees_couvertes = annee_max - annee_min + 1
 
@@ -597,7 +410,11 @@ with col1:
     )
 
 with col2:
-    st.metric(label="Pays analysés", value=f"{nb_pays_analyses}")
+    if niveau_agregation == NIVEAU_PAYS:
+        st.metric(label="Pays analysés", value=f"{nb_pays_analyses}")
+    else:
+        st.metric(label=f"Régions analysées ({niveau_agregation})", value=f"{nb_regions_analysees}",
+                  delta=f"{nb_pays_analyses} pays", delta_color="off")
 
 with col3:
     st.metric(label="Types d'énergie suivis", value=f"{nb_types_energie} sources")
@@ -620,15 +437,30 @@ st.markdown(f"""
 Les pays grisés n'ont pas de données pour cette année dans le jeu de données.
 """)
 
-fig_carte = creer_carte_mondiale(df_principal, annee_carte)
-st.plotly_chart(fig_carte, use_container_width=True)
+if mode_animation_carte:
+    # Une seule figure avec une image par année : seules les valeurs changent d'une année à l'autre
+    fig_carte = obtenir_magasin_cartes(jeu_principal).obtenir(None, 'production_totale_twh', niveau_agregation)
+else:
+    fig_carte = obtenir_magasin_cartes(jeu_principal).obtenir(int(annee_carte), 'production_totale_twh', niveau_agregation)
+afficher_graphique('carte', fig_carte)
 
 st.divider()
 
 # --- ONGLETS POUR ANALYSE ET COMPARAISON ---
-tab1, tab2 = st.tabs(["📈 Analyse Pays", "⚖️ Comparaison"])
 
-with tab1:
+# Clés des widgets de chaque onglet. Streamlit oublie l'état des widgets qui ne sont pas
+# affichés : celui des widgets de l'onglet masqué est reconduit tel quel à chaque exécution.
+WIDGETS_ANALYSE_PAYS = ('pays_analyse', 'annee_debut_analyse', 'annee_fin_analyse', 'annee_exemple_analyse')
+WIDGETS_COMPARAISON = ('type_graphique_comparaison', 'annee_comparaison', 'energies_comparaison', 'pays_comparaison')
+
+def conserver_widgets(cles):
+    """Conserve les valeurs des widgets d'un onglet masqué jusqu'à son prochain affichage."""
+    for cle in cles:
+        if cle in st.session_state:
+            st.session_state[cle] = st.session_state[cle]
+
+def afficher_analyse_pays(registre, jeu_principal, cube_principal, pays_disponibles, annees_disponibles):
+    """Onglet d'analyse d'un pays : période, statistiques, tendances et mix énergétique."""
     st.header("Analyse par Pays 📈")
     
     # Sélection du pays (sans World)
@@ -670,30 +502,42 @@ with tab1:
             st.warning("L'année de fin doit être supérieure ou égale à l'année de début.")
             annee_fin = annee_debut
         
-        # Filtrer les données pour le pays et la période sélectionnés
-        df_pays_periode = df_principal[(df_principal['pays'] == pays_selectionne) & 
-                                       (df_principal['annee'] >= annee_debut) & 
-                                       (df_principal['annee'] <= annee_fin)].copy()
+        # Extraire les données du pays pour la période sélectionnée
+        df_pays_periode = cube_principal.tableau_pays(pays_selectionne, annee_debut, annee_fin)
         
         if not df_pays_periode.empty:
-            # Calcul des statistiques pour la période
-            total_periode = df_pays_periode['production_totale_twh'].sum()
-            moyenne_periode = df_pays_periode['production_totale_twh'].mean()
-            max_periode = df_pays_periode['production_totale_twh'].max()
-            min_periode = df_pays_periode['production_totale_twh'].min()
-            annee_max_periode = df_pays_periode.loc[df_pays_periode['production_totale_twh'].idxmax(), 'annee']
-            annee_min_periode = df_pays_periode.loc[df_pays_periode['production_totale_twh'].idxmin(), 'annee']
+            # Les cinq figures de l'onglet se construisent en parallèle pendant l'affichage des statistiques
+            planificateur = obtenir_planificateur()
+            construction_tendance = planificateur.soumettre(
+                'tendance', creer_graphe_tendance, jeu_principal, pays_selectionne, 'production_totale_twh',
+                f"Tendance de la Production Totale Renouvelable au {pays_selectionne}", '#1f7e3f', annee_debut, annee_fin)
+            construction_mix = planificateur.soumettre('mix', creer_mix_energie_pays, jeu_principal, pays_selectionne, annee_fin)
+            construction_hydro = planificateur.soumettre(
+                'hydro', creer_graphe_tendance, jeu_principal, pays_selectionne, "hydro_twh",
+                "Production d'hydroélectricité", '#2196f3', annee_debut, annee_fin)
+            construction_eolien = planificateur.soumettre(
+                'eolien', creer_graphe_tendance, jeu_principal, pays_selectionne, "eolien_twh",
+                "Production d'énergie éolienne", '#4caf50', annee_debut, annee_fin)
+            construction_solaire = planificateur.soumettre(
+                'solaire', creer_graphe_tendance, jeu_principal, pays_selectionne, "solaire_twh",
+                "Production d'énergie solaire", '#ff9800', annee_debut, annee_fin)
+            
+            # Calcul des statistiques pour la période (tables précalculées par version, O(1) par requête)
+            statistiques_periode = registre.statistiques_periode()
+            stats_total = statistiques_periode.statistiques(pays_selectionne, annee_debut, annee_fin)
+            total_periode = stats_total['total']
+            moyenne_periode = stats_total['moyenne']
+            max_periode = stats_total['max']
+            min_periode = stats_total['min']
+            annee_max_periode = stats_total['annee_max']
+            annee_min_periode = stats_total['annee_min']
             
             # Calcul par type d'énergie
             stats_energies = {}
             for energie in ['hydro_twh', 'solaire_twh', 'eolien_twh']:
-                if energie in df_pays_periode.columns:
-                    stats_energies[energie] = {
-                        'total': df_pays_periode[energie].sum(),
-                        'moyenne': df_pays_periode[energie].mean(),
-                        'max': df_pays_periode[energie].max(),
-                        'min': df_pays_periode[energie].min()
-                    }
+                if energie in statistiques_periode.colonnes:
+                    stats_energies[energie] = statistiques_periode.statistiques(pays_selectionne, annee_debut, annee_fin,
+                                                                                colonne=energie)
             
             # Afficher les statistiques
             st.subheader(f"Statistiques pour {pays_selectionne} ({annee_debut}-{annee_fin})")
@@ -766,16 +610,14 @@ with tab1:
             col_tendance, col_mix = st.columns(2)
             
             with col_tendance:
-                fig_tendance = creer_graphe_tendance(df_pays_periode, pays_selectionne, 'production_totale_twh',
-                                                    f"Tendance de la Production Totale Renouvelable au {pays_selectionne}",
-                                                    '#1f7e3f')
+                fig_tendance = construction_tendance.resultat()
                 if fig_tendance:
-                    st.plotly_chart(fig_tendance, use_container_width=True)
+                    afficher_graphique('tendance', fig_tendance)
             
             with col_mix:
-                fig_mix = creer_mix_energie_pays(df_pays_periode, pays_selectionne, annee_fin)
+                fig_mix = construction_mix.resultat()
                 if fig_mix:
-                    st.plotly_chart(fig_mix, use_container_width=True)
+                    afficher_graphique('mix', fig_mix)
                 else:
                     st.info(f"Aucune donnée de mix énergétique disponible pour l'année {annee_fin} dans ce pays.")
             
@@ -799,34 +641,34 @@ with tab1:
             
             # 🔹 Hydro
             st.markdown("##### 🌊 Production d'hydroélectricité (TWh)")
-            fig_hydro = creer_graphe_tendance(df_pays_periode, pays_selectionne, "hydro_twh",
-                                            "Production d'hydroélectricité", '#2196f3')
+            fig_hydro = construction_hydro.resultat()
             if fig_hydro:
-                st.plotly_chart(fig_hydro, use_container_width=True)
+                afficher_graphique('hydro', fig_hydro)
             else:
                 st.info("Données d'hydroélectricité non disponibles pour ce pays.")
             
             # 🔹 Wind
             st.markdown("##### 🌬️ Production d'énergie éolienne (TWh)")
-            fig_eolien = creer_graphe_tendance(df_pays_periode, pays_selectionne, "eolien_twh",
-                                            "Production d'énergie éolienne", '#4caf50')
+            fig_eolien = construction_eolien.resultat()
             if fig_eolien:
-                st.plotly_chart(fig_eolien, use_container_width=True)
+                afficher_graphique('eolien', fig_eolien)
             else:
                 st.info("Données d'énergie éolienne non disponibles pour ce pays.")
             
             # 🔹 Solar
             st.markdown("##### ☀️ Production d'énergie solaire (TWh)")
-            fig_solaire = creer_graphe_tendance(df_pays_periode, pays_selectionne, "solaire_twh",
-                                              "Production d'énergie solaire", '#ff9800')
+            fig_solaire = construction_solaire.resultat()
             if fig_solaire:
-                st.plotly_chart(fig_solaire, use_container_width=True)
+                afficher_graphique('solaire', fig_solaire)
             else:
                 st.info("Données d'énergie solaire non disponibles pour ce pays.")
         else:
             st.warning(f"Aucune donnée disponible pour {pays_selectionne} sur la période {annee_debut}-{annee_fin}.")
 
-with tab2:
+# Section isolée : les contrôles de comparaison ne réexécutent que cet onglet
+@section_isolee
+def afficher_comparaison(jeu_principal, pays_disponibles, annees_disponibles):
+    """Onglet de comparaison entre pays : contrôles, graphiques et tableaux."""
     st.header("Comparaison entre Pays ⚖️")
     
     # Titre comme dans l'image
@@ -900,7 +742,7 @@ with tab2:
                         energies_colonnes.append('eolien_twh')
                 
                 # Créer le graphique de comparaison
-                fig_comparaison, fig_pourcent = creer_comparaison_pays(df_principal, pays_comparaison, annee_comparaison, energies_colonnes, type_graph)
+                fig_comparaison, fig_pourcent = creer_comparaison_pays(jeu_principal, pays_comparaison, annee_comparaison, energies_colonnes, type_graph)
                 
                 if fig_comparaison:
                     # Personnaliser le titre
@@ -912,7 +754,7 @@ with tab2:
                         )
                         
                         # Afficher le graphique des valeurs absolues
-                        st.plotly_chart(fig_comparaison, use_container_width=True)
+                        afficher_graphique('comparaison', fig_comparaison)
                         
                         # Afficher le graphique des pourcentages
                         if fig_pourcent:
@@ -921,7 +763,7 @@ with tab2:
                                 title_font=dict(size=20, color='#2e7d32'),
                                 height=500
                             )
-                            st.plotly_chart(fig_pourcent, use_container_width=True)
+                            afficher_graphique('comparaison_pourcentages', fig_pourcent)
                         
                         # AFFICHER LES TABLEAUX POUR BARRES EMPILÉES
                         
@@ -929,7 +771,7 @@ with tab2:
                         st.markdown("### Tableau des Pourcentages par Pays")
                         
                         # Créer le tableau des pourcentages
-                        df_tableau_pourcent = creer_tableau_pourcentages(df_principal, pays_comparaison, annee_comparaison, energies_colonnes)
+                        df_tableau_pourcent = creer_tableau_pourcentages(jeu_principal, pays_comparaison, annee_comparaison, energies_colonnes)
                         
                         if df_tableau_pourcent is not None:
                             # Formater les nombres
@@ -979,7 +821,7 @@ with tab2:
                         )
                         
                         # Afficher le graphique
-                        st.plotly_chart(fig_comparaison, use_container_width=True)
+                        afficher_graphique('comparaison', fig_comparaison)
                         
                         # AFFICHER LES TABLEAUX POUR BARRES GROUPÉES
                         
@@ -987,7 +829,7 @@ with tab2:
                         st.markdown("### Tableau des Valeurs Absolues (TWh)")
                         
                         # Créer le tableau des valeurs absolues
-                        df_tableau_valeurs = creer_tableau_valeurs_absolues(df_principal, pays_comparaison, annee_comparaison, energies_colonnes)
+                        df_tableau_valeurs = creer_tableau_valeurs_absolues(jeu_principal, pays_comparaison, annee_comparaison, energies_colonnes)
                         
                         if df_tableau_valeurs is not None:
                             # Formater les nombres
@@ -1002,6 +844,26 @@ with tab2:
             else:
                 st.info("Veuillez sélectionner au moins un pays et un type d'énergie pour afficher la comparaison.")
 
+# Section isolée : changer d'onglet ne réexécute que les onglets, et seul l'onglet affiché est calculé
+@section_isolee
+def afficher_onglets(registre, jeu_principal, cube_principal, pays_disponibles, annees_disponibles):
+    """Onglets « Analyse Pays » et « Comparaison » : seul l'onglet sélectionné est exécuté."""
+    tab1, tab2 = st.tabs(["📈 Analyse Pays", "⚖️ Comparaison"], key="onglet_actif", on_change="rerun")
+    
+    with tab1:
+        if tab1.open:
+            afficher_analyse_pays(registre, jeu_principal, cube_principal, pays_disponibles, annees_disponibles)
+        else:
+            conserver_widgets(WIDGETS_ANALYSE_PAYS)
+    
+    with tab2:
+        if tab2.open:
+            afficher_comparaison(jeu_principal, pays_disponibles, annees_disponibles)
+        else:
+            conserver_widgets(WIDGETS_COMPARAISON)
+
+afficher_onglets(registre, jeu_principal, cube_principal, pays_disponibles, annees_disponibles)
+
 st.divider()
 
 # --- SECTION : TREEMAP DE LA PART ÉNERGÉTIQUE MONDIALE ---
@@ -1011,8 +873,8 @@ st.markdown("""
 Cliquez sur les segments pour zoomer/dézoomer. Cette vue hiérarchique montre comment chaque type d'énergie 
 contribue à la production mondiale et la répartition par pays au sein de chaque type d'énergie.
 """)
-fig_treemap = creer_treemap_distribution(df_principal)
-st.plotly_chart(fig_treemap, use_container_width=True)
+fig_treemap = construction_treemap.resultat()
+afficher_graphique('treemap', fig_treemap)
 
 st.divider()
 
@@ -1020,99 +882,100 @@ st.divider()
 
 st.header("Analyse Filtrée et Exploration Détaillée")
 
-with st.expander("Afficher les Filtres Avancés", expanded=False):
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        plage_annee_detail = st.slider(
-            "Sélectionner la Plage Annuelle",
-            int(df_principal['annee'].min()),
-            int(df_principal['annee'].max()),
-            (int(df_principal['annee'].min()), int(df_principal['annee'].max())),
-            key="annee_curseur_detaille"
-        )
-    
-    with col2:
-        pays_selectionne_detaille = st.multiselect(
-            "Pays",
-            sorted(pays_disponibles),
-            default=sorted(pays_disponibles)[:5],
-            key="pays_filtre_detaille"
-        )
-    
-    with col3:
-        energie_selectionnee_detaille = st.multiselect(
-            "Types d'Énergie",
-            ['Hydro', 'Solaire', 'Éolien'],
-            default=['Hydro', 'Solaire', 'Éolien'],
-            key="energie_filtre_detaille"
-        )
-    
-    # Convertir les noms d'énergie en noms de colonnes
-    energies_colonnes_detaille = []
-    for energie in energie_selectionnee_detaille:
-        if energie == 'Hydro':
-            energies_colonnes_detaille.append('hydro_twh')
-        elif energie == 'Solaire':
-            energies_colonnes_detaille.append('solaire_twh')
-        elif energie == 'Éolien':
-            energies_colonnes_detaille.append('eolien_twh')
-    
-    # Appliquer les filtres
-    df_filtre_detaille = df_principal[
-        (df_principal['annee'] >= plage_annee_detail[0]) &
-        (df_principal['annee'] <= plage_annee_detail[1]) &
-        (df_principal['pays'].isin(pays_selectionne_detaille))
-    ].copy()
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Tendance de production
-        donnees_tendance = df_filtre_detaille.groupby(['annee', 'pays']).agg({
-            'production_totale_twh': 'sum'
-        }).reset_index()
+# Nombre de pays gardant leur propre courbe quand les autres sont regroupés
+PAYS_PRINCIPAUX_TENDANCE = 10
+
+# Section isolée : les filtres avancés ne réexécutent que cette analyse
+@section_isolee
+def afficher_analyse_filtree(jeu_principal, df_principal, cube_principal, pays_disponibles):
+    """Analyse filtrée : filtres avancés, tendance et barres par pays, échantillon de données."""
+    with st.expander("Afficher les Filtres Avancés", expanded=False):
+        col1, col2, col3 = st.columns(3)
         
-        fig_tendance = px.line(
-            donnees_tendance,
-            x='annee',
-            y='production_totale_twh',
-            color='pays',
-            markers=True,
-            title="Tendance de Production au Fil du Temps",
-            labels={'production_totale_twh': 'Production (TWh)', 'annee': 'Année'}
-        )
-        st.plotly_chart(fig_tendance, use_container_width=True)
-    
-    with col2:
-        # Comparaison des pays
-        donnees_pays = df_filtre_detaille.groupby('pays').agg({
-            'production_totale_twh': 'sum'
-        }).reset_index().sort_values('production_totale_twh', ascending=True)
+        with col1:
+            plage_annee_detail = st.slider(
+                "Sélectionner la Plage Annuelle",
+                int(df_principal['annee'].min()),
+                int(df_principal['annee'].max()),
+                (int(df_principal['annee'].min()), int(df_principal['annee'].max())),
+                key="annee_curseur_detaille"
+            )
         
-        fig_pays = px.bar(
-            donnees_pays,
-            x='production_totale_twh',
-            y='pays',
-            orientation='h',
-            title="Production par Pays",
-            labels={'production_totale_twh': 'Production (TWh)', 'pays': 'Pays'},
-            color='production_totale_twh',
-            color_continuous_scale='Greens'
-        )
-        st.plotly_chart(fig_pays, use_container_width=True)
-    
-    # Afficher la table de données filtrées
-    if len(df_filtre_detaille) > 0:
-        st.markdown("### Échantillon de Données Filtrées")
-        colonnes_affichage = ['pays', 'annee', 'production_totale_twh'] + energies_colonnes_detaille
-        colonnes_affichage = [col for col in colonnes_affichage if col in df_filtre_detaille.columns]
+        with col2:
+            pays_selectionne_detaille = st.multiselect(
+                "Pays",
+                sorted(pays_disponibles),
+                default=sorted(pays_disponibles)[:5],
+                key="pays_filtre_detaille"
+            )
+        
+        with col3:
+            energie_selectionnee_detaille = st.multiselect(
+                "Types d'Énergie",
+                ['Hydro', 'Solaire', 'Éolien'],
+                default=['Hydro', 'Solaire', 'Éolien'],
+                key="energie_filtre_detaille"
+            )
+        
+        # Convertir les noms d'énergie en noms de colonnes
+        energies_colonnes_detaille = []
+        for energie in energie_selectionnee_detaille:
+            if energie == 'Hydro':
+                energies_colonnes_detaille.append('hydro_twh')
+            elif energie == 'Solaire':
+                energies_colonnes_detaille.append('solaire_twh')
+            elif energie == 'Éolien':
+                energies_colonnes_detaille.append('eolien_twh')
+        
+        # Appliquer les filtres : tranches du cube (une ligne par pays, plage d'années contiguë),
+        # sans masque booléen ni copie du jeu de données complet
+        debut_detail, fin_detail = plage_annee_detail
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Tendance de production : passe en WebGL au-delà de figures.SEUIL_WEBGL courbes ; les
+            # pays hors des PAYS_PRINCIPAUX_TENDANCE premiers peuvent être résumés par une bande
+            regrouper_autres = st.checkbox(
+                f"Regrouper les pays au-delà des {PAYS_PRINCIPAUX_TENDANCE} premiers",
+                value=False,
+                disabled=len(pays_selectionne_detaille) <= PAYS_PRINCIPAUX_TENDANCE,
+                help="Les autres pays sont résumés par une bande « Autres pays » (minimum et maximum par année) et leur médiane.",
+                key="regrouper_autres_pays"
+            )
+            # Les deux graphiques se construisent en parallèle ; la tendance s'affiche dès qu'elle est prête
+            planificateur = obtenir_planificateur()
+            construction_tendance = planificateur.soumettre(
+                'tendance_filtree', creer_tendance_filtree, jeu_principal, tuple(sorted(pays_selectionne_detaille)),
+                debut_detail, fin_detail, PAYS_PRINCIPAUX_TENDANCE if regrouper_autres else None)
+            construction_barres = planificateur.soumettre(
+                'barres_filtrees', creer_barres_filtrees, jeu_principal, tuple(sorted(pays_selectionne_detaille)),
+                debut_detail, fin_detail)
+            afficher_graphique('tendance_filtree', construction_tendance.resultat())
+        
+        with col2:
+            # Comparaison des pays
+            fig_pays = construction_barres.resultat()
+            afficher_graphique('barres_filtrees', fig_pays)
         
-        st.dataframe(
-            df_filtre_detaille[colonnes_affichage].sort_values(['pays', 'annee'], ascending=[True, False]),
-            use_container_width=True,
-            hide_index=True
+        # Afficher la table de données filtrées (triée par pays puis par année décroissante)
+        colonnes_valeurs = ['production_totale_twh'] + [col for col in energies_colonnes_detaille
+                                                         if cube_principal.colonne(col) is not None]
+        df_filtre_detaille = cube_principal.tableau_selection(
+            pays_selectionne_detaille, debut_detail, fin_detail,
+            colonnes=colonnes_valeurs, annees_decroissantes=True
         )
+        if len(df_filtre_detaille) > 0:
+            st.markdown("### Échantillon de Données Filtrées")
+            colonnes_affichage = ['pays', 'annee'] + colonnes_valeurs
+            
+            st.dataframe(
+                df_filtre_detaille[colonnes_affichage],
+                use_container_width=True,
+                hide_index=True
+            )
+
+afficher_analyse_filtree(jeu_principal, df_principal, cube_principal, pays_disponibles)
 
 st.divider()
 
@@ -1125,15 +988,11 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("#### Leaders de Production")
     
-    # Calculer les leaders de production pour l'année la plus récente
-    annee_recente = df_principal['annee'].max()
-    df_recent = df_principal[df_principal['annee'] == annee_recente]
+    # Leaders de production pour l'année la plus récente (agrégat partagé)
+    pays_principaux, total_mondial = registre.leaders_production(5)
     
-    pays_principaux = df_recent.groupby('pays')['production_totale_twh'].sum().nlargest(5)
-    
-    for i, (pays, prod) in enumerate(pays_principaux.items(), 1):
+    for i, (pays, prod) in enumerate(pays_principaux, 1):
         if pays != 'World':
-            total_mondial = df_recent[df_recent['pays'] == 'World']['production_totale_twh'].sum()
             pct = (prod / total_mondial * 100) if total_mondial > 0 else 0
             
             st.markdown(f"""
@@ -1148,15 +1007,8 @@ with col1:
 with col2:
     st.markdown("#### Dominance du Type d'Énergie")
     
-    # Calculer la répartition par type d'énergie pour l'année la plus récente
-    energie_principale = {}
-    for energie_col, energie_nom in [('hydro_twh', 'Hydro'), ('solaire_twh', 'Solaire'), ('eolien_twh', 'Éolien')]:
-        if energie_col in df_recent.columns:
-            total_energie = df_recent[energie_col].sum()
-            energie_principale[energie_nom] = total_energie
-    
-    # Trier par production
-    energie_principale_trie = dict(sorted(energie_principale.items(), key=lambda x: x[1], reverse=True))
+    # Répartition par type d'énergie pour l'année la plus récente, triée par production (agrégat partagé)
+    energie_principale_trie = dict(registre.dominance_energies())
     
     total_global = sum(energie_principale_trie.values())
     
@@ -1225,4 +1077,8 @@ st.markdown("""
 **Source des Données :** ourworldindata.org - Production Annuelle d'Électricité Renouvelable  
 **Technologies Utilisées :** Streamlit, Pandas, Plotly  
 **Dernière Mise à Jour :** {update_date}
-""".format(update_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
\ No newline at end of file
+""".format(update_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+
+# --- DIAGNOSTIC DES PERFORMANCES ---
+
+conclure_instrumentation(registre.numero)
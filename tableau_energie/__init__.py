@@ -0,0 +1 @@
+"""Moteur de données du tableau de bord, importable sans Streamlit (scripts, workers, benchmarks)."""
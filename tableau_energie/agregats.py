@@ -0,0 +1,133 @@
+"""Maintenance incrémentale des agrégats par année (total mondial et regroupements de pays)."""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+GROUPE_MONDE = 'World'
+
+INSERER = 'inserer'
+MODIFIER = 'modifier'
+SUPPRIMER = 'supprimer'
+
+# Correction d'une ligne pays-année : `valeurs` associe chaque colonne à sa nouvelle valeur
+# (ignoré pour une suppression).
+Correction = namedtuple('Correction', ['operation', 'pays', 'annee', 'valeurs'], defaults=[None])
+
+
+# Chaque pays compte dans 'World' et dans les groupes de `groupes_du_pays` ; les NaN comptent pour zéro,
+# comme dans un groupby. `colonne_total` est recalculée comme la somme des autres colonnes de la ligne.
+class AgregateurIncremental:
+    """Totaux courants par (groupe, année), mis à jour en O(1) par ligne insérée, modifiée ou supprimée."""
+
+    def __init__(self, colonnes, groupes_du_pays=None, colonne_total=None):
+        self.colonnes = list(colonnes)
+        self._groupes_du_pays = groupes_du_pays or {}
+        self._indice_total = self.colonnes.index(colonne_total) if colonne_total in self.colonnes else None
+        self._lignes = {}
+        self._totaux = {}
+        self._effectifs = {}
+
+    @classmethod
+    def depuis_dataframe(cls, df, colonnes, groupes_du_pays=None, colonne_total=None):
+        """Initialise l'agrégateur à partir des lignes pays-année d'un DataFrame (un seul regroupement)."""
+        agregateur = cls(colonnes, groupes_du_pays, colonne_total)
+        matrice = np.nan_to_num(df[agregateur.colonnes].to_numpy(dtype='float64', na_value=np.nan))
+        annees = df['annee'].to_numpy(dtype='int64')
+        agregateur._lignes = dict(zip(zip(df['pays'].tolist(), annees.tolist()), matrice))
+
+        # Une ligne par (groupe, pays, année) : chaque pays compte pour le monde et ses groupes
+        appartenances = pd.DataFrame({'pays': df['pays'].to_numpy(), 'ligne': np.arange(len(df))})
+        appartenances['groupe'] = [(GROUPE_MONDE,) + tuple(agregateur._groupes_du_pays.get(p, ()))
+                                   for p in appartenances['pays']]
+        appartenances = appartenances.explode('groupe')
+        lignes = appartenances['ligne'].to_numpy(dtype='int64')
+
+        sommes = pd.DataFrame(matrice[lignes], columns=agregateur.colonnes)
+        sommes['groupe'] = appartenances['groupe'].to_numpy()
+        sommes['annee'] = annees[lignes]
+        regroupe = sommes.groupby(['groupe', 'annee'], sort=False)
+        totaux = regroupe[agregateur.colonnes].sum()
+        effectifs = regroupe.size()
+
+        agregateur._totaux = dict(zip(totaux.index, totaux.to_numpy()))
+        agregateur._effectifs = dict(zip(effectifs.index, effectifs.to_numpy().tolist()))
+        return agregateur
+
+    def groupes(self, pays):
+        return (GROUPE_MONDE,) + tuple(self._groupes_du_pays.get(pays, ()))
+
+    def _vecteur(self, valeurs):
+        return self._recalculer_total(
+            np.nan_to_num(np.array([valeurs.get(col, np.nan) for col in self.colonnes], dtype='float64')))
+
+    def _recalculer_total(self, vecteur):
+        # Somme de gauche à droite des autres colonnes, comme la colonne totale du nettoyage (sum(axis=1))
+        if self._indice_total is not None:
+            vecteur[self._indice_total] = np.delete(vecteur, self._indice_total).sum()
+        return vecteur
+
+    def _propager(self, pays, annee, delta, variation_effectif):
+        for groupe in self.groupes(pays):
+            cle = (groupe, annee)
+            effectif = self._effectifs.get(cle, 0) + variation_effectif
+            if effectif == 0:
+                # Plus aucune ligne : on retire le total plutôt que de garder un résidu d'arrondi
+                self._totaux.pop(cle, None)
+                self._effectifs.pop(cle, None)
+            else:
+                self._totaux[cle] = self._totaux.get(cle, 0.0) + delta
+                self._effectifs[cle] = effectif
+
+    def inserer(self, pays, annee, valeurs):
+        cle = (pays, int(annee))
+        if cle in self._lignes:
+            raise ValueError(f"La ligne {cle} existe déjà ; utiliser une modification.")
+        vecteur = self._vecteur(valeurs)
+        self._lignes[cle] = vecteur
+        self._propager(pays, cle[1], vecteur, 1)
+
+    def modifier(self, pays, annee, valeurs):
+        cle = (pays, int(annee))
+        if cle not in self._lignes:
+            raise KeyError(cle)
+        ancien = self._lignes[cle]
+        # Les colonnes absentes de la correction gardent leur valeur actuelle
+        nouveau = np.array([valeurs.get(col, ancien[i]) for i, col in enumerate(self.colonnes)], dtype='float64')
+        nouveau = self._recalculer_total(np.nan_to_num(nouveau))
+        self._lignes[cle] = nouveau
+        self._propager(pays, cle[1], nouveau - ancien, 0)
+
+    def supprimer(self, pays, annee):
+        cle = (pays, int(annee))
+        ancien = self._lignes.pop(cle)
+        self._propager(pays, cle[1], -ancien, -1)
+
+    def appliquer(self, correction):
+        """Applique une Correction (insertion, modification ou suppression)."""
+        if correction.operation == INSERER:
+            self.inserer(correction.pays, correction.annee, correction.valeurs)
+        elif correction.operation == MODIFIER:
+            self.modifier(correction.pays, correction.annee, correction.valeurs)
+        elif correction.operation == SUPPRIMER:
+            self.supprimer(correction.pays, correction.annee)
+        else:
+            raise ValueError(f"Opération inconnue : {correction.operation!r}")
+
+    def ligne(self, pays, annee):
+        """Valeurs courantes d'une ligne pays-année (dictionnaire colonne -> valeur), ou None."""
+        vecteur = self._lignes.get((pays, int(annee)))
+        return None if vecteur is None else dict(zip(self.colonnes, vecteur.tolist()))
+
+    def total(self, groupe, annee):
+        """Totaux courants d'un groupe pour une année (dictionnaire colonne -> valeur), ou None."""
+        vecteur = self._totaux.get((groupe, int(annee)))
+        return None if vecteur is None else dict(zip(self.colonnes, vecteur.tolist()))
+
+    def tableau(self, groupe=GROUPE_MONDE):
+        """Totaux d'un groupe pour toutes ses années, sous forme de DataFrame trié par année."""
+        annees = sorted(annee for (g, annee) in self._totaux if g == groupe)
+        valeurs = np.array([self._totaux[(groupe, annee)] for annee in annees]).reshape(len(annees), len(self.colonnes))
+        df = pd.DataFrame(valeurs, columns=self.colonnes)
+        df.insert(0, 'annee', pd.array(annees, dtype='Int64'))
+        return df
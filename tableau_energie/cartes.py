@@ -0,0 +1,128 @@
+"""Cartes choroplèthes de la production mondiale, construites à partir du cube."""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from tableau_energie.compaction import figure_compacte
+from tableau_energie.magasin_figures import MagasinFigures
+from tableau_energie.regions import NIVEAU_PAYS
+
+# Cartes conservées par magasin : les années préchauffées d'un classeur de quelques dizaines
+# d'années, plus les cartes animées et régionales consultées récemment
+TAILLE_MAX_MAGASIN_CARTES = 64
+
+# Titre et libellé de légende de la carte pour chaque métrique disponible
+METRIQUES_CARTE = {
+    'production_totale_twh': ("Production Totale d'Énergies Renouvelables", 'Production Totale (TWh)'),
+    'hydro_twh': ("Production d'Hydroélectricité", 'Production Hydro (TWh)'),
+    'solaire_twh': ("Production d'Énergie Solaire", 'Production Solaire (TWh)'),
+    'eolien_twh': ("Production d'Énergie Éolienne", 'Production Éolienne (TWh)'),
+}
+
+
+def _mettre_en_forme_carte(fig):
+    fig.update_geos(showframe=False, showcoastlines=False, showland=True, landcolor="lightgray", projection_type="natural earth")
+    fig.update_layout(height=600, margin={"r":0,"t":50,"l":0,"b":0})
+    return fig
+
+
+def _projection(cube, metrique, regions=None, niveau=None):
+    """Codes ISO, noms au survol et matrice [pays, année] des valeurs (celles de la région au niveau régional)."""
+    if regions is not None:
+        return regions.projection_pays(niveau, metrique)
+    pays_retenus = cube.pays != 'World'
+    # Les pays absents une année donnée restent à NaN (non coloriés)
+    valeurs = np.where(cube.presence, cube.colonne(metrique), np.nan)[pays_retenus]
+    return cube.codes_iso[pays_retenus], cube.pays[pays_retenus], valeurs
+
+
+def _titre(titre, niveau, annee):
+    portee = "dans le Monde" if niveau is None else f"par {niveau.lower()}"
+    return f"{titre} {portee} ({annee})"
+
+
+@figure_compacte
+def creer_carte_mondiale(cube, annee_selectionnee, metrique='production_totale_twh', regions=None, niveau=None):
+    """Crée une carte choroplèthe d'une métrique par pays (ou par région) pour une année donnée."""
+    titre, libelle = METRIQUES_CARTE[metrique]
+    if regions is not None:
+        codes_iso, noms, valeurs = _projection(cube, metrique, regions, niveau)
+        ia = cube.index_annees.get(int(annee_selectionnee))
+        df_carte = pd.DataFrame({'code_iso': codes_iso, 'region': noms,
+                                 metrique: valeurs[:, ia] if ia is not None else np.nan})
+        fig = px.choropleth(df_carte.dropna(subset=[metrique]), locations="code_iso", locationmode='ISO-3',
+                            color=metrique, hover_name="region", color_continuous_scale=px.colors.sequential.Viridis,
+                            title=_titre(titre, niveau, annee_selectionnee),
+                            labels={metrique: libelle, 'code_iso': 'Pays'})
+        return _mettre_en_forme_carte(fig)
+    
+    df_carte = cube.tableau_annee(annee_selectionnee, colonnes=[metrique])
+    df_carte = df_carte[df_carte['pays'] != 'World']
+    
+    fig = px.choropleth(df_carte, locations="code_iso", locationmode='ISO-3', color=metrique,
+                        hover_name="pays", color_continuous_scale=px.colors.sequential.Viridis,
+                        title=f"{titre} dans le Monde ({annee_selectionnee})",
+                        labels={metrique: libelle})
+    return _mettre_en_forme_carte(fig)
+
+
+# Chaque image ne contient que le vecteur z de l'année : le parcours des années se fait dans le navigateur
+@figure_compacte
+def creer_carte_animee(cube, metrique='production_totale_twh', regions=None, niveau=None):
+    """Crée une carte choroplèthe unique avec une image (frame) par année."""
+    titre, libelle = METRIQUES_CARTE[metrique]
+    codes_iso, pays, valeurs = _projection(cube, metrique, regions, niveau)
+    annees = [int(annee) for annee in cube.annees]
+    z_max = np.nanmax(valeurs) if np.isfinite(valeurs).any() else 1.0
+
+    def titre_annee(annee):
+        return _titre(titre, niveau, annee)
+
+    derniere = len(annees) - 1
+    fig = go.Figure(
+        data=[go.Choropleth(
+            locations=codes_iso, locationmode='ISO-3', z=valeurs[:, derniere], text=pays,
+            zmin=0, zmax=z_max, colorscale=px.colors.sequential.Viridis,
+            colorbar=dict(title=dict(text=libelle)),
+            hovertemplate=f"<b>%{{text}}</b><br>{libelle}=%{{z:,.1f}}<extra></extra>",
+        )],
+        frames=[go.Frame(name=str(annee), data=[go.Choropleth(z=valeurs[:, i])], traces=[0],
+                         layout=dict(title=dict(text=titre_annee(annee))))
+                for i, annee in enumerate(annees)],
+    )
+
+    animation = dict(frame=dict(duration=0, redraw=True), mode='immediate', transition=dict(duration=0))
+    fig.update_layout(
+        title=titre_annee(annees[derniere]),
+        sliders=[dict(
+            active=derniere,
+            currentvalue=dict(prefix="Année : "),
+            pad=dict(t=10),
+            steps=[dict(label=str(annee), method='animate', args=[[str(annee)], animation]) for annee in annees],
+        )],
+        updatemenus=[dict(
+            type='buttons', showactive=False, x=0, y=0, xanchor='right', yanchor='top', pad=dict(t=40, r=10),
+            buttons=[dict(label='▶', method='animate',
+                          args=[None, dict(animation, frame=dict(duration=500, redraw=True), fromcurrent=True)])],
+        )],
+    )
+    return _mettre_en_forme_carte(fig)
+
+
+def creer_magasin_cartes(jeu, metrique_prechauffee='production_totale_twh', taille_max=TAILLE_MAX_MAGASIN_CARTES):
+    """Magasin LRU de cartes indexé par (année, métrique, niveau), préchauffé en arrière-plan."""
+    cube = jeu.cube
+
+    def construire_carte(annee, metrique, niveau):
+        # Niveau régional : chaque pays est colorié par le total précalculé de sa région
+        regions = None if niveau == NIVEAU_PAYS else jeu.regions
+        niveau_carte = None if niveau == NIVEAU_PAYS else niveau
+        # annee=None : carte animée contenant toutes les années
+        if annee is None:
+            return creer_carte_animee(cube, metrique, regions, niveau_carte)
+        return creer_carte_mondiale(cube, annee, metrique, regions, niveau_carte)
+
+    magasin = MagasinFigures(construire_carte, taille_max=taille_max)
+    magasin.prechauffer([(int(annee), metrique_prechauffee, NIVEAU_PAYS) for annee in cube.annees[::-1]])
+    return magasin
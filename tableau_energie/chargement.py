@@ -0,0 +1,48 @@
+"""Lecture des sources et construction du jeu de données versionné, sans Streamlit."""
+import hashlib
+import os
+
+from tableau_energie.donnees import COLONNES_PROJETEES, nettoyer_et_preparer_donnees
+from tableau_energie.ingestion import cle_projection, combiner_sources, lire_source_projetee, lister_sources
+from tableau_energie.instantane import calculer_empreinte, charger_avec_instantane, empreinte_sources
+from tableau_energie.jeu_donnees import JeuDonnees
+from tableau_energie.regions import AgregatsRegionaux, charger_correspondance
+
+
+def lire_sources(sources, dossier_instantanes, filtres=None):
+    """Lit et combine les sources (fichiers ou dossiers) via leurs instantanés découpés par année, puis par pays."""
+    tableaux = []
+    cle_lecture = cle_projection(COLONNES_PROJETEES)
+    for chemin_fichier in lister_sources(sources):
+        tableaux.append(charger_avec_instantane(chemin_fichier, dossier_cache=dossier_instantanes,
+                                                lecteur=lire_source_projetee, colonnes=COLONNES_PROJETEES,
+                                                filtres=filtres, colonne_groupes='annee',
+                                                colonnes_tri=['code_iso'], cle_lecture=cle_lecture))
+    return combiner_sources(tableaux)
+
+
+def version_sources(sources, dossier_instantanes, schema_compact=False, filtres=None, chemin_regions=None):
+    """Jeton de version : empreinte des sources et de la table des régions, schéma et prédicats de chargement."""
+    version = empreinte_sources(lister_sources(sources), dossier_instantanes) + ('-compact' if schema_compact else '')
+    if filtres:
+        version += '-' + hashlib.sha256(repr(filtres).encode('utf-8')).hexdigest()[:12]
+    if chemin_regions is not None and os.path.exists(chemin_regions):
+        # Les cubes régionaux font partie du jeu : une table des régions modifiée est une nouvelle version
+        version += '-r' + calculer_empreinte(chemin_regions)[:12]
+    return version
+
+
+def construire_jeu_donnees(df_brut, sources, dossier_instantanes, chemin_regions=None, schema_compact=False,
+                           filtres=None):
+    """Nettoie les données brutes et retourne le jeu de données versionné (None si elles manquent)."""
+    df_principal, cube = nettoyer_et_preparer_donnees(df_brut, schema_compact=schema_compact)
+    if df_principal is None:
+        return None
+    version = version_sources(sources, dossier_instantanes, schema_compact, filtres, chemin_regions)
+
+    # Cubes régionaux de tous les niveaux, précalculés une fois au chargement
+    regions = None
+    if chemin_regions is not None and os.path.exists(chemin_regions):
+        regions = AgregatsRegionaux(cube, charger_correspondance(chemin_regions))
+
+    return JeuDonnees(df_principal, cube, version=version, regions=regions)
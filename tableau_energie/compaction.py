@@ -0,0 +1,236 @@
+"""Compaction des figures Plotly (modèle, attributs répétés, tableaux) avant leur envoi au navigateur."""
+import base64
+import functools
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Sections de la mise en page du modèle propres à un type de sous-graphe
+SECTIONS_SOUS_GRAPHES = {
+    'geo': {'choropleth', 'scattergeo'},
+    'polar': {'scatterpolar', 'scatterpolargl', 'barpolar'},
+    'ternary': {'scatterternary'},
+    'scene': {'scatter3d', 'surface', 'mesh3d', 'cone', 'streamtube', 'isosurface', 'volume'},
+    'mapbox': {'scattermapbox', 'choroplethmapbox', 'densitymapbox'},
+    'map': {'scattermap', 'choroplethmap', 'densitymap'},
+}
+
+# Types de traces dessinés hors d'un repère cartésien (sans axes x/y)
+TYPES_SANS_AXES = {
+    'pie', 'treemap', 'sunburst', 'icicle', 'funnelarea', 'sankey', 'table', 'parcoords', 'parcats',
+    'indicator',
+}.union(*SECTIONS_SOUS_GRAPHES.values())
+
+# Types dont la trace elle-même est coloriée par une échelle continue
+TYPES_A_ECHELLE = {
+    'heatmap', 'contour', 'histogram2d', 'histogram2dcontour', 'choropleth', 'choroplethmapbox',
+    'choroplethmap', 'densitymapbox', 'densitymap', 'surface', 'mesh3d', 'cone', 'streamtube', 'isosurface',
+    'volume',
+}
+
+# Attributs jamais remontés dans le modèle : identité de la trace et références de sous-graphes
+ATTRIBUTS_PROPRES = {
+    'type', 'name', 'uid', 'visible', 'legendgroup', 'meta', 'xaxis', 'yaxis', 'geo', 'coloraxis', 'scene',
+    'polar', 'ternary', 'mapbox', 'map', 'subplot',
+}
+
+# Valeurs par défaut de plotly.js, inutiles à transmettre
+DEFAUTS_TRACE = {'xaxis': 'x', 'yaxis': 'y'}
+
+TYPES_ENTIERS = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+
+
+def taille_json(fig):
+    """Taille en octets de la figure telle que sérialisée par st.plotly_chart."""
+    return len(fig.to_json(validate=False).encode('utf-8'))
+
+
+def _est_tableau(valeur):
+    return isinstance(valeur, (list, tuple, np.ndarray)) or _est_tableau_type(valeur)
+
+
+def _est_tableau_type(valeur):
+    """Tableau typé déjà encodé par Plotly Express ({'dtype', 'bdata', 'shape'})."""
+    return isinstance(valeur, dict) and 'bdata' in valeur
+
+
+def _decoder(valeur):
+    if not _est_tableau_type(valeur):
+        return np.asarray(valeur)
+    tableau = np.frombuffer(base64.b64decode(valeur['bdata']), dtype=valeur['dtype'])
+    if 'shape' in valeur:
+        tableau = tableau.reshape([int(dimension) for dimension in str(valeur['shape']).split(',')])
+    return tableau
+
+
+def _feuilles(dictionnaire, prefixe=''):
+    """Couples (chemin pointé, valeur) des attributs scalaires d'une trace."""
+    for cle, valeur in dictionnaire.items():
+        chemin = prefixe + cle
+        if isinstance(valeur, dict) and not _est_tableau_type(valeur):
+            yield from _feuilles(valeur, chemin + '.')
+        elif isinstance(valeur, (str, bool, int, float)):
+            yield chemin, valeur
+
+
+def _affecter(dictionnaire, chemin, valeur):
+    *parents, feuille = chemin.split('.')
+    for cle in parents:
+        dictionnaire = dictionnaire.setdefault(cle, {})
+    dictionnaire[feuille] = valeur
+
+
+def _tableau_le_plus_court(valeurs):
+    """Tableau typé au plus petit type sans perte, ou liste JSON si elle est plus courte ; None si non numérique."""
+    tableau = _decoder(valeurs)
+    if tableau.dtype.kind not in 'iuf' or tableau.size == 0:
+        return None
+    if tableau.dtype.kind == 'f' and not np.isfinite(tableau).all():
+        # NaN et infinis n'ont pas d'équivalent en liste JSON : tableau typé tel quel
+        return tableau
+    bornes = tableau.min(), tableau.max()
+    if tableau.dtype.kind in 'iu' or (tableau == np.round(tableau)).all():
+        for type_entier in TYPES_ENTIERS:
+            if np.iinfo(type_entier).min <= bornes[0] and bornes[1] <= np.iinfo(type_entier).max:
+                tableau = tableau.astype(type_entier)
+                break
+    if tableau.dtype == np.float64 and (tableau.astype(np.float32) == tableau).all():
+        tableau = tableau.astype(np.float32)
+    octets_binaires = 4 * -(-tableau.nbytes // 3) + 26
+    liste = tableau.tolist()
+    if len(json.dumps(liste, separators=(',', ':'))) < octets_binaires:
+        return liste
+    return tableau
+
+
+def _compacter_tableaux(trace):
+    """Réencode sur place les tableaux numériques d'une trace (données et tableaux imbriqués, par exemple marker.color)."""
+    for cle, valeur in trace.items():
+        if isinstance(valeur, dict) and not _est_tableau_type(valeur):
+            _compacter_tableaux(valeur)
+        elif _est_tableau(valeur):
+            try:
+                compact = _tableau_le_plus_court(valeur)
+            except (TypeError, ValueError):
+                continue
+            # Tableaux déjà sous leur forme la plus courte : laissés tels quels
+            if compact is None or (_est_tableau_type(valeur) and isinstance(compact, np.ndarray)
+                                   and compact.dtype == np.dtype(valeur['dtype'])):
+                continue
+            trace[cle] = compact
+
+
+def _retirer(dictionnaire, chemin):
+    """Retire l'attribut `chemin` (pointé) et les conteneurs qu'il laisse vides."""
+    cle, _, reste = chemin.partition('.')
+    if reste:
+        _retirer(dictionnaire[cle], reste)
+        if dictionnaire[cle]:
+            return
+    del dictionnaire[cle]
+
+
+def _echelle_requise(trace, mise_en_page):
+    """Vrai si la trace se rabat sur l'échelle de couleurs par défaut du modèle."""
+    marker = trace.get('marker', {})
+    conteneurs = [(trace, trace['type'] in TYPES_A_ECHELLE), (marker, False), (trace.get('line', {}), False),
+                  (marker.get('line', {}), False)]
+    for conteneur, continu in conteneurs:
+        if conteneur.get('coloraxis'):
+            # Échelle partagée : elle doit être fixée dans la mise en page
+            if not mise_en_page.get(conteneur['coloraxis'], {}).get('colorscale'):
+                return True
+            continue
+        if conteneur.get('colorscale'):
+            continue
+        couleur = conteneur.get('color')
+        if continu or _est_tableau(couleur):
+            return True
+    return False
+
+
+def _remonter_attributs(traces, modele):
+    """Remonte dans le modèle les attributs communs aux traces d'un type ; retourne les chemins à retirer."""
+    a_retirer = [[] for _ in traces]
+    par_type = {}
+    for i, trace in enumerate(traces):
+        par_type.setdefault(trace['type'], []).append(i)
+
+    for type_trace, indices in par_type.items():
+        modeles_type = modele['data'].setdefault(type_trace, [{}])
+        if len(indices) < 2 or len(modeles_type) != 1:
+            continue
+
+        # Le groupe répété dans le survol de Plotly Express (« pays=France<br>») devient le nom de la trace
+        survols = [traces[i].get('hovertemplate') for i in indices]
+        if all(isinstance(survol, str) for survol in survols):
+            generiques = []
+            for i, survol in zip(indices, survols):
+                motif = f"={traces[i].get('name')}<br>"
+                if traces[i].get('name') and survol.count(motif) == 1:
+                    survol = survol.replace(motif, '=%{fullData.name}<br>')
+                generiques.append(survol)
+            if len(set(generiques)) == 1:
+                for i in indices:
+                    traces[i]['hovertemplate'] = generiques[0]
+
+        feuilles = [dict(_feuilles(traces[i])) for i in indices]
+        communes = {chemin: valeur for chemin, valeur in feuilles[0].items()
+                    if chemin.split('.')[0] not in ATTRIBUTS_PROPRES
+                    and all(chemin in autres and autres[chemin] == valeur for autres in feuilles[1:])}
+        for chemin, valeur in communes.items():
+            _affecter(modeles_type[0], chemin, valeur)
+            for i in indices:
+                a_retirer[i].append(chemin)
+    return a_retirer
+
+
+def compacter_figure(fig):
+    """Retourne une copie de la figure, au même rendu, dont la spécification JSON est réduite."""
+    # Par trace plutôt que fig.to_plotly_json(), qui encoderait d'abord tous les tableaux en base64
+    spec = {'data': [trace.to_plotly_json() for trace in fig.data], 'layout': fig.layout.to_plotly_json()}
+    if fig.frames:
+        spec['frames'] = [image.to_plotly_json() for image in fig.frames]
+    traces = spec['data']
+    mise_en_page = spec['layout']
+    types = {trace['type'] for trace in traces}
+    for image in spec.get('frames', []):
+        types.update(trace.get('type', 'scatter') for trace in image.get('data', []))
+    modele = mise_en_page.pop('template', None) or {}
+
+    modele['data'] = {type_trace: modeles for type_trace, modeles in modele.get('data', {}).items()
+                      if type_trace in types}
+    modele_mise_en_page = modele.setdefault('layout', {})
+    for section, types_section in SECTIONS_SOUS_GRAPHES.items():
+        if not types & types_section:
+            modele_mise_en_page.pop(section, None)
+    if types and types <= TYPES_SANS_AXES:
+        modele_mise_en_page.pop('xaxis', None)
+        modele_mise_en_page.pop('yaxis', None)
+    if not any(_echelle_requise(trace, mise_en_page) for trace in traces):
+        modele_mise_en_page.pop('colorscale', None)
+
+    for trace, chemins in zip(traces, _remonter_attributs(traces, modele)):
+        for chemin in chemins:
+            _retirer(trace, chemin)
+        for attribut, defaut in DEFAUTS_TRACE.items():
+            if trace.get(attribut) == defaut:
+                del trace[attribut]
+        _compacter_tableaux(trace)
+    for image in spec.get('frames', []):
+        for trace in image.get('data', []):
+            _compacter_tableaux(trace)
+    mise_en_page['template'] = modele
+    return go.Figure(spec)
+
+
+def figure_compacte(constructeur):
+    """Décorateur : compacte la figure (ou chaque figure d'un tuple) retournée par un constructeur `creer_*`."""
+    @functools.wraps(constructeur)
+    def construire(*args, **kwargs):
+        resultat = constructeur(*args, **kwargs)
+        if isinstance(resultat, tuple):
+            return tuple(None if fig is None else compacter_figure(fig) for fig in resultat)
+        return None if resultat is None else compacter_figure(resultat)
+    return construire
@@ -0,0 +1,62 @@
+"""Calcul vectorisé des valeurs, totaux et parts pour la comparaison entre pays."""
+import numpy as np
+import pandas as pd
+
+COLONNE_PAYS = 'Pays'
+COLONNE_TYPE = "Type d'énergie"
+COLONNE_PRODUCTION = 'Production (TWh)'
+COLONNE_TOTAL = 'Total (TWh)'
+COLONNE_PART = 'Pourcentage (%)'
+
+
+def nom_energie(colonne):
+    """Convertit un nom de colonne (ex. 'hydro_twh') en nom d'affichage (ex. 'Hydro')."""
+    return colonne.replace('_twh', '').title()
+
+
+def calculer_comparaison(cube, pays_selectionnes, annee_comparaison, energies_selectionnees):
+    """Retourne une ligne par (pays, type d'énergie) avec production, total et part (None si vide)."""
+    colonnes = [e for e in energies_selectionnees if e in cube.index_sources]
+    df_annee = cube.tableau_annee(annee_comparaison, pays=pays_selectionnes, colonnes=colonnes)
+
+    if df_annee.empty or not energies_selectionnees:
+        return None
+
+    nb_pays, nb_energies = len(df_annee), len(energies_selectionnees)
+
+    valeurs = np.zeros((nb_pays, nb_energies))
+    for j, energie in enumerate(energies_selectionnees):
+        if energie in df_annee.columns:
+            valeurs[:, j] = df_annee[energie].to_numpy(dtype='float64', na_value=np.nan)
+    # NaN > 0 est faux : les valeurs manquantes sont ramenées à 0 comme les négatives
+    valeurs = np.where(valeurs > 0, valeurs, 0.0)
+
+    totaux = valeurs.sum(axis=1)
+    parts = np.zeros_like(valeurs)
+    np.divide(valeurs, totaux[:, None], out=parts, where=totaux[:, None] > 0)
+    parts *= 100
+
+    return pd.DataFrame({
+        COLONNE_PAYS: np.repeat(df_annee['pays'].to_numpy(), nb_energies),
+        COLONNE_TYPE: np.tile([nom_energie(e) for e in energies_selectionnees], nb_pays),
+        COLONNE_PRODUCTION: valeurs.ravel(),
+        COLONNE_TOTAL: np.repeat(totaux, nb_energies),
+        COLONNE_PART: parts.ravel(),
+    })
+
+
+def pivoter_comparaison(df_comparaison, colonne_valeurs):
+    """Passe la comparaison au format large : une ligne par pays, triée par total décroissant."""
+    pays = df_comparaison[COLONNE_PAYS].unique()
+    types = df_comparaison[COLONNE_TYPE].unique()
+
+    # Le résultat est une grille régulière pays × énergie : un simple reshape suffit
+    matrice = df_comparaison[colonne_valeurs].to_numpy().reshape(len(pays), len(types))
+    totaux = df_comparaison[COLONNE_TOTAL].to_numpy()[::len(types)]
+
+    df_tableau = pd.DataFrame(matrice, columns=types)
+    df_tableau.insert(0, COLONNE_TOTAL, totaux)
+    df_tableau.insert(0, COLONNE_PAYS, pays)
+
+    # Trier par total décroissant
+    return df_tableau.sort_values(COLONNE_TOTAL, ascending=False)
@@ -0,0 +1,88 @@
+"""Configuration du chargement des données, lue dans les variables d'environnement (voir le README)."""
+import os
+
+from tableau_energie import chargement
+from tableau_energie.ingestion import construire_filtres, lister_sources
+from tableau_energie.planification import PlanificateurFigures
+from tableau_energie.rafraichissement import RafraichisseurDonnees
+from tableau_energie.regions import charger_correspondance, codes_de_region
+from tableau_energie.registre import RegistreAgregats
+
+CHEMIN_FICHIER = 'modern-renewable-energy-consumption.xlsx'
+
+# Instantanés des colonnes projetées de chaque source
+DOSSIER_INSTANTANES = os.path.join('.cache_donnees', 'projections')
+
+# Table de correspondance pays -> régions (une colonne par niveau d'agrégation)
+CHEMIN_REGIONS = 'regions.csv'
+
+
+class Configuration:
+    """Sources, périmètre et options de chargement du jeu de données."""
+
+    def __init__(self, sources=(CHEMIN_FICHIER,), dossier_instantanes=DOSSIER_INSTANTANES,
+                 chemin_regions=CHEMIN_REGIONS, schema_compact=False, annee_min=None, annee_max=None,
+                 region=None, intervalle_actualisation=30.0, fragments=True, diagnostic=False,
+                 journal_performances=None, fils_figures=None):
+        self.sources = list(sources)
+        self.dossier_instantanes = dossier_instantanes
+        self.chemin_regions = chemin_regions
+        self.schema_compact = schema_compact
+        self.annee_min = annee_min
+        self.annee_max = annee_max
+        self.region = region
+        self.intervalle_actualisation = intervalle_actualisation
+        self.fragments = fragments
+        self.diagnostic = diagnostic
+        self.journal_performances = journal_performances
+        self.fils_figures = fils_figures
+
+    @classmethod
+    def depuis_environnement(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        return cls(
+            sources=environ.get('ENERGIE_SOURCES', CHEMIN_FICHIER).split(os.pathsep),
+            schema_compact=environ.get('ENERGIE_SCHEMA_COMPACT', '') == '1',
+            annee_min=environ.get('ENERGIE_ANNEE_MIN') or None,
+            annee_max=environ.get('ENERGIE_ANNEE_MAX') or None,
+            region=environ.get('ENERGIE_REGION') or None,
+            intervalle_actualisation=float(environ.get('ENERGIE_INTERVALLE_ACTUALISATION', '30')),
+            fragments=environ.get('ENERGIE_FRAGMENTS', '1') != '0',
+            diagnostic=environ.get('ENERGIE_DIAGNOSTIC', '') == '1',
+            journal_performances=environ.get('ENERGIE_JOURNAL_PERFORMANCES') or None,
+            fils_figures=int(environ['ENERGIE_FILS_FIGURES']) if environ.get('ENERGIE_FILS_FIGURES') else None,
+        )
+
+    def filtres(self):
+        """Prédicats de chargement issus de la configuration, au format DNF de pyarrow."""
+        codes_iso = None
+        if self.region is not None:
+            codes_iso = codes_de_region(charger_correspondance(self.chemin_regions), self.region)
+        return construire_filtres(self.annee_min, self.annee_max, codes_iso)
+
+    def fichiers_surveilles(self):
+        """Fichiers dont une modification déclenche l'actualisation du jeu de données."""
+        return lister_sources(self.sources) + [self.chemin_regions]
+
+    def lire_sources(self):
+        """Lit et combine les sources configurées, restreintes au périmètre servi."""
+        return chargement.lire_sources(self.sources, self.dossier_instantanes, self.filtres())
+
+    def construire_jeu_donnees(self, df_brut):
+        """Nettoie les données brutes et retourne le jeu de données versionné (None si elles manquent)."""
+        return chargement.construire_jeu_donnees(df_brut, self.sources, self.dossier_instantanes,
+                                                 self.chemin_regions, schema_compact=self.schema_compact,
+                                                 filtres=self.filtres())
+
+    def ouvrir_registre(self, jeu):
+        """Retourne le registre partagé et démarre, si l'intervalle est positif, la surveillance des sources."""
+        registre = RegistreAgregats(jeu, schema_compact=self.schema_compact)
+        if self.intervalle_actualisation > 0:
+            RafraichisseurDonnees(registre, self.fichiers_surveilles,
+                                  lambda: self.construire_jeu_donnees(self.lire_sources()),
+                                  intervalle=self.intervalle_actualisation).demarrer()
+        return registre
+
+    def ouvrir_planificateur(self, transmettre_contexte=None):
+        """Retourne le pool de construction des figures, partagé par toutes les sessions."""
+        return PlanificateurFigures(self.fils_figures, transmettre_contexte)
@@ -0,0 +1,179 @@
+"""Cube dense pays × année × source précalculé à partir du jeu de données nettoyé."""
+import numpy as np
+import pandas as pd
+
+COLONNES_SOURCES = ['hydro_twh', 'solaire_twh', 'eolien_twh']
+COLONNE_TOTAL = 'production_totale_twh'
+
+
+class CubeEnergie:
+    """Production indexée [pays, année, source] ; les cellules absentes (voir `presence`) valent NaN."""
+
+    def __init__(self, pays, codes_iso, annees, sources, valeurs, totaux, presence):
+        self.pays = pays
+        self.codes_iso = codes_iso
+        self.annees = annees
+        self.sources = sources
+        self.valeurs = valeurs
+        self.totaux = totaux
+        self.presence = presence
+        self.index_pays = {nom: i for i, nom in enumerate(pays)}
+        self.index_annees = {int(annee): i for i, annee in enumerate(annees)}
+        self.index_sources = {source: i for i, source in enumerate(sources)}
+
+    def __reduce__(self):
+        # Réduction explicite : rend le cube sérialisable et hachable par le cache de Streamlit
+        return (CubeEnergie, (self.pays, self.codes_iso, self.annees, self.sources,
+                              self.valeurs, self.totaux, self.presence))
+
+    def copie(self):
+        """Copie modifiable du cube (les tableaux partagés peuvent être verrouillés en lecture seule)."""
+        return CubeEnergie(self.pays.copy(), self.codes_iso.copy(), self.annees.copy(), list(self.sources),
+                           self.valeurs.copy(), self.totaux.copy(), self.presence.copy())
+
+    def ecrire_ligne(self, pays, annee, valeurs):
+        """Écrit ou efface (valeurs None) la ligne (pays, année) ; retourne False si elle est hors du cube."""
+        ip = self.index_pays.get(pays)
+        ia = self.index_annees.get(int(annee))
+        if ip is None or ia is None:
+            return False
+        if valeurs is None:
+            self.valeurs[ip, ia, :] = np.nan
+            self.totaux[ip, ia] = np.nan
+            self.presence[ip, ia] = False
+        else:
+            for k, source in enumerate(self.sources):
+                self.valeurs[ip, ia, k] = valeurs.get(source, np.nan)
+            self.totaux[ip, ia] = valeurs.get(COLONNE_TOTAL, np.nan)
+            self.presence[ip, ia] = True
+        return True
+
+    def colonne(self, nom):
+        """Retourne la matrice [pays, année] d'une source ou de la production totale, ou None."""
+        if nom == COLONNE_TOTAL:
+            return self.totaux
+        if nom in self.index_sources:
+            return self.valeurs[:, :, self.index_sources[nom]]
+        return None
+
+    def plage_annees(self, annee_debut=None, annee_fin=None):
+        """Retourne la tranche d'indices d'années couvrant [annee_debut, annee_fin]."""
+        debut = 0 if annee_debut is None else int(np.searchsorted(self.annees, annee_debut, side='left'))
+        fin = len(self.annees) if annee_fin is None else int(np.searchsorted(self.annees, annee_fin, side='right'))
+        return slice(debut, fin)
+
+    def _tableau(self, indices_pays, indices_annees, colonnes, par_annee=False):
+        """Construit le format long des cellules présentes, triées par pays puis année (ou l'inverse)."""
+        presence = self.presence[np.ix_(indices_pays, indices_annees)]
+        if par_annee:
+            lignes_annees, lignes_pays = np.nonzero(presence.T)
+        else:
+            lignes_pays, lignes_annees = np.nonzero(presence)
+        ip = np.asarray(indices_pays)[lignes_pays]
+        ia = np.asarray(indices_annees)[lignes_annees]
+
+        donnees = {
+            'pays': self.pays[ip],
+            'code_iso': self.codes_iso[ip],
+            'annee': self.annees[ia],
+        }
+        for nom in colonnes:
+            donnees[nom] = self.colonne(nom)[ip, ia]
+        return pd.DataFrame(donnees)
+
+    def tableau_complet(self, colonnes=None):
+        """Toutes les lignes présentes, triées par pays puis par année."""
+        colonnes = self.sources + [COLONNE_TOTAL] if colonnes is None else colonnes
+        return self._tableau(np.arange(len(self.pays)), np.arange(len(self.annees)), colonnes)
+
+    def tableau_annee(self, annee, pays=None, colonnes=None):
+        """Lignes présentes pour une année, éventuellement restreintes à une liste de pays."""
+        colonnes = self.sources + [COLONNE_TOTAL] if colonnes is None else colonnes
+        if annee not in self.index_annees:
+            return self._tableau(np.array([], dtype=np.intp), np.array([], dtype=np.intp), colonnes)
+        if pays is None:
+            indices_pays = np.arange(len(self.pays))
+        else:
+            # Ordre du cube (alphabétique), comme un filtre isin() sur le format long
+            indices_pays = np.array(sorted({self.index_pays[p] for p in pays if p in self.index_pays}), dtype=np.intp)
+        return self._tableau(indices_pays, np.array([self.index_annees[annee]], dtype=np.intp), colonnes)
+
+    def tableau_pays(self, pays, annee_debut=None, annee_fin=None, colonnes=None):
+        """Lignes présentes d'un pays sur une période, triées par année."""
+        colonnes = self.sources + [COLONNE_TOTAL] if colonnes is None else colonnes
+        indices_pays = np.array([self.index_pays[pays]] if pays in self.index_pays else [], dtype=np.intp)
+        plage = self.plage_annees(annee_debut, annee_fin)
+        return self._tableau(indices_pays, np.arange(len(self.annees))[plage], colonnes)
+
+    def _indices_selection(self, pays, annee_debut, annee_fin):
+        # Ordre du cube (alphabétique), comme un filtre isin() sur le format long
+        indices_pays = np.array(sorted({self.index_pays[p] for p in pays if p in self.index_pays}), dtype=np.intp)
+        indices_annees = np.arange(len(self.annees))[self.plage_annees(annee_debut, annee_fin)]
+        return indices_pays, indices_annees
+
+    def tableau_selection(self, pays, annee_debut=None, annee_fin=None, colonnes=None,
+                          par_annee=False, annees_decroissantes=False):
+        """Lignes présentes d'une liste de pays sur une période, lues par tranches du cube."""
+        colonnes = self.sources + [COLONNE_TOTAL] if colonnes is None else colonnes
+        indices_pays, indices_annees = self._indices_selection(pays, annee_debut, annee_fin)
+        if annees_decroissantes:
+            indices_annees = indices_annees[::-1]
+        return self._tableau(indices_pays, indices_annees, colonnes, par_annee)
+
+    def sommes_par_pays(self, pays, annee_debut=None, annee_fin=None, colonne=COLONNE_TOTAL):
+        """Somme d'une colonne par pays sur une période, identique au bit près à un groupby('pays').sum()."""
+        indices_pays, indices_annees = self._indices_selection(pays, annee_debut, annee_fin)
+        presence = self.presence[np.ix_(indices_pays, indices_annees)]
+        matrice = np.where(presence, self.colonne(colonne)[np.ix_(indices_pays, indices_annees)], np.nan)
+        retenus = presence.any(axis=1)
+        return pd.DataFrame({'pays': self.pays[indices_pays][retenus],
+                             colonne: somme_compensee(matrice)[retenus]})
+
+
+# Sommation compensée de Kahan dans l'ordre des colonnes, comme la somme par groupe de pandas :
+# les résultats sont identiques au bit près.
+def somme_compensee(matrice):
+    """Somme de chaque ligne d'une matrice, valeurs manquantes ignorées."""
+    somme = np.zeros(matrice.shape[0])
+    compensation = np.zeros(matrice.shape[0])
+    for j in range(matrice.shape[1]):
+        valeurs = matrice[:, j]
+        presentes = ~np.isnan(valeurs)
+        y = valeurs - compensation
+        t = somme + y
+        compensation = np.where(presentes, t - somme - y, compensation)
+        somme = np.where(presentes, t, somme)
+    return somme
+
+
+def construire_cube(df, sources=COLONNES_SOURCES):
+    """Construit le cube dense à partir du jeu de données nettoyé (format long)."""
+    sources = [col for col in sources if col in df.columns]
+
+    codes_pays, pays = pd.factorize(df['pays'], sort=True)
+    codes_annees, annees = pd.factorize(df['annee'].astype('int64'), sort=True)
+    nb_pays, nb_annees = len(pays), len(annees)
+
+    valeurs = np.full((nb_pays, nb_annees, len(sources)), np.nan)
+    totaux = np.full((nb_pays, nb_annees), np.nan)
+    presence = np.zeros((nb_pays, nb_annees), dtype=bool)
+
+    for k, source in enumerate(sources):
+        valeurs[codes_pays, codes_annees, k] = df[source].to_numpy(dtype='float64', na_value=np.nan)
+    totaux[codes_pays, codes_annees] = df[COLONNE_TOTAL].to_numpy(dtype='float64', na_value=np.nan)
+    presence[codes_pays, codes_annees] = True
+
+    # Un code ISO par pays (première occurrence)
+    codes_iso = np.empty(nb_pays, dtype=object)
+    codes_iso[codes_pays[::-1]] = df['code_iso'].to_numpy(dtype=object)[::-1]
+
+    # Chaînes de taille fixe : hachage stable et indépendant des adresses mémoire
+    return CubeEnergie(
+        pays=np.asarray(pays, dtype=str),
+        codes_iso=codes_iso.astype(str),
+        annees=np.asarray(annees, dtype='int64'),
+        sources=sources,
+        valeurs=valeurs,
+        totaux=totaux,
+        presence=presence,
+    )
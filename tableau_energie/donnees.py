@@ -0,0 +1,88 @@
+"""Nettoyage et préparation du jeu de données de production d'énergie renouvelable."""
+import pandas as pd
+
+from tableau_energie.agregats import GROUPE_MONDE, AgregateurIncremental
+from tableau_energie.cube import COLONNES_SOURCES, construire_cube
+
+RENOMMAGE_COLONNES = {
+    'Country': 'pays', 'Code': 'code_iso', 'Year': 'annee',
+    'Hydro generation - TWh': 'hydro_twh', 'Solar generation - TWh': 'solaire_twh',
+    'Wind generation - TWh': 'eolien_twh',
+    # Noms des colonnes du jeu de données complet « energy-data » d'OWID (productions en TWh)
+    'country': 'pays', 'iso_code': 'code_iso', 'year': 'annee',
+    'hydro_electricity': 'hydro_twh', 'solar_electricity': 'solaire_twh',
+    'wind_electricity': 'eolien_twh',
+}
+
+# Colonnes utilisées par le tableau de bord, après renommage
+COLONNES_PROJETEES = ['pays', 'code_iso', 'annee'] + COLONNES_SOURCES
+
+
+def compacter_schema(df, colonnes_production):
+    """Convertit le jeu de données nettoyé vers un schéma compact (catégories, int16, float32)."""
+    return df.astype({
+        'pays': 'category',
+        'code_iso': 'category',
+        'annee': 'int16',
+        **{col: 'float32' for col in colonnes_production + ['production_totale_twh']},
+    })
+
+
+def preparer_colonnes(df):
+    """Renomme les colonnes de la source et convertit l'année et les productions (fichier ou lot)."""
+    # La colonne "Autres renouvelables" est retirée du renommage.
+    # Aucune copie explicite : rename, dropna et les filtres retournent déjà de nouveaux objets.
+    df_nettoye = df.rename(columns=RENOMMAGE_COLONNES, errors='ignore')
+    
+    df_nettoye['annee'] = pd.to_numeric(df_nettoye['annee'], errors='coerce').astype('Int64')
+    
+    # Définir les colonnes de production uniquement avec les colonnes confirmées (Hydro, Solaire, Éolien)
+    # On filtre les colonnes existantes au cas où une source soit totalement absente
+    for col in [col for col in COLONNES_SOURCES if col in df_nettoye.columns]:
+        df_nettoye[col] = pd.to_numeric(df_nettoye[col], errors='coerce')
+    
+    return df_nettoye
+
+
+def nettoyer_et_preparer_donnees(df, schema_compact=False):
+    """
+    Nettoie, renomme, convertit les colonnes et RECALCULE le total mondial 
+    en sommant tous les pays pour garantir des KPIs non nuls.
+    Retourne le format long (schéma compact avec `schema_compact`) et le cube [pays, année, source].
+    """
+    if df is None:
+        return None, None
+    
+    # 1. Renommer les colonnes et convertir les types
+    df_nettoye = preparer_colonnes(df)
+    colonnes_production_existantes = [col for col in COLONNES_SOURCES if col in df_nettoye.columns]
+        
+    # Créer une colonne de production totale
+    df_nettoye['production_totale_twh'] = df_nettoye[colonnes_production_existantes].sum(axis=1)
+    
+    # Nettoyer les lignes essentielles
+    df_nettoye = df_nettoye.dropna(subset=['code_iso', 'annee'])
+    
+    # 4. CRÉATION DU TOTAL MONDIAL PAR CALCUL 
+    df_pays_seuls = df_nettoye[df_nettoye['pays'] != 'World']
+    
+    # Totaux courants par année, maintenus ensuite ligne à ligne par l'agrégateur
+    agregateur = AgregateurIncremental.depuis_dataframe(
+        df_pays_seuls, colonnes_production_existantes + ['production_totale_twh'])
+    df_mondial_calcule = agregateur.tableau(GROUPE_MONDE)
+    
+    df_mondial_calcule['pays'] = 'World'
+    df_mondial_calcule['code_iso'] = 'WLD'
+    
+    # Concaténation
+    df_final = pd.concat([df_pays_seuls, df_mondial_calcule], ignore_index=True)
+    
+    # 5. CUBE DENSE PAYS × ANNÉE × SOURCE pour les graphiques
+    cube = construire_cube(df_final, colonnes_production_existantes)
+    
+    # Seule la copie conservée est compacte : l'ingestion, les totaux et le cube travaillent en float64
+    # (précision des sommes), si bien que le pic de mémoire du nettoyage reste celui du schéma actuel
+    if schema_compact:
+        df_final = compacter_schema(df_final, colonnes_production_existantes)
+    
+    return df_final, cube
@@ -0,0 +1,244 @@
+"""Export en lot, avec reprise, des figures du tableau de bord, sans Streamlit."""
+import argparse
+import importlib.util
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tableau_energie import figures
+from tableau_energie.configuration import Configuration
+
+FORMATS_TEXTE = ('html', 'json')
+FORMATS_IMAGE = ('png', 'svg')
+
+# Graphiques de tendance de l'onglet « Analyse Pays » : colonne, titre et couleur
+TENDANCES_PAYS = {
+    'tendance': ('production_totale_twh', "Tendance de la Production Totale Renouvelable au {pays}", '#1f7e3f'),
+    'hydro': ('hydro_twh', "Production d'hydroélectricité", '#2196f3'),
+    'eolien': ('eolien_twh', "Production d'énergie éolienne", '#4caf50'),
+    'solaire': ('solaire_twh', "Production d'énergie solaire", '#ff9800'),
+}
+
+# Graphiques de chaque groupe de l'onglet « Comparaison »
+GRAPHIQUES_COMPARAISON = ('groupees', 'empilees', 'parts')
+
+NOM_JOURNAL = 'journal.jsonl'
+
+# Jeu de données de chaque processus de rendu, reçu une fois à son démarrage
+_jeu_processus = None
+
+
+def nom_fichier(texte):
+    """Nom de fichier sûr dérivé d'un nom de pays ou de groupe."""
+    return re.sub(r'[^\w-]+', '_', texte).strip('_') or '_'
+
+
+def renderer_images_disponible():
+    """Les exports PNG/SVG de Plotly nécessitent Kaleido."""
+    return importlib.util.find_spec('kaleido') is not None
+
+
+def _ecrire_figure(fig, chemin_base, formats, html_autonome):
+    """Écrit une figure dans chaque format (fichier temporaire puis renommage atomique)."""
+    fichiers = []
+    os.makedirs(os.path.dirname(chemin_base), exist_ok=True)
+    for extension in formats:
+        chemin = f"{chemin_base}.{extension}"
+        temporaire = f"{chemin}.tmp"
+        if extension == 'html':
+            fig.write_html(temporaire, include_plotlyjs=True if html_autonome else 'cdn')
+        elif extension == 'json':
+            with open(temporaire, 'w', encoding='utf-8') as fichier:
+                fichier.write(fig.to_json())
+        else:
+            fig.write_image(temporaire, format=extension)
+        os.replace(temporaire, chemin)
+        fichiers.append(chemin)
+    return fichiers
+
+
+def _figures_pays(jeu, pays):
+    """Graphiques (nom -> figure ou None) de l'onglet « Analyse Pays » pour un pays, sur toute la période."""
+    graphiques = {}
+    for nom, (colonne, titre, couleur) in TENDANCES_PAYS.items():
+        graphiques[nom] = lambda colonne=colonne, titre=titre, couleur=couleur: figures.creer_graphe_tendance(
+            jeu, pays, colonne, titre.format(pays=pays), couleur)
+    annee_fin = int(jeu.cube.annees.max())
+    graphiques['mix'] = lambda: figures.creer_mix_energie_pays(jeu, pays, annee_fin)
+    return graphiques
+
+
+def _figures_comparaison(jeu, groupe, annee):
+    """Graphiques de comparaison d'un groupe de pays : barres groupées, barres empilées et parts."""
+    energies = list(jeu.cube.sources)
+    groupees, _ = figures.creer_comparaison_pays(jeu, groupe, annee, energies, 'group')
+    empilees, parts = figures.creer_comparaison_pays(jeu, groupe, annee, energies, 'empile')
+    return dict(zip(GRAPHIQUES_COMPARAISON, (groupees, empilees, parts)))
+
+
+def _initialiser_processus(jeu):
+    global _jeu_processus
+    _jeu_processus = jeu
+
+
+def _dossier_tache(tache):
+    """Dossier (relatif au dossier de sortie) des graphiques d'une tâche."""
+    if tache[0] == 'pays':
+        return f"pays/{nom_fichier(tache[1])}"
+    return f"comparaison/{nom_fichier('-'.join(tache[1]))}_{tache[2]}"
+
+
+def _cles_tache(tache):
+    noms = list(TENDANCES_PAYS) + ['mix'] if tache[0] == 'pays' else GRAPHIQUES_COMPARAISON
+    return {f"{_dossier_tache(tache)}/{nom}" for nom in noms}
+
+
+def rendre_tache(tache, sortie, formats, html_autonome, deja_faits=(), jeu=None):
+    """Rend les graphiques d'une tâche absents de `deja_faits` ; retourne leurs entrées de journal."""
+    jeu = _jeu_processus if jeu is None else jeu
+    dossier = _dossier_tache(tache)
+    if tache[0] == 'pays':
+        constructeurs = _figures_pays(jeu, tache[1])
+    else:
+        rendues = _figures_comparaison(jeu, list(tache[1]), tache[2])
+        constructeurs = {nom: (lambda fig=fig: fig) for nom, fig in rendues.items()}
+
+    entrees = []
+    for nom, construire in constructeurs.items():
+        cle = f"{dossier}/{nom}"
+        if cle in deja_faits:
+            continue
+        debut = time.perf_counter()
+        fig = construire()
+        fichiers = [] if fig is None else _ecrire_figure(fig, os.path.join(sortie, dossier, nom), formats, html_autonome)
+        entrees.append({
+            'cle': cle,
+            'fichiers': [os.path.relpath(chemin, sortie) for chemin in fichiers],
+            'octets': sum(os.path.getsize(chemin) for chemin in fichiers),
+            'duree_s': round(time.perf_counter() - debut, 4),
+            # Aucune donnée pour ce graphique : rien n'est écrit, mais la tâche est terminée
+            'vide': fig is None,
+        })
+    return entrees
+
+
+def lire_journal(sortie, version, formats):
+    """Clés des graphiques déjà exportés pour cette version, dans tous les formats demandés."""
+    chemin = os.path.join(sortie, NOM_JOURNAL)
+    faits = set()
+    if not os.path.exists(chemin):
+        return faits
+    with open(chemin, encoding='utf-8') as journal:
+        for ligne in journal:
+            try:
+                entree = json.loads(ligne)
+            except ValueError:
+                # Dernière ligne tronquée par une interruption
+                continue
+            if entree.get('version') == version and (entree['vide'] or all(
+                    os.path.exists(os.path.join(sortie, f"{entree['cle']}.{extension}")) for extension in formats)):
+                faits.add(entree['cle'])
+    return faits
+
+
+def analyser_arguments(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaut = Configuration.depuis_environnement()
+    parser.add_argument('--sources', nargs='+', default=defaut.sources,
+                        help="Fichiers ou dossiers de sources (par défaut ENERGIE_SOURCES ou le classeur fourni)")
+    parser.add_argument('--regions', default=defaut.chemin_regions, help="Table de correspondance pays -> régions")
+    parser.add_argument('--instantanes', default=defaut.dossier_instantanes,
+                        help="Dossier des instantanés Parquet des sources")
+    parser.add_argument('--sortie', default='rapports', help="Dossier de sortie")
+    parser.add_argument('--formats', default='html,json',
+                        help="Formats séparés par des virgules parmi html, json, png, svg")
+    parser.add_argument('--html-autonome', action='store_true',
+                        help="Inclure plotly.js dans chaque fichier HTML (consultation hors ligne)")
+    parser.add_argument('--pays', nargs='*', help="Pays à exporter (par défaut tous, hors World)")
+    parser.add_argument('--comparaison', action='append', default=[],
+                        help="Groupe de pays à comparer, séparés par des virgules (option répétable)")
+    parser.add_argument('--annee-comparaison', type=int, help="Année des comparaisons (par défaut la plus récente)")
+    parser.add_argument('--processus', type=int, default=os.cpu_count() or 1,
+                        help="Nombre de processus de rendu (1 : rendu dans le processus courant)")
+    parser.add_argument('--forcer', action='store_true', help="Tout recalculer, sans reprendre le journal")
+    return parser.parse_args(arguments)
+
+
+def main(arguments=None):
+    args = analyser_arguments(arguments)
+
+    formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    inconnus = [f for f in formats if f not in FORMATS_TEXTE + FORMATS_IMAGE]
+    if inconnus:
+        sys.exit(f"Formats non pris en charge : {', '.join(inconnus)}")
+    if any(f in FORMATS_IMAGE for f in formats) and not renderer_images_disponible():
+        print("⚠️ Kaleido n'est pas installé : les formats PNG et SVG sont ignorés.", file=sys.stderr)
+        formats = [f for f in formats if f not in FORMATS_IMAGE]
+    if not formats:
+        sys.exit("Aucun format d'export disponible.")
+
+    debut_chargement = time.perf_counter()
+    # Même périmètre et même version que le tableau de bord (variables ENERGIE_*), sources surchargeables
+    configuration = Configuration.depuis_environnement()
+    configuration.sources = args.sources
+    configuration.chemin_regions = args.regions
+    configuration.dossier_instantanes = args.instantanes
+    jeu = configuration.construire_jeu_donnees(configuration.lire_sources())
+    if jeu is None:
+        sys.exit("Le jeu de données est vide après le nettoyage.")
+    print(f"Jeu de données {jeu.version} chargé en {time.perf_counter() - debut_chargement:.1f} s")
+
+    pays = [p for p in jeu.cube.pays if p != 'World'] if not args.pays else args.pays
+    groupes = [tuple(p.strip() for p in groupe.split(',') if p.strip()) for groupe in args.comparaison]
+    # Noms vérifiés avant tout rendu : une seule tâche invalide ne doit pas interrompre l'export en cours de route
+    pays_inconnus = sorted({p for p in pays + [p for groupe in groupes for p in groupe] if p not in jeu.cube.index_pays})
+    if pays_inconnus:
+        sys.exit(f"Pays absents du jeu de données : {', '.join(pays_inconnus)}")
+    annee_comparaison = args.annee_comparaison or int(jeu.cube.annees.max())
+    taches = [('pays', p) for p in pays]
+    taches += [('comparaison', groupe, annee_comparaison) for groupe in groupes]
+
+    os.makedirs(args.sortie, exist_ok=True)
+    deja_faits = set() if args.forcer else lire_journal(args.sortie, jeu.version, formats)
+    restantes = [t for t in taches if not _cles_tache(t) <= deja_faits]
+    print(f"{len(taches)} tâches, {len(taches) - len(restantes)} déjà exportées, {len(restantes)} à rendre "
+          f"({', '.join(formats)}, {args.processus} processus)")
+
+    nb_figures = nb_vides = octets = 0
+    debut = time.perf_counter()
+    with open(os.path.join(args.sortie, NOM_JOURNAL), 'a', encoding='utf-8') as journal:
+        def consigner(entrees):
+            nonlocal nb_figures, nb_vides, octets
+            for entree in entrees:
+                journal.write(json.dumps(dict(entree, version=jeu.version), ensure_ascii=False) + '\n')
+                nb_vides += entree['vide']
+                nb_figures += not entree['vide']
+                octets += entree['octets']
+            # Chaque tâche terminée est conservée, même si l'export est interrompu ensuite
+            journal.flush()
+
+        if args.processus <= 1:
+            for tache in restantes:
+                consigner(rendre_tache(tache, args.sortie, formats, args.html_autonome, deja_faits & _cles_tache(tache),
+                                       jeu=jeu))
+        else:
+            with ProcessPoolExecutor(max_workers=args.processus, initializer=_initialiser_processus,
+                                     initargs=(jeu,)) as executeur:
+                futurs = [executeur.submit(rendre_tache, tache, args.sortie, formats, args.html_autonome,
+                                           deja_faits & _cles_tache(tache))
+                          for tache in restantes]
+                for futur in as_completed(futurs):
+                    consigner(futur.result())
+
+    duree = time.perf_counter() - debut
+    debit = nb_figures / duree if duree > 0 else 0.0
+    print(f"{nb_figures} figures rendues ({nb_vides} sans données) en {duree:.1f} s : "
+          f"{debit:.1f} figures/s, {len(restantes) / duree if duree > 0 else 0.0:.1f} tâches/s, "
+          f"{octets / 1e6:.1f} Mo écrits dans {args.sortie}")
+
+
+if __name__ == '__main__':
+    main()
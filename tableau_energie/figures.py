@@ -0,0 +1,247 @@
+"""Constructeurs des figures Plotly du tableau de bord, indépendants de Streamlit."""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from tableau_energie.compaction import figure_compacte
+from tableau_energie.comparaison import calculer_comparaison
+from tableau_energie.hierarchie import construire_hierarchie
+from tableau_energie.regions import NIVEAU_PAYS
+
+# Au-delà de ce nombre de courbes, la tendance filtrée est tracée en WebGL plutôt qu'en SVG
+SEUIL_WEBGL = 30
+
+LIBELLE_AUTRES_PAYS = "Autres pays"
+
+
+@figure_compacte
+def creer_graphe_tendance(jeu, pays_selectionne, colonne_data, titre, couleur, annee_debut=None, annee_fin=None):
+    """Crée un graphique linéaire générique pour une colonne spécifique (Hydro, Solar, etc.) d'un pays."""
+    cube = jeu.cube
+    
+    if cube.colonne(colonne_data) is None:
+        return None
+    
+    df_pays = cube.tableau_pays(pays_selectionne, annee_debut, annee_fin, colonnes=[colonne_data])
+    
+    fig = px.line(df_pays,
+                  x='annee',
+                  y=colonne_data,
+                  markers=True,
+                  title=f"{titre} pour {pays_selectionne}",
+                  labels={colonne_data: 'Production (TWh)', 'annee': 'Année'},
+                  color_discrete_sequence=[couleur]
+                 )
+    
+    fig.update_layout(hovermode="x unified", template='plotly_white')
+    return fig
+
+
+@figure_compacte
+def creer_mix_energie_pays(jeu, pays_selectionne, annee_max):
+    """Crée un graphique à barres montrant le mix énergétique d'un pays pour l'année la plus récente."""
+    cube = jeu.cube
+    
+    df_mix_line = cube.tableau_annee(annee_max, pays=[pays_selectionne], colonnes=cube.sources)
+    
+    if df_mix_line.empty: return None
+    
+    # Sélectionner toutes les colonnes de TWh (UNIQUEMENT Hydro, Solaire, Eolien)
+    colonnes_twh = ['hydro_twh', 'solaire_twh', 'eolien_twh']
+    colonnes_twh_existantes = [col for col in colonnes_twh if col in df_mix_line.columns]
+    
+    df_mix = df_mix_line[colonnes_twh_existantes].T.reset_index()
+    df_mix.columns = ['type_energie', 'production_twh']
+    
+    # Nettoyer les noms et définir les couleurs
+    couleurs_map = {'Hydro': '#2196f3', 'Solaire': '#ff9800', 'Eolien': '#4caf50'}
+    df_mix['type_energie'] = df_mix['type_energie'].str.replace('_twh', '').str.title()
+    df_mix = df_mix[df_mix['production_twh'] > 0]
+    
+    if df_mix.empty: return None
+    
+    fig = px.bar(df_mix, x='type_energie', y='production_twh', color='type_energie',
+                  title=f"Mix Énergétique Renouvelable au {pays_selectionne} en {annee_max}",
+                  labels={'production_twh': 'Production (TWh)', 'type_energie': 'Type d\'Énergie'},
+                  color_discrete_map={k.title(): v for k, v in couleurs_map.items()})
+    
+    fig.update_layout(template='plotly_white')
+    return fig
+
+
+@figure_compacte
+def creer_comparaison_pays(jeu, pays_selectionnes, annee_comparaison, energies_selectionnees, type_graphique="group",
+                           df_comparaison=None):
+    """Crée un graphique en colonnes pour comparer les pays selon les types d'énergie sélectionnés."""
+    
+    df_plot = df_comparaison
+    if df_plot is None:
+        df_plot = calculer_comparaison(jeu.cube, pays_selectionnes, annee_comparaison, energies_selectionnees)
+    
+    if df_plot is None:
+        return None, None
+    
+    # Définir les couleurs par type d'énergie
+    couleurs_map = {'Hydro': '#2196f3', 'Solaire': '#ff9800', 'Eolien': '#4caf50'}
+    
+    # Créer le graphique selon le type choisi
+    if type_graphique == "empile":
+        barmode = "stack"
+        title = f"Comparaison des pays en {annee_comparaison} - Barres Empilées (TWh)"
+        
+        # Créer un deuxième graphique avec les pourcentages
+        title_pourcent = f"Répartition des énergies par pays en {annee_comparaison} - Parts (%)"
+        
+        fig = px.bar(df_plot, 
+                     x='Pays', 
+                     y='Production (TWh)', 
+                     color='Type d\'énergie',
+                     barmode=barmode,
+                     title=title,
+                     color_discrete_map=couleurs_map,
+                     labels={'Production (TWh)': 'Production (TWh)'},
+                     hover_data=['Pourcentage (%)'])
+        
+        # Créer un graphique pour les pourcentages
+        fig_pourcent = px.bar(df_plot, 
+                              x='Pays', 
+                              y='Pourcentage (%)', 
+                              color='Type d\'énergie',
+                              barmode='stack',
+                              title=title_pourcent,
+                              color_discrete_map=couleurs_map,
+                              labels={'Pourcentage (%)': 'Part (%)'},
+                              hover_data=['Production (TWh)'])
+        
+        fig_pourcent.update_layout(
+            xaxis_title="Pays",
+            yaxis_title="Part (%)",
+            template='plotly_white',
+            hovermode="x unified",
+            legend_title="Type d'énergie",
+            yaxis=dict(ticksuffix="%", range=[0, 100])
+        )
+        
+        return fig, fig_pourcent
+        
+    else:
+        barmode = "group"
+        title = f"Comparaison des pays en {annee_comparaison} - Barres Groupées"
+        
+        fig = px.bar(df_plot, 
+                     x='Pays', 
+                     y='Production (TWh)', 
+                     color='Type d\'énergie',
+                     barmode=barmode,
+                     title=title,
+                     color_discrete_map=couleurs_map,
+                     labels={'Production (TWh)': 'Production (TWh)'})
+        
+        fig.update_layout(
+            xaxis_title="Pays",
+            yaxis_title="Production (TWh)",
+            template='plotly_white',
+            hovermode="x unified",
+            legend_title="Type d'énergie"
+        )
+        
+        return fig, None
+
+
+# WebGL au-delà de `seuil_webgl` courbes ; avec `pays_principaux`, les autres pays forment une bande
+@figure_compacte
+def creer_tendance_filtree(jeu, pays, annee_debut, annee_fin, pays_principaux=None, seuil_webgl=SEUIL_WEBGL):
+    """Crée le graphique linéaire de la production totale des pays sélectionnés sur une période."""
+    # Une ligne par couple année-pays, triée par année puis pays
+    donnees_tendance = jeu.cube.tableau_selection(
+        pays, annee_debut, annee_fin, colonnes=['production_totale_twh'], par_annee=True
+    )[['annee', 'pays', 'production_totale_twh']]
+    
+    autres = None
+    if pays_principaux is not None and len(pays) > pays_principaux:
+        totaux = jeu.cube.sommes_par_pays(pays, annee_debut, annee_fin)
+        principaux = totaux.nlargest(pays_principaux, 'production_totale_twh')['pays']
+        est_principal = donnees_tendance['pays'].isin(principaux)
+        autres = donnees_tendance[~est_principal]
+        donnees_tendance = donnees_tendance[est_principal]
+    
+    webgl = donnees_tendance['pays'].nunique() > seuil_webgl
+    fig = px.line(
+        donnees_tendance,
+        x='annee',
+        y='production_totale_twh',
+        color='pays',
+        markers=True,
+        render_mode='webgl' if webgl else 'svg',
+        title="Tendance de Production au Fil du Temps",
+        labels={'production_totale_twh': 'Production (TWh)', 'annee': 'Année'}
+    )
+    
+    if autres is not None and not autres.empty:
+        # Bande min-max des autres pays (le minimum remplit jusqu'au maximum), puis leur médiane
+        enveloppe = autres.groupby('annee')['production_totale_twh'].agg(['min', 'median', 'max'])
+        libelle = f"{LIBELLE_AUTRES_PAYS} ({autres['pays'].nunique()})"
+        Trace = go.Scattergl if webgl else go.Scatter
+        fig.add_trace(Trace(x=enveloppe.index, y=enveloppe['max'], mode='lines', line=dict(width=0),
+                            legendgroup=libelle, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(Trace(x=enveloppe.index, y=enveloppe['min'], mode='lines', line=dict(width=0),
+                            fill='tonexty', fillcolor='rgba(128, 128, 128, 0.25)', legendgroup=libelle,
+                            name=f"{libelle} : min-max", hoverinfo='skip'))
+        fig.add_trace(Trace(x=enveloppe.index, y=enveloppe['median'], mode='lines',
+                            line=dict(color='gray', dash='dot'), legendgroup=libelle, name=f"{libelle} : médiane",
+                            hovertemplate="Médiane des autres pays<br>Année=%{x}<br>Production (TWh)=%{y}<extra></extra>"))
+    return fig
+
+
+@figure_compacte
+def creer_barres_filtrees(jeu, pays, annee_debut, annee_fin):
+    """Crée le graphique en barres de la production totale cumulée de chaque pays sélectionné sur une période."""
+    # Sommes sur la période calculées directement sur le cube
+    donnees_pays = jeu.cube.sommes_par_pays(
+        pays, annee_debut, annee_fin
+    ).sort_values('production_totale_twh', ascending=True)
+    
+    fig = px.bar(
+        donnees_pays,
+        x='production_totale_twh',
+        y='pays',
+        orientation='h',
+        title="Production par Pays",
+        labels={'production_totale_twh': 'Production (TWh)', 'pays': 'Pays'},
+        color='production_totale_twh',
+        color_continuous_scale='Greens'
+    )
+    return fig
+
+
+@figure_compacte
+def creer_treemap_distribution(jeu, annee=None, sources=None, niveau=NIVEAU_PAYS):
+    """Crée un Treemap montrant la distribution de la part énergétique par pays (ou par région)."""
+    cube = jeu.cube_niveau(niveau)
+    
+    if annee is None:
+        annee = int(cube.annees.max())
+    
+    # Structure hiérarchique : Racine -> Pays (ou Régions) -> Types d'Énergie (identifiants uniques « Pays/Source »)
+    hierarchie = construire_hierarchie(cube, annee, sources)
+    # Milieu de l'échelle de couleurs : médiane des feuilles (pays × source), les parents valant 0
+    noeuds_parents = set(hierarchie['parents'])
+    valeurs_feuilles = [v for i, v in zip(hierarchie['ids'], hierarchie['valeurs']) if i not in noeuds_parents]
+    
+    fig = go.Figure(go.Treemap(
+        ids=hierarchie['ids'],
+        labels=hierarchie['etiquettes'],
+        parents=hierarchie['parents'],
+        values=hierarchie['valeurs'],
+        marker=dict(colorscale='Greens', cmid=np.median(valeurs_feuilles)),
+        hovertemplate='<b>%{label}</b><br>Production: %{value:,.0f} TWh<extra></extra>',
+        textinfo="label+value"
+    ))
+    
+    fig.update_layout(
+        title=f"Distribution de l'Énergie Renouvelable par {niveau} ({annee})",
+        height=600,
+        margin=dict(t=50, l=0, r=0, b=0)
+    )
+    
+    return fig
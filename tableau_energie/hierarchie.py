@@ -0,0 +1,37 @@
+"""Construction vectorisée de la hiérarchie Monde → Pays → Source du treemap."""
+import numpy as np
+
+from tableau_energie.comparaison import nom_energie
+
+ETIQUETTE_RACINE = 'Monde'
+
+
+# Les parents ont une valeur nulle : avec branchvalues='remainder', Plotly les dimensionne par leurs feuilles
+def construire_hierarchie(cube, annee, sources=None, exclus=('World',), racine=ETIQUETTE_RACINE):
+    """Retourne les ids, étiquettes, parents et valeurs du treemap en un passage sur le cube."""
+    sources = cube.sources if sources is None else [s for s in sources if s in cube.index_sources]
+    vide = {'ids': [racine], 'etiquettes': [racine], 'parents': [''], 'valeurs': [0.0]}
+    if annee not in cube.index_annees or not sources:
+        return vide
+
+    ia = cube.index_annees[annee]
+    matrice = cube.valeurs[:, ia, [cube.index_sources[s] for s in sources]]
+    # Les valeurs manquantes (NaN > 0 est faux) et négatives sont écartées
+    matrice = np.where(matrice > 0, matrice, 0.0)
+
+    retenus = cube.presence[:, ia] & ~np.isin(cube.pays, list(exclus))
+    indices_pays = np.nonzero(retenus & (matrice.sum(axis=1) > 0))[0]
+
+    # np.nonzero parcourt la matrice ligne par ligne : les feuilles d'un pays sont contiguës
+    lignes, colonnes = np.nonzero(matrice[indices_pays] > 0)
+    pays_feuilles = cube.pays[indices_pays[lignes]]
+    noms_sources = np.array([nom_energie(s) for s in sources])[colonnes]
+
+    pays = cube.pays[indices_pays]
+    ids = np.concatenate([[racine], pays, np.char.add(np.char.add(pays_feuilles, '/'), noms_sources)])
+    etiquettes = np.concatenate([[racine], pays, noms_sources])
+    parents = np.concatenate([[''], np.full(len(pays), racine), pays_feuilles])
+    valeurs = np.concatenate([np.zeros(len(pays) + 1), matrice[indices_pays[lignes], colonnes]])
+
+    return {'ids': ids.tolist(), 'etiquettes': etiquettes.tolist(),
+            'parents': parents.tolist(), 'valeurs': valeurs.tolist()}
@@ -0,0 +1,144 @@
+"""Ingestion par lots, projetée et filtrée, de sources CSV, Parquet ou Excel."""
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from tableau_energie.donnees import COLONNES_PROJETEES, RENOMMAGE_COLONNES, preparer_colonnes
+from tableau_energie.instantane import filtrer_en_memoire
+
+TAILLE_LOT_DEFAUT = 50_000
+
+
+def construire_filtres(annee_min=None, annee_max=None, codes_iso=None):
+    """Prédicats de chargement (plage d'années, ensemble de codes ISO) au format DNF de pyarrow."""
+    filtres = []
+    if annee_min is not None:
+        filtres.append(('annee', '>=', int(annee_min)))
+    if annee_max is not None:
+        filtres.append(('annee', '<=', int(annee_max)))
+    if codes_iso is not None:
+        filtres.append(('code_iso', 'in', sorted(codes_iso)))
+    return filtres
+
+
+def cle_projection(colonnes=None):
+    """Empreinte courte de la projection et du renommage appliqués par `lire_source_projetee`."""
+    colonnes = COLONNES_PROJETEES if colonnes is None else colonnes
+    description = json.dumps([list(colonnes), sorted(RENOMMAGE_COLONNES.items())], ensure_ascii=False)
+    return hashlib.sha256(description.encode('utf-8')).hexdigest()[:12]
+
+
+def _colonnes_lues(colonnes, filtres):
+    """Colonnes projetées, complétées par celles dont dépendent les filtres."""
+    colonnes = list(COLONNES_PROJETEES if colonnes is None else colonnes)
+    return colonnes + [col for col, _, _ in filtres if col not in colonnes]
+
+
+def _lots_csv(chemin, taille_lot, colonnes, filtres):
+    yield from pd.read_csv(chemin, usecols=lambda nom: RENOMMAGE_COLONNES.get(nom, nom) in colonnes,
+                           chunksize=taille_lot)
+
+
+def _lots_parquet(chemin, taille_lot, colonnes, filtres):
+    source = ds.dataset(chemin, format='parquet')
+    noms_source = {RENOMMAGE_COLONNES.get(nom, nom): nom for nom in source.schema.names}
+    colonnes_source = [nom for nom in source.schema.names if RENOMMAGE_COLONNES.get(nom, nom) in colonnes]
+
+    # Filtres exprimés avec les noms de la source : les groupes de lignes exclus ne sont pas lus
+    expression = None
+    if filtres and all(col in noms_source for col, _, _ in filtres):
+        expression = pq.filters_to_expression([(noms_source[col], op, val) for col, op, val in filtres])
+    for lot in source.to_batches(columns=colonnes_source, filter=expression, batch_size=taille_lot):
+        if lot.num_rows:
+            yield lot.to_pandas()
+
+
+def _lots_excel(chemin, taille_lot, colonnes, filtres):
+    # Import local : openpyxl n'est nécessaire que pour les sources Excel
+    import openpyxl
+
+    classeur = openpyxl.load_workbook(chemin, read_only=True, data_only=True)
+    try:
+        for feuille in classeur.worksheets:
+            lignes = feuille.iter_rows(values_only=True)
+            entete = next(lignes, None)
+            if entete is None:
+                continue
+            indices = [i for i, nom in enumerate(entete)
+                       if nom is not None and RENOMMAGE_COLONNES.get(nom, nom) in colonnes]
+            # Feuille sans les colonnes attendues (notes, métadonnées) : ignorée
+            if not indices:
+                continue
+            noms = [entete[i] for i in indices]
+
+            lot = []
+            for ligne in lignes:
+                lot.append([ligne[i] if i < len(ligne) else None for i in indices])
+                if len(lot) == taille_lot:
+                    yield pd.DataFrame(lot, columns=noms)
+                    lot = []
+            if lot:
+                yield pd.DataFrame(lot, columns=noms)
+    finally:
+        classeur.close()
+
+
+LECTEURS_PAR_EXTENSION = {
+    '.csv': _lots_csv,
+    '.parquet': _lots_parquet,
+    '.xlsx': _lots_excel,
+    '.xlsm': _lots_excel,
+}
+
+
+def lister_sources(chemins):
+    """Remplace chaque dossier par ses fichiers de format pris en charge, triés par nom."""
+    fichiers = []
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            fichiers.extend(sorted(
+                os.path.join(chemin, nom) for nom in os.listdir(chemin)
+                if os.path.splitext(nom)[1].lower() in LECTEURS_PAR_EXTENSION))
+        else:
+            fichiers.append(chemin)
+    return fichiers
+
+
+def lire_par_lots(chemin, taille_lot=TAILLE_LOT_DEFAUT, colonnes=None, filtres=None):
+    """Itère sur les lots bruts d'une source ; seule une source Parquet applique déjà les filtres."""
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension not in LECTEURS_PAR_EXTENSION:
+        raise ValueError(f"Format de source non pris en charge : {chemin}")
+    filtres = filtres or []
+    return LECTEURS_PAR_EXTENSION[extension](chemin, taille_lot, _colonnes_lues(colonnes, filtres), filtres)
+
+
+# Les lots filtrés sont concaténés : la mémoire de pointe est celle des colonnes projetées des lignes
+# retenues. Pour un instantané, la source est lue sans filtres (il doit servir tous les périmètres) :
+# seule la projection réduit alors ce qui est gardé en mémoire.
+def lire_source_projetee(chemin, taille_lot=TAILLE_LOT_DEFAUT, colonnes=None, filtres=None):
+    """Lit une source par lots et retourne ses colonnes projetées, converties et filtrées."""
+    colonnes = COLONNES_PROJETEES if colonnes is None else colonnes
+    lots = []
+    for lot in lire_par_lots(chemin, taille_lot, colonnes, filtres):
+        lot = filtrer_en_memoire(preparer_colonnes(lot), colonnes, filtres)
+        if not lot.empty:
+            lots.append(lot)
+    if not lots:
+        return pd.DataFrame(columns=colonnes)
+    return pd.concat(lots, ignore_index=True)
+
+
+def combiner_sources(tableaux):
+    """Concatène les sources projetées ; pour une même ligne (pays, année), la dernière l'emporte."""
+    tableaux = [df for df in tableaux if not df.empty]
+    if not tableaux:
+        return pd.DataFrame(columns=COLONNES_PROJETEES)
+    if len(tableaux) == 1:
+        return tableaux[0]
+    df = pd.concat(tableaux, ignore_index=True)
+    return df.drop_duplicates(subset=['pays', 'annee'], keep='last', ignore_index=True)
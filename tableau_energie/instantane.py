@@ -0,0 +1,189 @@
+"""Cache d'instantanés Parquet des sources, reconstruits quand leur contenu change."""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DOSSIER_CACHE_DEFAUT = '.cache_donnees'
+
+# Colonne technique conservant l'ordre d'origine des lignes d'un instantané regroupé
+COLONNE_RANG = '__rang__'
+
+# Taille maximale d'un groupe de lignes : un groupe plus grand est découpé, ses lignes triées par
+# `colonnes_tri`, pour que les statistiques min/max de ces colonnes permettent d'écarter des sous-groupes.
+# Chaque groupe de lignes a un coût fixe à la lecture : en dessous de quelques centaines de lignes, la
+# lecture complète ralentit plus que le filtrage n'y gagne.
+LIGNES_MAX_PAR_GROUPE = 1024
+
+
+def calculer_empreinte(chemin, taille_bloc=1 << 20):
+    """Calcule l'empreinte SHA-256 du contenu d'un fichier, lu par blocs."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(taille_bloc), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def _nom_base(chemin_source):
+    """Nom du fichier sans extension, suivi d'une empreinte courte de son chemin absolu résolu."""
+    chemin_resolu = os.path.realpath(chemin_source)
+    suffixe = hashlib.sha256(chemin_resolu.encode('utf-8')).hexdigest()[:8]
+    return f"{os.path.splitext(os.path.basename(chemin_source))[0]}-{suffixe}"
+
+
+def _chemin_manifeste(chemin_source, dossier_cache):
+    return os.path.join(dossier_cache, f"{_nom_base(chemin_source)}.json")
+
+
+def _chemin_instantane(chemin_source, dossier_cache, empreinte, cle_lecture=None):
+    suffixe = f"-{cle_lecture}" if cle_lecture else ''
+    return os.path.join(dossier_cache, f"{_nom_base(chemin_source)}-{empreinte[:16]}{suffixe}.parquet")
+
+
+def lire_manifeste(chemin_source, dossier_cache=DOSSIER_CACHE_DEFAUT):
+    """Retourne le manifeste de l'instantané d'un fichier source, ou None s'il est absent ou illisible."""
+    try:
+        with open(_chemin_manifeste(chemin_source, dossier_cache), encoding='utf-8') as fichier:
+            return json.load(fichier)
+    except (OSError, ValueError):
+        return None
+
+
+def _ecrire_atomiquement(chemin, ecrire):
+    """Écrit dans un fichier temporaire puis le renomme, pour ne jamais exposer un fichier partiel."""
+    chemin_temporaire = f"{chemin}.{os.getpid()}.tmp"
+    try:
+        ecrire(chemin_temporaire)
+        os.replace(chemin_temporaire, chemin)
+    finally:
+        if os.path.exists(chemin_temporaire):
+            os.remove(chemin_temporaire)
+
+
+def ecrire_instantane(df, chemin_instantane, colonne_groupes=None, colonnes_tri=(),
+                      lignes_max_par_groupe=LIGNES_MAX_PAR_GROUPE):
+    """Écrit un DataFrame en Parquet non compressé, un groupe de lignes (au plus) par valeur de `colonne_groupes`."""
+    if colonne_groupes is None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        _ecrire_atomiquement(chemin_instantane,
+                             lambda chemin: pq.write_table(table, chemin, compression='none'))
+        return
+
+    # Au sein d'un groupe, lignes triées par `colonnes_tri` (valeurs manquantes en fin de groupe)
+    df = df.assign(**{COLONNE_RANG: range(len(df))}).sort_values([colonne_groupes, *colonnes_tri], kind='stable')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Début de chaque série de valeurs identiques (valeurs manquantes regroupées en fin de fichier)
+    codes = pd.factorize(df[colonne_groupes], use_na_sentinel=False)[0]
+    bornes = [0] + (np.flatnonzero(np.diff(codes)) + 1).tolist() + [len(df)]
+
+    def ecrire(chemin):
+        with pq.ParquetWriter(chemin, table.schema, compression='none') as redacteur:
+            for debut, fin in zip(bornes[:-1], bornes[1:]):
+                for sous_debut in range(debut, fin, lignes_max_par_groupe):
+                    redacteur.write_table(table.slice(sous_debut, min(lignes_max_par_groupe, fin - sous_debut)))
+    _ecrire_atomiquement(chemin_instantane, ecrire)
+
+
+def lire_instantane(chemin_instantane, colonnes=None, filtres=None):
+    """Lit un instantané Parquet en mémoire mappée, restreint à `colonnes` et `filtres`."""
+    if colonnes is not None:
+        colonnes_fichier = pq.read_schema(chemin_instantane).names
+        colonnes = [col for col in colonnes if col in colonnes_fichier]
+        if COLONNE_RANG in colonnes_fichier:
+            colonnes.append(COLONNE_RANG)
+    table = pq.read_table(chemin_instantane, columns=colonnes, filters=filtres or None, memory_map=True)
+    df = table.to_pandas()
+    if COLONNE_RANG in df.columns:
+        # Ordre d'origine des lignes, indépendant du regroupement
+        df = df.sort_values(COLONNE_RANG, kind='stable').drop(columns=COLONNE_RANG).reset_index(drop=True)
+    return df
+
+
+def _ecrire_manifeste(chemin_source, dossier_cache, manifeste):
+    def ecrire(chemin):
+        with open(chemin, 'w', encoding='utf-8') as fichier:
+            json.dump(manifeste, fichier)
+    _ecrire_atomiquement(_chemin_manifeste(chemin_source, dossier_cache), ecrire)
+
+
+def _manifeste_a_jour(manifeste, etat):
+    return (manifeste is not None and manifeste.get('mtime_ns') == etat.st_mtime_ns
+            and manifeste.get('taille') == etat.st_size)
+
+
+def empreinte_source(chemin_source, dossier_cache=DOSSIER_CACHE_DEFAUT):
+    """Retourne l'empreinte SHA-256 du fichier source, celle du manifeste s'il n'a pas changé."""
+    manifeste = lire_manifeste(chemin_source, dossier_cache)
+    if _manifeste_a_jour(manifeste, os.stat(chemin_source)):
+        return manifeste['empreinte']
+    return calculer_empreinte(chemin_source)
+
+
+def empreinte_sources(chemins_sources, dossier_cache=DOSSIER_CACHE_DEFAUT):
+    """Empreinte d'un ensemble ordonné de sources (celle de la source elle-même s'il n'y en a qu'une)."""
+    empreintes = [empreinte_source(chemin, dossier_cache) for chemin in chemins_sources]
+    if len(empreintes) == 1:
+        return empreintes[0]
+    return hashlib.sha256('\n'.join(empreintes).encode('ascii')).hexdigest()
+
+
+# Un fichier seulement « touché » (même contenu) réutilise l'instantané ; sans cache accessible en
+# écriture, la source est lue directement. `colonnes` et `filtres` ne s'appliquent qu'à la lecture :
+# l'instantané contient toute la sortie du lecteur, que `cle_lecture` identifie (projection, renommage)
+# pour qu'un lecteur différent ne réutilise jamais l'instantané d'un autre.
+def charger_avec_instantane(chemin_source, dossier_cache=DOSSIER_CACHE_DEFAUT, lecteur=pd.read_excel,
+                            colonnes=None, filtres=None, colonne_groupes=None, colonnes_tri=(), cle_lecture=None):
+    """Charge le fichier source en passant par son instantané colonnaire."""
+    etat = os.stat(chemin_source)
+    manifeste = lire_manifeste(chemin_source, dossier_cache)
+
+    if _manifeste_a_jour(manifeste, etat):
+        chemin_instantane = _chemin_instantane(chemin_source, dossier_cache, manifeste['empreinte'], cle_lecture)
+        if os.path.exists(chemin_instantane):
+            return lire_instantane(chemin_instantane, colonnes, filtres)
+
+    empreinte = calculer_empreinte(chemin_source)
+    chemin_instantane = _chemin_instantane(chemin_source, dossier_cache, empreinte, cle_lecture)
+    nouveau_manifeste = {'empreinte': empreinte, 'mtime_ns': etat.st_mtime_ns, 'taille': etat.st_size,
+                         'cle_lecture': cle_lecture}
+
+    if os.path.exists(chemin_instantane):
+        # Contenu inchangé (fichier simplement « touché ») : seul le manifeste est mis à jour
+        try:
+            _ecrire_manifeste(chemin_source, dossier_cache, nouveau_manifeste)
+        except OSError:
+            pass
+        return lire_instantane(chemin_instantane, colonnes, filtres)
+
+    df = lecteur(chemin_source)
+    try:
+        os.makedirs(dossier_cache, exist_ok=True)
+        ecrire_instantane(df, chemin_instantane, colonne_groupes, colonnes_tri)
+        _ecrire_manifeste(chemin_source, dossier_cache, nouveau_manifeste)
+    except OSError:
+        return filtrer_en_memoire(df, colonnes, filtres)
+
+    # Supprimer l'instantané précédent devenu obsolète (autre contenu ou autre lecteur)
+    if manifeste is not None:
+        ancien = _chemin_instantane(chemin_source, dossier_cache, manifeste['empreinte'], manifeste.get('cle_lecture'))
+        if ancien != chemin_instantane and os.path.exists(ancien):
+            os.remove(ancien)
+
+    if colonnes is None and not filtres:
+        return df
+    return lire_instantane(chemin_instantane, colonnes, filtres)
+
+
+def filtrer_en_memoire(df, colonnes=None, filtres=None):
+    """Applique une projection et des filtres (format DNF de pyarrow) à un DataFrame déjà chargé."""
+    if filtres:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        df = table.filter(pq.filters_to_expression(filtres)).to_pandas()
+    if colonnes is not None:
+        df = df[[col for col in colonnes if col in df.columns]]
+    return df
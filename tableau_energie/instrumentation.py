@@ -0,0 +1,148 @@
+"""Instrumentation du chemin critique : durée, cache et volume de chaque étape d'une réexécution."""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+_local = threading.local()
+_verrou_ecriture = threading.Lock()
+
+
+class JournalReexecution:
+    """Étapes d'une réexécution, dans l'ordre de leur ouverture (les étapes imbriquées ont une profondeur > 0)."""
+
+    def __init__(self, session=None, numero=None, version_donnees=None, portee='page'):
+        self.session = session
+        self.portee = portee
+        self.numero = numero
+        self.version_donnees = version_donnees
+        self.horodatage = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        self.etapes = []
+        self.octets = 0
+        self.duree_ms = None
+        self._pile = []
+        self._debut = time.perf_counter()
+
+    def terminer(self):
+        self.duree_ms = (time.perf_counter() - self._debut) * 1000
+        return self
+
+    def en_dict(self):
+        return {
+            'horodatage': self.horodatage,
+            'session': self.session,
+            'portee': self.portee,
+            'numero': self.numero,
+            'version_donnees': self.version_donnees,
+            'duree_ms': self.duree_ms,
+            'octets': self.octets,
+            'etapes': self.etapes,
+        }
+
+
+def journal_courant():
+    """Journal de la réexécution en cours dans ce fil (None hors instrumentation)."""
+    return getattr(_local, 'journal', None)
+
+
+def demarrer_reexecution(session=None, numero=None, version_donnees=None, portee='page'):
+    _local.journal = JournalReexecution(session, numero, version_donnees, portee)
+    return _local.journal
+
+
+def terminer_reexecution():
+    """Clôt et retourne le journal de la réexécution en cours (None s'il n'y en a pas)."""
+    journal = journal_courant()
+    _local.journal = None
+    return None if journal is None else journal.terminer()
+
+
+def compter_octets(nombre):
+    """Ajoute `nombre` octets envoyés au navigateur à la réexécution en cours."""
+    journal = journal_courant()
+    if journal is not None:
+        journal.octets += nombre
+
+
+@contextmanager
+def etape(nom):
+    """Chronomètre le bloc comme une étape et retourne son enregistrement, ou None hors instrumentation."""
+    journal = journal_courant()
+    if journal is None:
+        yield None
+        return
+    enregistrement = {'nom': nom, 'profondeur': len(journal._pile), 'duree_ms': None, 'octets': 0, 'cache': None}
+    journal.etapes.append(enregistrement)
+    journal._pile.append(enregistrement)
+    octets_avant = journal.octets
+    debut = time.perf_counter()
+    try:
+        yield enregistrement
+    finally:
+        enregistrement['duree_ms'] = (time.perf_counter() - debut) * 1000
+        enregistrement['octets'] = journal.octets - octets_avant
+        journal._pile.pop()
+
+
+def rattacher_journal(journal):
+    """Imbrique dans l'étape en cours les étapes d'un journal tenu par un autre fil (construction parallèle)."""
+    courant = journal_courant()
+    if courant is None:
+        return
+    profondeur = len(courant._pile)
+    for enregistrement in journal.etapes:
+        courant.etapes.append(dict(enregistrement, profondeur=enregistrement['profondeur'] + profondeur))
+    courant.octets += journal.octets
+
+
+def instrumenter(nom=None):
+    """Décorateur : chaque appel de la fonction est une étape (nommée d'après la fonction par défaut)."""
+    def decorateur(fonction):
+        nom_etape = nom or fonction.__name__
+
+        @functools.wraps(fonction)
+        def appel(*args, **kwargs):
+            with etape(nom_etape):
+                return fonction(*args, **kwargs)
+        return appel
+    return decorateur
+
+
+def instrumenter_cache(mise_en_cache, nom=None):
+    """Décorateur : met la fonction en cache et enregistre chaque appel (succès ou échec du cache)."""
+    def decorateur(fonction):
+        nom_etape = nom or fonction.__name__
+
+        @functools.wraps(fonction)
+        def calcul(*args, **kwargs):
+            journal = journal_courant()
+            enregistrement = journal._pile[-1] if journal is not None and journal._pile else None
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                if enregistrement is not None:
+                    enregistrement['calcul_ms'] = (time.perf_counter() - debut) * 1000
+
+        en_cache = mise_en_cache(calcul)
+
+        @functools.wraps(fonction)
+        def appel(*args, **kwargs):
+            with etape(nom_etape) as enregistrement:
+                resultat = en_cache(*args, **kwargs)
+                if enregistrement is not None:
+                    enregistrement['cache'] = 'echec' if 'calcul_ms' in enregistrement else 'succes'
+                return resultat
+
+        appel.clear = en_cache.clear
+        return appel
+    return decorateur
+
+
+def ecrire_journal(chemin, journal):
+    """Ajoute le journal d'une réexécution au fichier JSON Lines `chemin`."""
+    ligne = json.dumps(journal.en_dict(), ensure_ascii=False, default=str)
+    with _verrou_ecriture, open(chemin, 'a', encoding='utf-8') as fichier:
+        fichier.write(ligne + '\n')
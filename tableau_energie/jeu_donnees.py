@@ -0,0 +1,34 @@
+"""Poignée versionnée sur le jeu de données nettoyé et son cube, hachée par son seul jeton de version."""
+from tableau_energie.regions import NIVEAU_PAYS
+
+
+class JeuDonnees:
+    """Jeu de données nettoyé, cube, cubes régionaux et jeton de version identifiant le contenu."""
+
+    def __init__(self, df, cube, version, regions=None):
+        self.df = df
+        self.cube = cube
+        self.version = version
+        # AgregatsRegionaux précalculés (None sans table de correspondance)
+        self.regions = regions
+
+    def niveaux(self):
+        """Niveaux d'agrégation disponibles, en commençant par les pays."""
+        return [NIVEAU_PAYS] + ([] if self.regions is None else self.regions.niveaux)
+
+    def cube_niveau(self, niveau=NIVEAU_PAYS):
+        """Cube des pays ou cube régional précalculé du niveau demandé."""
+        if niveau == NIVEAU_PAYS or niveau is None:
+            return self.cube
+        return self.regions.cubes[niveau]
+
+    def __repr__(self):
+        return f"JeuDonnees(version={self.version!r}, lignes={len(self.df)})"
+
+
+def jeton_jeu_donnees(jeu):
+    """Fonction de hachage Streamlit d'une poignée : son seul jeton de version."""
+    return jeu.version
+
+
+HACHAGE_JEU_DONNEES = {JeuDonnees: jeton_jeu_donnees}
@@ -0,0 +1,52 @@
+"""Magasin LRU borné de figures Plotly pré-construites, partagées entre les sessions."""
+import threading
+from collections import OrderedDict
+
+
+class MagasinFigures:
+    """Cache LRU thread-safe de figures, construites par `constructeur(*cle)` à la demande."""
+
+    def __init__(self, constructeur, taille_max=64):
+        self._constructeur = constructeur
+        self._taille_max = taille_max
+        self._figures = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def __len__(self):
+        with self._verrou:
+            return len(self._figures)
+
+    def __contains__(self, cle):
+        with self._verrou:
+            return cle in self._figures
+
+    # La figure est rendue telle quelle, sans copie ni désérialisation : st.plotly_chart la copie
+    # (to_dict) sans la revalider, ce qu'il ferait d'un dictionnaire. Elle ne doit pas être modifiée.
+    def obtenir(self, *cle):
+        """Retourne la figure associée à la clé, en la construisant si nécessaire."""
+        with self._verrou:
+            if cle in self._figures:
+                self._figures.move_to_end(cle)
+                return self._figures[cle]
+
+        # Construction hors verrou pour ne pas bloquer les autres lectures
+        figure = self._constructeur(*cle)
+
+        with self._verrou:
+            self._figures[cle] = figure
+            self._figures.move_to_end(cle)
+            while len(self._figures) > self._taille_max:
+                self._figures.popitem(last=False)
+        return figure
+
+    def prechauffer(self, cles):
+        """Construit en arrière-plan (thread démon) les figures des clés données ; retourne le thread."""
+        cles = list(cles)[:self._taille_max]
+
+        def prechauffer_cles():
+            for cle in cles:
+                self.obtenir(*cle)
+
+        thread = threading.Thread(target=prechauffer_cles, name='prechauffage-figures', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,93 @@
+"""Construction des figures d'une réexécution en parallèle, dans un pool de fils partagé."""
+import contextlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tableau_energie.instrumentation import demarrer_reexecution, etape, journal_courant, rattacher_journal, \
+    terminer_reexecution
+
+
+def nombre_fils_par_defaut():
+    """Un fil par cœur disponible, au plus 4 (les figures d'une page sont peu nombreuses)."""
+    return min(4, os.cpu_count() or 1)
+
+
+class Construction:
+    """Figure en cours de construction ; `resultat()` attend sa fin et la retourne (ou relève son erreur)."""
+
+    def __init__(self, nom):
+        self.nom = nom
+        self.parallele = False
+        self._termine = threading.Event()
+        self._valeur = None
+        self._erreur = None
+        self._journal = None
+
+    def _executer(self, fonction, args, kwargs, activer_contexte, journal_parent):
+        try:
+            with activer_contexte():
+                if journal_parent is None:
+                    self._valeur = fonction(*args, **kwargs)
+                else:
+                    # Journal propre au fil du pool, rattaché à celui de la réexécution par resultat()
+                    demarrer_reexecution(journal_parent.session, journal_parent.numero,
+                                         journal_parent.version_donnees, journal_parent.portee)
+                    try:
+                        self._valeur = fonction(*args, **kwargs)
+                    finally:
+                        self._journal = terminer_reexecution()
+        except Exception as erreur:
+            self._erreur = erreur
+        finally:
+            self._termine.set()
+
+    def resultat(self):
+        # Étape d'attente du fil appelant ; les étapes de la construction dans le pool y sont imbriquées
+        with etape(f"attente_{self.nom}") as enregistrement:
+            self._termine.wait()
+            if enregistrement is not None:
+                enregistrement['parallele'] = self.parallele
+            if self._journal is not None:
+                rattacher_journal(self._journal)
+                self._journal = None
+        if self._erreur is not None:
+            raise self._erreur
+        return self._valeur
+
+
+# Fil du pool occupé : la construction s'exécute dans le fil appelant, sans attente.
+# `transmettre_contexte()` donne le contexte (session) à activer dans le fil du pool.
+class PlanificateurFigures:
+    """Pool de `nombre_fils` fils pour les constructions de figures."""
+
+    def __init__(self, nombre_fils=None, transmettre_contexte=None):
+        self.nombre_fils = nombre_fils_par_defaut() if nombre_fils is None else nombre_fils
+        self._transmettre_contexte = transmettre_contexte
+        self._pool = None
+        self._places = None
+        if self.nombre_fils > 1:
+            self._pool = ThreadPoolExecutor(self.nombre_fils, thread_name_prefix='figures')
+            self._places = threading.BoundedSemaphore(self.nombre_fils)
+
+    def soumettre(self, nom, fonction, *args, **kwargs):
+        """Lance `fonction(*args, **kwargs)` dans le pool, ou tout de suite dans ce fil s'il est saturé."""
+        construction = Construction(nom)
+        if self._pool is None or not self._places.acquire(blocking=False):
+            construction._executer(fonction, args, kwargs, contextlib.nullcontext, None)
+            return construction
+
+        activer_contexte = contextlib.nullcontext
+        if self._transmettre_contexte is not None:
+            activer_contexte = self._transmettre_contexte()
+        construction.parallele = True
+        journal_appelant = journal_courant()
+
+        def executer():
+            try:
+                construction._executer(fonction, args, kwargs, activer_contexte, journal_appelant)
+            finally:
+                self._places.release()
+
+        self._pool.submit(executer)
+        return construction
@@ -0,0 +1,71 @@
+"""Actualisation en arrière-plan du jeu de données partagé."""
+import logging
+import os
+import threading
+
+journal = logging.getLogger(__name__)
+
+
+def signature_fichiers(chemins):
+    """Date de modification et taille de chaque fichier (None pour un fichier absent)."""
+    signature = []
+    for chemin in chemins:
+        try:
+            etat = os.stat(chemin)
+            signature.append((chemin, etat.st_mtime_ns, etat.st_size))
+        except OSError:
+            signature.append((chemin, None, None))
+    return tuple(signature)
+
+
+class RafraichisseurDonnees:
+    """Surveille les sources et publie dans le registre le jeu reconstruit après un changement stable."""
+
+    def __init__(self, registre, lister_fichiers, construire, intervalle=30.0):
+        self.registre = registre
+        self.lister_fichiers = lister_fichiers
+        self.construire = construire
+        self.intervalle = intervalle
+        self._signature_publiee = signature_fichiers(lister_fichiers())
+        self._signature_observee = self._signature_publiee
+        self._arret = threading.Event()
+        self._thread = None
+
+    def demarrer(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._boucle, name='rafraichissement-donnees', daemon=True)
+            self._thread.start()
+        return self
+
+    def arreter(self, delai=None):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join(delai)
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            try:
+                self.verifier()
+            except Exception:
+                journal.exception("Échec de l'actualisation des données ; la version courante est conservée.")
+
+    # Un changement n'est pris en compte qu'une fois observé deux fois de suite (fichier en cours d'écriture)
+    def verifier(self):
+        """Compare les fichiers à la dernière version publiée, reconstruit si besoin et retourne la vue ou None."""
+        signature = signature_fichiers(self.lister_fichiers())
+        stable = signature == self._signature_observee
+        self._signature_observee = signature
+        if signature == self._signature_publiee or not stable:
+            return None
+
+        jeu = self.construire()
+        if jeu is None:
+            return None
+        if jeu.version == self.registre.version:
+            # Contenu identique (fichiers simplement « touchés ») : rien à publier
+            self._signature_publiee = signature
+            return None
+        vue = self.registre.publier(jeu)
+        self._signature_publiee = signature
+        journal.info("Jeu de données actualisé : version %s (n° %d).", vue.version, vue.numero)
+        return vue
@@ -0,0 +1,99 @@
+"""Cubes régionaux précalculés à partir d'une table de correspondance pays → région."""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from tableau_energie.cube import COLONNE_TOTAL, CubeEnergie
+
+NIVEAU_PAYS = 'Pays'
+
+
+def charger_correspondance(chemin):
+    """Lit la table de correspondance : une colonne `code_iso` puis une colonne par niveau."""
+    correspondance = pd.read_csv(chemin, dtype=str, keep_default_na=False, encoding='utf-8')
+    if 'code_iso' not in correspondance.columns:
+        raise ValueError(f"La table de correspondance {chemin} doit contenir une colonne 'code_iso'.")
+    return correspondance.drop_duplicates('code_iso', keep='first').reset_index(drop=True)
+
+
+def codes_de_region(correspondance, region):
+    """Codes ISO des pays rattachés à une région, quel que soit son niveau."""
+    niveaux = [col for col in correspondance.columns if col != 'code_iso']
+    membres = (correspondance[niveaux] == region).any(axis=1)
+    return set(correspondance.loc[membres, 'code_iso'])
+
+
+def construire_cube_regional(cube, regions_des_pays):
+    """Agrège le cube des pays en un cube des régions (cellules manquantes comptées pour zéro)."""
+    regions = np.unique(regions_des_pays[regions_des_pays != ''])
+    indices = np.searchsorted(regions, regions_des_pays)
+    membres = regions_des_pays != ''
+
+    appartenance = np.zeros((len(regions), len(cube.pays)))
+    appartenance[indices[membres], np.nonzero(membres)[0]] = 1.0
+
+    presence = (appartenance @ cube.presence.astype('float64')) > 0
+    valeurs = np.einsum('rp,pas->ras', appartenance, np.nan_to_num(cube.valeurs))
+    totaux = appartenance @ np.nan_to_num(cube.totaux)
+    valeurs[~presence] = np.nan
+    totaux[~presence] = np.nan
+
+    return CubeEnergie(
+        pays=regions.astype(str),
+        codes_iso=np.full(len(regions), '', dtype=str),
+        annees=cube.annees.copy(),
+        sources=list(cube.sources),
+        valeurs=valeurs,
+        totaux=totaux,
+        presence=presence,
+    )
+
+
+class AgregatsRegionaux:
+    """Cubes régionaux de tous les niveaux de la table de correspondance, pour un cube des pays."""
+
+    def __init__(self, cube, correspondance, exclus=('World',)):
+        self.correspondance = correspondance
+        self.niveaux = [col for col in correspondance.columns if col != 'code_iso']
+        self.cubes = {}
+        self.regions_des_pays = {}
+
+        codes = pd.Index(correspondance['code_iso'])
+        positions = codes.get_indexer(cube.codes_iso)
+        retenus = (positions >= 0) & ~np.isin(cube.pays, list(exclus))
+        for niveau in self.niveaux:
+            colonne = correspondance[niveau].to_numpy(dtype=str)
+            regions_des_pays = np.where(retenus, colonne[np.where(retenus, positions, 0)], '')
+            self.regions_des_pays[niveau] = regions_des_pays
+            self.cubes[niveau] = construire_cube_regional(cube, regions_des_pays)
+        self.pays = cube.pays
+        self.codes_iso = cube.codes_iso
+
+    def pour_cube(self, cube):
+        """Recalcule les agrégats pour une nouvelle version du cube des pays."""
+        return AgregatsRegionaux(cube, self.correspondance)
+
+    def copie(self):
+        """Copie aux cubes régionaux modifiables, pour le même cube des pays (corrections ligne à ligne)."""
+        regions = copy.copy(self)
+        regions.cubes = {niveau: cube_regional.copie() for niveau, cube_regional in self.cubes.items()}
+        return regions
+
+    def groupes_des_pays(self):
+        """Groupes (niveau, région) de chaque pays rattaché, au format de l'agrégateur incrémental."""
+        groupes = {}
+        for niveau, regions_des_pays in self.regions_des_pays.items():
+            for pays, region in zip(self.pays.tolist(), regions_des_pays.tolist()):
+                if region:
+                    groupes.setdefault(pays, []).append((niveau, region))
+        return {pays: tuple(groupes_pays) for pays, groupes_pays in groupes.items()}
+
+    def projection_pays(self, niveau, metrique=COLONNE_TOTAL):
+        """Codes ISO des membres d'une région, nom de la région et matrice [pays, année] de ses valeurs."""
+        cube_regional = self.cubes[niveau]
+        regions_des_pays = self.regions_des_pays[niveau]
+        membres = regions_des_pays != ''
+        indices = np.searchsorted(cube_regional.pays, regions_des_pays[membres])
+        valeurs = np.where(cube_regional.presence, cube_regional.colonne(metrique), np.nan)[indices]
+        return self.codes_iso[membres], regions_des_pays[membres], valeurs
@@ -0,0 +1,305 @@
+"""Registre d'agrégats partagé par toutes les sessions d'un même serveur."""
+import threading
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from tableau_energie.agregats import GROUPE_MONDE, AgregateurIncremental
+from tableau_energie.cube import COLONNE_TOTAL, construire_cube
+from tableau_energie.donnees import compacter_schema
+from tableau_energie.jeu_donnees import JeuDonnees
+from tableau_energie.statistiques import StatistiquesPeriode
+
+ENERGIES_AFFICHEES = [('hydro_twh', 'Hydro'), ('solaire_twh', 'Solaire'), ('eolien_twh', 'Éolien')]
+
+
+def _verrouiller_cube(cube):
+    for tableau in (cube.pays, cube.codes_iso, cube.annees, cube.valeurs, cube.totaux, cube.presence):
+        tableau.setflags(write=False)
+
+
+def _verrouiller_jeu(jeu):
+    _verrouiller_cube(jeu.cube)
+    if jeu.regions is not None:
+        for cube_regional in jeu.regions.cubes.values():
+            _verrouiller_cube(cube_regional)
+
+
+class VueRegistre:
+    """Version figée du jeu de données partagé et de ses agrégats, calculés au plus une fois."""
+
+    def __init__(self, jeu, numero):
+        self.jeu = jeu
+        # Compteur de versions publiées par le registre (1 pour le jeu initial)
+        self.numero = numero
+        self._agregats = {}
+        self._verrou = threading.Lock()
+
+    @property
+    def version(self):
+        return self.jeu.version
+
+    @property
+    def df(self):
+        """Vue superficielle du jeu de données nettoyé : le Copy-on-Write de pandas >= 3 isole ses modifications."""
+        return self.jeu.df.copy(deep=False)
+
+    @property
+    def cube(self):
+        return self.jeu.cube
+
+    def _memoriser(self, nom, calcul):
+        agregat = self._agregats.get(nom)
+        if agregat is None:
+            with self._verrou:
+                # Double vérification : une autre session a pu calculer l'agrégat entre-temps
+                agregat = self._agregats.get(nom)
+                if agregat is None:
+                    agregat = calcul()
+                    self._agregats[nom] = agregat
+        return agregat
+
+    def prechauffer(self):
+        """Calcule tous les agrégats de la vue (hors du chemin des requêtes)."""
+        self.annees_disponibles()
+        self.pays_disponibles()
+        self.indicateurs_mondiaux()
+        self.leaders_production(5)
+        self.dominance_energies()
+        self.statistiques_periode()
+        return self
+
+    def annees_disponibles(self):
+        return self._memoriser('annees', lambda: tuple(sorted(self.jeu.df['annee'].unique())))
+
+    def pays_disponibles(self):
+        return self._memoriser('pays', lambda: tuple(
+            sorted(p for p in self.jeu.df['pays'].unique() if p != 'World')))
+
+    def indicateurs_mondiaux(self):
+        """Production mondiale par année et indicateurs de la première et de la dernière année."""
+        return self._memoriser('mondial', self._calculer_indicateurs_mondiaux)
+
+    def _calculer_indicateurs_mondiaux(self):
+        df = self.jeu.df
+        df_mondial = df[df['pays'] == 'World']
+        if df_mondial.empty:
+            return MappingProxyType({'production_par_annee': MappingProxyType({}), 'prod_min_annee': 0,
+                                     'prod_max_annee': 0, 'prod_moyenne_annuelle': 0})
+
+        annee_mondiale_min = df_mondial['annee'].min()
+        annee_mondiale_max = df_mondial['annee'].max()
+        production = df_mondial.set_index('annee')['production_totale_twh']
+
+        return MappingProxyType({
+            'production_par_annee': MappingProxyType({int(a): v for a, v in production.items()}),
+            'prod_min_annee': df_mondial[df_mondial['annee'] == annee_mondiale_min]['production_totale_twh'].values[0],
+            'prod_max_annee': df_mondial[df_mondial['annee'] == annee_mondiale_max]['production_totale_twh'].values[0],
+            'prod_moyenne_annuelle': df_mondial['production_totale_twh'].mean(),
+        })
+
+    def leaders_production(self, n=5):
+        """Les `n` plus gros producteurs de l'année la plus récente et le total mondial de cette année."""
+        return self._memoriser(('leaders', n), lambda: self._calculer_leaders(n))
+
+    def _calculer_leaders(self, n):
+        df = self.jeu.df
+        annee_recente = df['annee'].max()
+        df_recent = df[df['annee'] == annee_recente]
+        pays_principaux = df_recent.groupby('pays', observed=True)['production_totale_twh'].sum().nlargest(n)
+        total_mondial = df_recent[df_recent['pays'] == 'World']['production_totale_twh'].sum()
+        return (tuple(pays_principaux.items()), total_mondial)
+
+    def dominance_energies(self):
+        """Production par type d'énergie pour l'année la plus récente, triée par ordre décroissant."""
+        return self._memoriser('dominance', self._calculer_dominance)
+
+    def _calculer_dominance(self):
+        df = self.jeu.df
+        df_recent = df[df['annee'] == df['annee'].max()]
+        energie_principale = {}
+        for energie_col, energie_nom in ENERGIES_AFFICHEES:
+            if energie_col in df_recent.columns:
+                energie_principale[energie_nom] = df_recent[energie_col].sum()
+        return tuple(sorted(energie_principale.items(), key=lambda x: x[1], reverse=True))
+
+    def statistiques_periode(self):
+        """Tables de statistiques de période par pays (onglet « Analyse Pays »)."""
+        return self._memoriser('statistiques', lambda: StatistiquesPeriode(self.jeu.cube))
+
+
+class RegistreAgregats:
+    """Détient la vue courante du jeu de données partagé et publie ses versions par remplacement atomique."""
+
+    def __init__(self, jeu, schema_compact=False):
+        _verrouiller_jeu(jeu)
+        self._vue = VueRegistre(jeu, numero=1)
+        self._schema_compact = schema_compact
+        self._agregateur = None
+        self._etiquettes = None
+        self._nb_corrections = 0
+        self._verrou = threading.Lock()
+
+    def vue(self):
+        """Vue courante, à prendre une seule fois par réexécution pour rester sur une même version."""
+        return self._vue
+
+    @property
+    def numero(self):
+        return self._vue.numero
+
+    @property
+    def version(self):
+        return self._vue.version
+
+    @property
+    def jeu(self):
+        """Poignée partagée ; son DataFrame ne doit être consulté qu'au travers de `df`."""
+        return self._vue.jeu
+
+    @property
+    def df(self):
+        return self._vue.df
+
+    @property
+    def cube(self):
+        return self._vue.cube
+
+    def annees_disponibles(self):
+        return self._vue.annees_disponibles()
+
+    def pays_disponibles(self):
+        return self._vue.pays_disponibles()
+
+    def indicateurs_mondiaux(self):
+        return self._vue.indicateurs_mondiaux()
+
+    def leaders_production(self, n=5):
+        return self._vue.leaders_production(n)
+
+    def dominance_energies(self):
+        return self._vue.dominance_energies()
+
+    def statistiques_periode(self):
+        return self._vue.statistiques_periode()
+
+    def _publier_vue(self, jeu, prechauffer=False):
+        # Appelé sous self._verrou : le numéro de version croît strictement
+        _verrouiller_jeu(jeu)
+        vue = VueRegistre(jeu, numero=self._vue.numero + 1)
+        if prechauffer:
+            vue.prechauffer()
+        self._vue = vue
+        return vue
+
+    def publier(self, jeu, prechauffer=True):
+        """Publie un jeu entièrement reconstruit, agrégats calculés, et retourne la nouvelle vue."""
+        # Les corrections appliquées à la version précédente ne sont pas rejouées sur le jeu reconstruit
+        with self._verrou:
+            self._agregateur = None
+            self._nb_corrections = 0
+            return self._publier_vue(jeu, prechauffer)
+
+    # Total de chaque ligne recalculé ; total mondial et totaux régionaux tenus par l'agrégateur en O(1) par
+    # correction, seules les lignes touchées étant réécrites (un pays ou une année absent du cube impose de
+    # reconstruire le cube). API de bibliothèque : les corrections ne survivent pas à la publication d'un jeu
+    # reconstruit (`publier`, par exemple par l'actualisation en arrière-plan après un changement des sources).
+    def appliquer_corrections(self, corrections):
+        """Applique un lot de Correction, en entier ou pas du tout, et retourne le nouveau JeuDonnees."""
+        corrections = list(corrections)
+        with self._verrou:
+            jeu = self._vue.jeu
+            if not corrections:
+                return jeu
+
+            colonnes = jeu.cube.sources + [COLONNE_TOTAL]
+            if self._agregateur is None:
+                df_cube = jeu.cube.tableau_complet(colonnes)
+                groupes = {} if jeu.regions is None else jeu.regions.groupes_des_pays()
+                self._agregateur = AgregateurIncremental.depuis_dataframe(
+                    df_cube[df_cube['pays'] != GROUPE_MONDE], colonnes, groupes, colonne_total=COLONNE_TOTAL)
+                # Étiquette de chaque ligne (pays, année) du format long, pour n'en réécrire que les lignes touchées
+                self._etiquettes = dict(zip(zip(jeu.df['pays'].tolist(), jeu.df['annee'].tolist()),
+                                            jeu.df.index.tolist()))
+            agregateur = self._agregateur
+
+            # Valeurs finales de chaque ligne touchée par le lot (None : ligne absente), groupes compris
+            lignes = {}
+            codes_iso = {GROUPE_MONDE: 'WLD'}
+            try:
+                for correction in corrections:
+                    agregateur.appliquer(correction)
+                    pays, annee = correction.pays, int(correction.annee)
+                    lignes[(pays, annee)] = agregateur.ligne(pays, annee)
+                    if (correction.valeurs or {}).get('code_iso') is not None:
+                        codes_iso[pays] = correction.valeurs['code_iso']
+                    for groupe in agregateur.groupes(pays):
+                        lignes[(groupe, annee)] = agregateur.total(groupe, annee)
+            except Exception:
+                # Lot rejeté : l'agrégateur sera reconstruit depuis la version publiée
+                self._agregateur = None
+                raise
+
+            # Copie des tableaux du cube : la version publiée reste inchangée pour les sessions qui la lisent
+            cube = jeu.cube.copie()
+            regions = None if jeu.regions is None else jeu.regions.copie()
+            hors_cube = {}
+            for (pays, annee), valeurs in lignes.items():
+                if isinstance(pays, tuple):
+                    niveau, region = pays
+                    regions.cubes[niveau].ecrire_ligne(region, annee, valeurs)
+                elif not cube.ecrire_ligne(pays, annee, valeurs) and valeurs is not None:
+                    hors_cube[(pays, annee)] = valeurs
+
+            def code_iso(pays):
+                if pays in codes_iso:
+                    return codes_iso[pays]
+                return jeu.cube.codes_iso[jeu.cube.index_pays[pays]] if pays in jeu.cube.index_pays else None
+
+            df = self._corriger_format_long(jeu.df, lignes, colonnes, code_iso)
+            if hors_cube:
+                # Nouveau pays ou nouvelle année : cube et agrégats régionaux reconstruits
+                df_cube = pd.concat([cube.tableau_complet(colonnes), pd.DataFrame(
+                    [dict(valeurs, pays=pays, code_iso=code_iso(pays), annee=annee)
+                     for (pays, annee), valeurs in hors_cube.items()])], ignore_index=True)
+                cube = construire_cube(df_cube, cube.sources)
+                regions = None if jeu.regions is None else jeu.regions.pour_cube(cube)
+                # Les groupes régionaux des nouveaux pays ne sont connus qu'avec le nouveau cube
+                self._agregateur = None
+
+            self._nb_corrections += len(corrections)
+            version_source = jeu.version.split('+c')[0]
+            nouveau_jeu = JeuDonnees(df, cube, version=f"{version_source}+c{self._nb_corrections}", regions=regions)
+            self._publier_vue(nouveau_jeu)
+            return nouveau_jeu
+
+    def _corriger_format_long(self, df, lignes, colonnes, code_iso):
+        """Réécrit, supprime ou ajoute les seules lignes touchées du format long (copie du DataFrame publié)."""
+        supprimees, modifiees, ajoutees = [], [], []
+        for (pays, annee), valeurs in lignes.items():
+            if isinstance(pays, tuple):
+                continue
+            etiquette = self._etiquettes.get((pays, annee))
+            if valeurs is None:
+                if etiquette is not None:
+                    supprimees.append(etiquette)
+                    del self._etiquettes[(pays, annee)]
+            elif etiquette is None:
+                ajoutees.append(dict(valeurs, pays=pays, code_iso=code_iso(pays), annee=annee))
+            else:
+                modifiees.append((etiquette, valeurs))
+
+        df = df.drop(index=supprimees)
+        if modifiees:
+            etiquettes = [etiquette for etiquette, _ in modifiees]
+            for col in colonnes:
+                df.loc[etiquettes, col] = np.array([valeurs[col] for _, valeurs in modifiees], dtype=df[col].dtype)
+        if ajoutees:
+            debut = int(df.index.max()) + 1 if len(df) else 0
+            nouvelles = pd.DataFrame(ajoutees, index=range(debut, debut + len(ajoutees)))[df.columns]
+            df = pd.concat([df, nouvelles.astype({'annee': df['annee'].dtype})])
+            if self._schema_compact:
+                df = compacter_schema(df, [col for col in colonnes if col != COLONNE_TOTAL])
+            self._etiquettes.update(zip(zip(nouvelles['pays'], nouvelles['annee'].tolist()), nouvelles.index))
+        return df
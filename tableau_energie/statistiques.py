@@ -0,0 +1,114 @@
+"""Statistiques de période (total, moyenne, maximum, minimum) d'un pays, précalculées."""
+from collections import namedtuple
+
+import numpy as np
+
+from tableau_energie.cube import COLONNE_TOTAL
+
+
+# Sommation compensée de Kahan le long des années : la somme d'une période est la différence de deux
+# préfixes, corrigée de leurs compensations, si bien qu'elle reste exacte à quelques ulps près même après
+# un long préfixe de grandes valeurs.
+def sommes_prefixes_compensees(matrice):
+    """Sommes préfixes [pays, année + 1] d'une matrice et leurs compensations, valeurs manquantes ignorées."""
+    nb_lignes, nb_colonnes = matrice.shape
+    sommes = np.zeros((nb_lignes, nb_colonnes + 1))
+    compensations = np.zeros((nb_lignes, nb_colonnes + 1))
+    somme = np.zeros(nb_lignes)
+    compensation = np.zeros(nb_lignes)
+    for j in range(nb_colonnes):
+        y = np.nan_to_num(matrice[:, j]) - compensation
+        t = somme + y
+        compensation = (t - somme) - y
+        somme = t
+        sommes[:, j + 1] = somme
+        compensations[:, j + 1] = compensation
+    return sommes, compensations
+
+
+def _table_clairsemee(valeurs, maximum):
+    """Niveaux de la table clairsemée des indices du maximum (ou du minimum), NaN ignorés."""
+    cles = np.where(np.isnan(valeurs), -np.inf, valeurs if maximum else -valeurs)
+    niveaux = [np.arange(len(valeurs))]
+    largeur = 1
+    while 2 * largeur <= len(valeurs):
+        precedent = niveaux[-1]
+        gauche, droite = precedent[:-largeur], precedent[largeur:]
+        # À égalité, l'indice de gauche est le plus petit
+        niveaux.append(np.where(cles[droite] > cles[gauche], droite, gauche))
+        largeur *= 2
+    return cles, niveaux
+
+
+def _indice_extremum(table, debut, fin):
+    # Deux blocs de largeur 2**k recouvrent [debut, fin) ; à égalité, celui de gauche l'emporte
+    cles, niveaux = table
+    k = (fin - debut).bit_length() - 1
+    gauche = niveaux[k][debut]
+    droite = niveaux[k][fin - (1 << k)]
+    return droite if cles[droite] > cles[gauche] else gauche
+
+
+PrefixesColonne = namedtuple('PrefixesColonne', ['valeurs', 'nombres', 'sommes', 'compensations'])
+
+
+class StatistiquesPeriode:
+    """Sommes préfixes d'un cube par colonne, et tables d'extremums par pays construites à la demande."""
+
+    def __init__(self, cube, colonnes=None):
+        self.cube = cube
+        self.colonnes = cube.sources + [COLONNE_TOTAL] if colonnes is None else list(colonnes)
+
+        # lignes_cumulees[p, i] = nombre d'années présentes du pays p avant l'indice d'année i
+        self.lignes_cumulees = np.zeros((len(cube.pays), len(cube.annees) + 1), dtype=np.int32)
+        np.cumsum(cube.presence, axis=1, out=self.lignes_cumulees[:, 1:])
+
+        # Une matrice [pays, année + 1] par tableau et par colonne, comme le cube lui-même
+        self.prefixes = {}
+        for colonne in self.colonnes:
+            # Les cellules absentes du cube valent NaN : la colonne est utilisée sans copie
+            valeurs = cube.colonne(colonne)
+            nombres = np.zeros_like(self.lignes_cumulees)
+            np.cumsum(~np.isnan(valeurs), axis=1, out=nombres[:, 1:])
+            self.prefixes[colonne] = PrefixesColonne(valeurs, nombres, *sommes_prefixes_compensees(valeurs))
+
+        # Tables d'extremums par (pays, colonne), construites à la première requête. Deux sessions qui
+        # construisent la même table en même temps obtiennent le même résultat : pas de verrou.
+        self._extremums = {}
+
+    def extremums(self, ip, colonne):
+        cle = (ip, colonne)
+        tables = self._extremums.get(cle)
+        if tables is None:
+            valeurs = self.prefixes[colonne].valeurs[ip]
+            tables = (_table_clairsemee(valeurs, maximum=True), _table_clairsemee(valeurs, maximum=False))
+            self._extremums[cle] = tables
+        return tables
+
+    def statistiques(self, pays, annee_debut=None, annee_fin=None, colonne=COLONNE_TOTAL):
+        """Total, moyenne, extremums et leurs années d'une colonne pour un pays sur une période (ou None)."""
+        ip = self.cube.index_pays.get(pays)
+        if ip is None or colonne not in self.colonnes:
+            return None
+        plage = self.cube.plage_annees(annee_debut, annee_fin)
+        debut, fin = plage.start, max(plage.start, plage.stop)
+        if self.lignes_cumulees[ip, fin] == self.lignes_cumulees[ip, debut]:
+            return None
+
+        prefixes = self.prefixes[colonne]
+        # Comme pandas, les valeurs manquantes comptent pour zéro dans la somme
+        total = (prefixes.sommes[ip, fin] - prefixes.sommes[ip, debut]) \
+            - (prefixes.compensations[ip, fin] - prefixes.compensations[ip, debut])
+        nombre = prefixes.nombres[ip, fin] - prefixes.nombres[ip, debut]
+
+        maximums, minimums = self.extremums(ip, colonne)
+        indice_max = _indice_extremum(maximums, debut, fin)
+        indice_min = _indice_extremum(minimums, debut, fin)
+        return {
+            'total': total,
+            'moyenne': total / np.float64(nombre) if nombre else np.nan,
+            'max': prefixes.valeurs[ip, indice_max],
+            'min': prefixes.valeurs[ip, indice_min],
+            'annee_max': self.cube.annees[indice_max] if nombre else None,
+            'annee_min': self.cube.annees[indice_min] if nombre else None,
+        }
@@ -0,0 +1,50 @@
+"""Fixtures des tests : petite source au format du classeur et jeu de données nettoyé."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if RACINE not in sys.path:
+    sys.path.insert(0, RACINE)
+
+from tableau_energie.donnees import nettoyer_et_preparer_donnees  # noqa: E402
+from tableau_energie.jeu_donnees import JeuDonnees  # noqa: E402
+
+PAYS = {'Brazil': 'BRA', 'France': 'FRA', 'Germany': 'DEU', 'India': 'IND'}
+ANNEES = list(range(2015, 2021))
+
+
+def generer_brut(graine=0):
+    """Source brute (noms de colonnes du classeur) : quatre pays, un agrégat sans code ISO et la ligne World."""
+    rng = np.random.default_rng(graine)
+    lignes = []
+    for pays, code in PAYS.items():
+        # L'Inde ne commence qu'en 2017 : le cube a des cellules absentes
+        for annee in ANNEES if pays != 'India' else ANNEES[2:]:
+            hydro, solaire, eolien = np.round(rng.uniform(0, 100, size=3), 3)
+            lignes.append((pays, code, annee, hydro, solaire if annee > 2015 else np.nan, eolien))
+    lignes += [('Europe', None, annee, 1.0, 1.0, 1.0) for annee in ANNEES]
+    lignes += [('World', 'OWID_WRL', annee, 0.0, 0.0, 0.0) for annee in ANNEES]
+    return pd.DataFrame(lignes, columns=['Country', 'Code', 'Year', 'Hydro generation - TWh',
+                                         'Solar generation - TWh', 'Wind generation - TWh'])
+
+
+@pytest.fixture
+def df_brut():
+    return generer_brut()
+
+
+@pytest.fixture
+def donnees(df_brut):
+    """Jeu de données nettoyé (format long) et son cube."""
+    return nettoyer_et_preparer_donnees(df_brut)
+
+
+@pytest.fixture
+def jeu(donnees):
+    df, cube = donnees
+    return JeuDonnees(df, cube, version='test')
@@ -0,0 +1,137 @@
+"""Corrections ligne à ligne : agrégateur incrémental et publication par le registre, comparés à un nettoyage complet."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tableau_energie.agregats import INSERER, MODIFIER, SUPPRIMER, AgregateurIncremental, Correction
+from tableau_energie.donnees import nettoyer_et_preparer_donnees
+from tableau_energie.jeu_donnees import JeuDonnees
+from tableau_energie.regions import AgregatsRegionaux
+from tableau_energie.registre import RegistreAgregats
+
+COLONNES = ['hydro_twh', 'solaire_twh', 'eolien_twh', 'production_totale_twh']
+
+
+def _reconstruire(df_brut):
+    """Cube issu d'un nettoyage complet de la source corrigée (référence)."""
+    return nettoyer_et_preparer_donnees(df_brut)[1]
+
+
+def _comparer(cube, reference):
+    colonnes = ['pays', 'annee'] + COLONNES
+    pd.testing.assert_frame_equal(cube.tableau_complet(COLONNES)[colonnes], reference.tableau_complet(COLONNES)[colonnes],
+                                  check_dtype=False, rtol=1e-12)
+
+
+def _format_long_trie(df):
+    colonnes = ['pays', 'annee'] + COLONNES
+    df = df[colonnes].sort_values(['pays', 'annee']).reset_index(drop=True)
+    return df.astype({'pays': str, 'annee': 'int64'})
+
+
+def test_depuis_dataframe_identique_au_groupby(donnees):
+    df, _ = donnees
+    df_pays = df[df['pays'] != 'World']
+    agregateur = AgregateurIncremental.depuis_dataframe(df_pays, COLONNES)
+    attendu = df_pays.groupby('annee')[COLONNES].sum()
+    for annee, ligne in attendu.iterrows():
+        assert agregateur.total('World', annee) == pytest.approx(ligne.to_dict(), rel=1e-12)
+
+
+def test_modification_d_une_source_recalcule_les_totaux(df_brut, jeu):
+    registre = RegistreAgregats(jeu)
+    nouveau = registre.appliquer_corrections([Correction(MODIFIER, 'France', 2020, {'hydro_twh': 1000.0})])
+
+    ligne = nouveau.cube.tableau_pays('France', 2020, 2020).iloc[0]
+    assert ligne['hydro_twh'] == 1000.0
+    assert ligne['production_totale_twh'] == ligne['hydro_twh'] + ligne['solaire_twh'] + ligne['eolien_twh']
+
+    df_corrige = df_brut.copy()
+    df_corrige.loc[(df_corrige['Country'] == 'France') & (df_corrige['Year'] == 2020), 'Hydro generation - TWh'] = 1000.0
+    _comparer(nouveau.cube, _reconstruire(df_corrige))
+    assert registre.numero == 2 and nouveau.version == 'test+c1'
+
+
+def test_insertion_d_un_pays_calcule_son_total(df_brut, jeu):
+    registre = RegistreAgregats(jeu)
+    nouveau = registre.appliquer_corrections([
+        Correction(INSERER, 'Atlantis', 2020, {'hydro_twh': 5.0, 'eolien_twh': 2.5, 'code_iso': 'ATL'}),
+        Correction(INSERER, 'India', 2016, {'hydro_twh': 1.0, 'solaire_twh': 2.0, 'eolien_twh': 3.0}),
+    ])
+
+    assert nouveau.cube.tableau_pays('Atlantis').iloc[0]['production_totale_twh'] == 7.5
+    assert nouveau.cube.tableau_pays('India', 2016, 2016).iloc[0]['production_totale_twh'] == 6.0
+
+    df_corrige = pd.concat([df_brut, pd.DataFrame([
+        {'Country': 'Atlantis', 'Code': 'ATL', 'Year': 2020, 'Hydro generation - TWh': 5.0,
+         'Solar generation - TWh': 0.0, 'Wind generation - TWh': 2.5},
+        {'Country': 'India', 'Code': 'IND', 'Year': 2016, 'Hydro generation - TWh': 1.0,
+         'Solar generation - TWh': 2.0, 'Wind generation - TWh': 3.0},
+    ])], ignore_index=True)
+    _comparer(nouveau.cube, _reconstruire(df_corrige))
+
+
+def test_suppression_puis_lot_rejete(jeu):
+    registre = RegistreAgregats(jeu)
+    monde_2018 = jeu.cube.tableau_pays('World', 2018, 2018).iloc[0]['production_totale_twh']
+    bresil_2018 = jeu.cube.tableau_pays('Brazil', 2018, 2018).iloc[0]['production_totale_twh']
+    nouveau = registre.appliquer_corrections([Correction(SUPPRIMER, 'Brazil', 2018)])
+    assert nouveau.cube.tableau_pays('Brazil', 2018, 2018).empty
+    assert nouveau.cube.tableau_pays('World', 2018, 2018).iloc[0]['production_totale_twh'] == pytest.approx(
+        monde_2018 - bresil_2018)
+
+    # Un lot contenant une correction invalide n'est pas publié
+    with pytest.raises(KeyError):
+        registre.appliquer_corrections([Correction(MODIFIER, 'France', 2020, {'hydro_twh': 1.0}),
+                                        Correction(MODIFIER, 'Brazil', 2018, {'hydro_twh': 1.0})])
+    assert registre.numero == 2
+    pd.testing.assert_frame_equal(registre.cube.tableau_pays('France'), jeu.cube.tableau_pays('France'))
+
+
+def test_modifier_une_vue_laisse_le_registre_intact(jeu):
+    registre = RegistreAgregats(jeu)
+    attendu = registre.df.copy()
+    vue = registre.vue().df
+    vue.loc[0, 'hydro_twh'] = -1.0
+    vue['production_totale_twh'] *= 2
+    vue['colonne_ajoutee'] = 0
+    pd.testing.assert_frame_equal(registre.vue().df, attendu)
+    pd.testing.assert_frame_equal(jeu.df, attendu)
+
+
+def test_insertion_puis_suppression_dans_un_meme_lot(jeu):
+    registre = RegistreAgregats(jeu)
+    nouveau = registre.appliquer_corrections([
+        Correction(INSERER, 'France', 2021, {'hydro_twh': 5.0}),
+        Correction(SUPPRIMER, 'France', 2021),
+    ])
+    assert 2021 not in nouveau.cube.index_annees
+    assert not (nouveau.df['annee'] == 2021).any()
+    _comparer(nouveau.cube, jeu.cube)
+
+
+def test_corrections_tiennent_les_totaux_regionaux_et_le_format_long(donnees):
+    df, cube = donnees
+    correspondance = pd.DataFrame({'code_iso': ['BRA', 'FRA', 'DEU', 'IND'],
+                                   'Continent': ['Amérique du Sud', 'Europe', 'Europe', 'Asie']})
+    jeu = JeuDonnees(df, cube, version='test', regions=AgregatsRegionaux(cube, correspondance))
+    registre = RegistreAgregats(jeu)
+    nouveau = registre.appliquer_corrections([
+        Correction(MODIFIER, 'France', 2020, {'hydro_twh': 1000.0}),
+        Correction(INSERER, 'India', 2016, {'hydro_twh': 1.0, 'solaire_twh': 2.0, 'eolien_twh': 3.0}),
+        Correction(SUPPRIMER, 'Germany', 2018),
+    ])
+    nouveau = registre.appliquer_corrections([Correction(SUPPRIMER, 'India', 2017)])
+
+    # Cubes régionaux tenus par l'agrégateur, identiques à un recalcul complet
+    recalcule = nouveau.regions.pour_cube(nouveau.cube).cubes['Continent']
+    tenu = nouveau.regions.cubes['Continent']
+    np.testing.assert_array_equal(tenu.presence, recalcule.presence)
+    np.testing.assert_allclose(tenu.totaux, recalcule.totaux, rtol=1e-12)
+    np.testing.assert_allclose(tenu.valeurs, recalcule.valeurs, rtol=1e-12)
+    assert jeu.regions.cubes['Continent'].totaux is not tenu.totaux
+
+    # Format long : seules les lignes touchées sont réécrites, ajoutées ou retirées
+    pd.testing.assert_frame_equal(_format_long_trie(nouveau.df), _format_long_trie(nouveau.cube.tableau_complet(COLONNES)),
+                                  rtol=1e-12)
+    assert len(nouveau.df) == len(df) - 1
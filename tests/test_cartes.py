@@ -0,0 +1,26 @@
+"""Magasin de cartes : taille bornée, éviction des cartes les moins récemment consultées."""
+import threading
+
+from tableau_energie.cartes import creer_magasin_cartes
+from tableau_energie.regions import NIVEAU_PAYS
+
+
+def test_magasin_de_cartes_borne(jeu):
+    magasin = creer_magasin_cartes(jeu, metrique_prechauffee='eolien_twh', taille_max=3)
+    # Préchauffage terminé avant les consultations, pour un ordre d'éviction déterministe
+    for fil in threading.enumerate():
+        if fil.name == 'prechauffage-figures':
+            fil.join()
+    assert len(magasin) == 3 and (2020, 'eolien_twh', NIVEAU_PAYS) in magasin
+    for annee in range(2015, 2021):
+        magasin.obtenir(annee, 'hydro_twh', NIVEAU_PAYS)
+    magasin.obtenir(2018, 'hydro_twh', NIVEAU_PAYS)
+    magasin.obtenir(None, 'hydro_twh', NIVEAU_PAYS)
+
+    assert len(magasin) == 3
+    assert (2018, 'hydro_twh', NIVEAU_PAYS) in magasin
+    assert (None, 'hydro_twh', NIVEAU_PAYS) in magasin
+    assert (2015, 'hydro_twh', NIVEAU_PAYS) not in magasin
+
+    # Une carte en magasin est rendue telle quelle, sans reconstruction ni désérialisation
+    assert magasin.obtenir(2018, 'hydro_twh', NIVEAU_PAYS) is magasin.obtenir(2018, 'hydro_twh', NIVEAU_PAYS)
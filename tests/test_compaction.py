@@ -0,0 +1,146 @@
+"""Compaction des figures : même rendu une fois le modèle appliqué comme le fait plotly.js."""
+import base64
+import copy
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+
+from tableau_energie import cartes, figures
+from tableau_energie.compaction import compacter_figure, taille_json
+
+ENERGIES = ['hydro_twh', 'solaire_twh', 'eolien_twh']
+PAYS = ('Brazil', 'France', 'Germany', 'India')
+
+# Constructeurs non compactés (sans le décorateur) : libellé -> figure
+CONSTRUCTEURS = {
+    'tendance': lambda jeu: figures.creer_graphe_tendance.__wrapped__(
+        jeu, 'France', 'production_totale_twh', "Production totale", '#1f7e3f'),
+    'mix': lambda jeu: figures.creer_mix_energie_pays.__wrapped__(jeu, 'France', 2020),
+    'comparaison_groupees': lambda jeu: figures.creer_comparaison_pays.__wrapped__(
+        jeu, list(PAYS), 2020, ENERGIES, 'group')[0],
+    'comparaison_parts': lambda jeu: figures.creer_comparaison_pays.__wrapped__(
+        jeu, list(PAYS), 2020, ENERGIES, 'empile')[1],
+    'tendance_filtree': lambda jeu: figures.creer_tendance_filtree.__wrapped__(jeu, PAYS, 2015, 2020),
+    'tendance_filtree_webgl': lambda jeu: figures.creer_tendance_filtree.__wrapped__(
+        jeu, PAYS, 2015, 2020, seuil_webgl=0),
+    'tendance_filtree_autres_pays': lambda jeu: figures.creer_tendance_filtree.__wrapped__(
+        jeu, PAYS, 2015, 2020, pays_principaux=2),
+    'barres_filtrees': lambda jeu: figures.creer_barres_filtrees.__wrapped__(jeu, PAYS, 2015, 2020),
+    'treemap': lambda jeu: figures.creer_treemap_distribution.__wrapped__(jeu),
+    'carte': lambda jeu: cartes.creer_carte_mondiale.__wrapped__(jeu.cube, 2020),
+    'carte_animee': lambda jeu: cartes.creer_carte_animee.__wrapped__(jeu.cube),
+}
+
+
+def _nombres(tableau):
+    # NaN remplacés par None : deux NaN ne sont pas égaux dans une comparaison de listes
+    tableau = np.asarray(tableau, dtype=float)
+    return np.where(np.isnan(tableau), None, tableau).tolist()
+
+
+def _valeurs(valeur):
+    """Tableaux (typés binaires ou listes) ramenés à des listes de flottants, pour comparer les valeurs seules."""
+    if isinstance(valeur, dict) and 'bdata' in valeur:
+        tableau = np.frombuffer(base64.b64decode(valeur['bdata']), dtype=valeur['dtype'])
+        if 'shape' in valeur:
+            tableau = tableau.reshape([int(d) for d in str(valeur['shape']).split(',')])
+        return _nombres(tableau)
+    if isinstance(valeur, np.ndarray):
+        return _nombres(valeur) if valeur.dtype.kind in 'iuf' else valeur.tolist()
+    if isinstance(valeur, dict):
+        return {cle: _valeurs(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        if valeur and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valeur):
+            return _nombres(valeur)
+        return [_valeurs(v) for v in valeur]
+    return valeur
+
+
+def _fusionner(modele, trace):
+    """Attributs du modèle complétés par ceux de la trace (priorité à la trace), comme plotly.js."""
+    resultat = copy.deepcopy(modele)
+    for cle, valeur in trace.items():
+        if isinstance(valeur, dict) and isinstance(resultat.get(cle), dict) and 'bdata' not in valeur:
+            resultat[cle] = _fusionner(resultat[cle], valeur)
+        else:
+            resultat[cle] = valeur
+    return resultat
+
+
+def _traces_resolues(spec):
+    """Traces telles que plotly.js les dessine : modèle du type appliqué, nom de trace substitué dans le survol."""
+    modeles = spec['layout'].get('template', {}).get('data', {})
+    resolues = []
+    for trace in spec['data']:
+        trace = _fusionner((modeles.get(trace['type']) or [{}])[0], trace)
+        trace.setdefault('xaxis', 'x')
+        trace.setdefault('yaxis', 'y')
+        if isinstance(trace.get('hovertemplate'), str):
+            trace['hovertemplate'] = trace['hovertemplate'].replace('%{fullData.name}', str(trace.get('name')))
+        resolues.append(_valeurs(trace))
+    return resolues
+
+
+def _sans_vides(valeur):
+    """Conteneurs vides retirés : plotly.js les traite comme absents."""
+    if isinstance(valeur, dict):
+        return {cle: v for cle, v in ((cle, _sans_vides(v)) for cle, v in valeur.items()) if v != {}}
+    return valeur
+
+
+def _spec(fig):
+    return json.loads(fig.to_json())
+
+
+@pytest.fixture(params=list(CONSTRUCTEURS))
+def figures_comparees(request, jeu):
+    originale = CONSTRUCTEURS[request.param](jeu)
+    return originale, compacter_figure(originale)
+
+
+def test_traces_resolues_identiques(figures_comparees):
+    originale, compacte = figures_comparees
+    spec_originale, spec_compacte = _spec(originale), _spec(compacte)
+    assert _traces_resolues(spec_compacte) == _traces_resolues(spec_originale)
+    assert _valeurs(spec_compacte.get('frames')) == _valeurs(spec_originale.get('frames'))
+
+
+def test_survol_et_couleurs_inchanges(figures_comparees):
+    originale, compacte = figures_comparees
+    spec_originale, spec_compacte = _spec(originale), _spec(compacte)
+    for avant, apres in zip(_traces_resolues(spec_originale), _traces_resolues(spec_compacte)):
+        for attribut in ('hovertemplate', 'hovertext', 'text', 'marker', 'line', 'colorscale', 'fillcolor'):
+            assert apres.get(attribut) == avant.get(attribut), attribut
+
+    # Couleurs de la mise en page : cycle de couleurs et échelle par défaut des traces qui s'en servent
+    modele_avant = spec_originale['layout']['template']['layout']
+    modele_apres = spec_compacte['layout']['template']['layout']
+    assert modele_apres.get('colorway') == modele_avant.get('colorway')
+    if 'colorscale' in modele_apres:
+        assert modele_apres['colorscale'] == modele_avant['colorscale']
+    mise_en_page = {cle: v for cle, v in spec_compacte['layout'].items() if cle != 'template'}
+    assert _sans_vides(mise_en_page) == _sans_vides(
+        {cle: v for cle, v in spec_originale['layout'].items() if cle != 'template'})
+
+
+def test_aller_retour_par_go_figure(figures_comparees):
+    _, compacte = figures_comparees
+    relue = go.Figure(compacte.to_plotly_json())
+    assert _valeurs(relue.to_plotly_json()) == _valeurs(compacte.to_plotly_json())
+    relue_json = go.Figure(json.loads(compacte.to_json()))
+    assert _spec(relue_json) == _spec(compacte)
+
+
+def test_figure_plus_courte(figures_comparees):
+    originale, compacte = figures_comparees
+    assert taille_json(compacte) < taille_json(originale)
+
+
+def test_survol_generique_des_traces_plotly_express(jeu):
+    """Le nom du groupe répété dans le survol de chaque trace est remonté sous la forme %{fullData.name}."""
+    compacte = compacter_figure(CONSTRUCTEURS['tendance_filtree'](jeu))
+    survol = compacte.layout.template.data.scatter[0].hovertemplate
+    assert '%{fullData.name}' in survol
+    assert all(trace.hovertemplate is None for trace in compacte.data)
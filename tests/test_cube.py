@@ -0,0 +1,56 @@
+"""Requêtes du cube pays × année × source, comparées aux filtres pandas du format long."""
+import pandas as pd
+import pytest
+
+
+def _trier(df):
+    return df.sort_values(['pays', 'annee']).reset_index(drop=True)
+
+
+def test_tableau_pays_identique_au_filtre(donnees):
+    df, cube = donnees
+    attendu = df[(df['pays'] == 'India') & df['annee'].between(2016, 2019)]
+    obtenu = cube.tableau_pays('India', 2016, 2019)
+    pd.testing.assert_frame_equal(obtenu, _trier(attendu)[obtenu.columns], check_dtype=False)
+
+
+def test_tableau_annee_ordre_du_cube(donnees):
+    df, cube = donnees
+    obtenu = cube.tableau_annee(2015, pays=['India', 'Germany', 'France'])
+    # L'Inde n'a pas de ligne en 2015 : seules les cellules présentes sont retournées
+    assert list(obtenu['pays']) == ['France', 'Germany']
+    attendu = df[(df['annee'] == 2015) & df['pays'].isin(['France', 'Germany'])]
+    pd.testing.assert_frame_equal(obtenu, _trier(attendu)[obtenu.columns], check_dtype=False)
+
+
+def test_tableau_selection_par_annee_decroissante(donnees):
+    _, cube = donnees
+    obtenu = cube.tableau_selection(['France', 'Brazil'], 2018, 2020, par_annee=True, annees_decroissantes=True)
+    assert list(obtenu['annee']) == [2020, 2020, 2019, 2019, 2018, 2018]
+    assert list(obtenu['pays'][:2]) == ['Brazil', 'France']
+
+
+@pytest.mark.parametrize('requete', [
+    lambda cube: cube.tableau_pays('Nowhere'),
+    lambda cube: cube.tableau_annee(2020, pays=['Nowhere']),
+    lambda cube: cube.tableau_annee(2020, pays=[]),
+    lambda cube: cube.tableau_annee(1800),
+    lambda cube: cube.tableau_selection(['Nowhere'], 2015, 2020),
+    lambda cube: cube.tableau_selection([]),
+], ids=['pays_inconnu', 'annee_pays_inconnu', 'annee_selection_vide', 'annee_inconnue',
+        'selection_pays_inconnu', 'selection_vide'])
+def test_selection_vide_retourne_un_tableau_vide(donnees, requete):
+    _, cube = donnees
+    obtenu = requete(cube)
+    assert obtenu.empty
+    assert list(obtenu.columns) == ['pays', 'code_iso', 'annee'] + cube.sources + ['production_totale_twh']
+
+
+def test_sommes_par_pays_identiques_au_groupby(donnees):
+    df, cube = donnees
+    selection = ['India', 'France', 'Nowhere']
+    attendu = (df[df['pays'].isin(selection) & df['annee'].between(2015, 2018)]
+               .groupby('pays', as_index=False)['production_totale_twh'].sum())
+    obtenu = cube.sommes_par_pays(selection, 2015, 2018)
+    pd.testing.assert_frame_equal(obtenu, attendu, check_dtype=False)
+    assert cube.sommes_par_pays([]).empty
@@ -0,0 +1,42 @@
+"""Export en lot en ligne de commande : rendu, reprise sur le journal et validation des pays."""
+import json
+import os
+
+import pytest
+
+from tableau_energie import export
+
+
+@pytest.fixture
+def arguments(df_brut, tmp_path):
+    chemin_source = tmp_path / 'energie.csv'
+    df_brut.to_csv(chemin_source, index=False)
+    return ['--sources', str(chemin_source), '--regions', str(tmp_path / 'sans_regions.csv'),
+            '--instantanes', str(tmp_path / 'instantanes'), '--sortie', str(tmp_path / 'rapports'),
+            '--formats', 'json', '--processus', '1']
+
+
+def _journal(sortie):
+    with open(os.path.join(sortie, export.NOM_JOURNAL), encoding='utf-8') as journal:
+        return [json.loads(ligne) for ligne in journal]
+
+
+def test_export_puis_reprise(arguments, tmp_path):
+    export.main(arguments + ['--pays', 'France', 'India', '--comparaison', 'France,Germany'])
+    sortie = tmp_path / 'rapports'
+    entrees = _journal(sortie)
+    assert len(entrees) == 2 * 5 + 3
+    assert (sortie / 'pays' / 'France' / 'tendance.json').exists()
+    assert (sortie / 'comparaison' / 'France-Germany_2020' / 'parts.json').exists()
+
+    # Deuxième lancement : tout est repris du journal, rien n'est rendu
+    export.main(arguments + ['--pays', 'France', 'India', '--comparaison', 'France,Germany'])
+    assert len(_journal(sortie)) == len(entrees)
+
+
+def test_pays_inconnus_rejetes_avant_le_rendu(arguments, tmp_path):
+    with pytest.raises(SystemExit) as sortie:
+        export.main(arguments + ['--pays', 'France', "Côte d'Ivoire", '--comparaison', 'France,Atlantis'])
+    assert sortie.value.code != 0
+    assert str(sortie.value.code) == "Pays absents du jeu de données : Atlantis, Côte d'Ivoire"
+    assert not (tmp_path / 'rapports').exists()
@@ -0,0 +1,27 @@
+"""Hiérarchie Monde → Pays → Source du treemap."""
+import numpy as np
+
+from tableau_energie import figures
+from tableau_energie.hierarchie import construire_hierarchie
+
+
+def test_feuilles_identiques_au_format_long(donnees):
+    df, cube = donnees
+    hierarchie = construire_hierarchie(cube, 2020)
+    feuilles = {i: v for i, p, v in zip(hierarchie['ids'], hierarchie['parents'], hierarchie['valeurs'])
+                if p not in ('', 'Monde')}
+    df_2020 = df[(df['annee'] == 2020) & (df['pays'] != 'World')]
+    attendu = {f"{ligne.pays}/{nom}": valeur for ligne in df_2020.itertuples()
+               for nom, valeur in (('Hydro', ligne.hydro_twh), ('Solaire', ligne.solaire_twh),
+                                   ('Eolien', ligne.eolien_twh)) if valeur > 0}
+    assert feuilles == attendu
+    # Les parents ont une valeur propre nulle (branchvalues='remainder')
+    assert all(v == 0 for p, v in zip(hierarchie['parents'], hierarchie['valeurs']) if p in ('', 'Monde'))
+
+
+def test_milieu_de_l_echelle_sur_les_feuilles(jeu):
+    fig = figures.creer_treemap_distribution.__wrapped__(jeu, annee=2020)
+    trace = fig.data[0]
+    feuilles = [v for i, v in zip(trace.ids, trace.values) if i not in set(trace.parents)]
+    assert trace.marker.cmid == np.median(feuilles)
+    assert trace.marker.cmid > 0
@@ -0,0 +1,93 @@
+"""Instantanés Parquet des sources : aller-retour, réutilisation, lecture filtrée et clés distinctes par chemin."""
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from tableau_energie.instantane import charger_avec_instantane, ecrire_instantane, lire_instantane, lire_manifeste
+
+
+def _lecteur_interdit(chemin):
+    raise AssertionError(f"{chemin} aurait dû être servi par son instantané")
+
+
+@pytest.fixture
+def source(df_brut, tmp_path):
+    chemin = tmp_path / 'energie.csv'
+    df_brut.to_csv(chemin, index=False)
+    return chemin
+
+
+def test_aller_retour_puis_reutilisation(source, tmp_path):
+    cache = str(tmp_path / 'cache')
+    premier = charger_avec_instantane(str(source), cache, lecteur=pd.read_csv)
+    pd.testing.assert_frame_equal(premier, pd.read_csv(source))
+
+    # Deuxième chargement, puis fichier simplement « touché » : l'instantané est relu sans le lecteur
+    pd.testing.assert_frame_equal(charger_avec_instantane(str(source), cache, lecteur=_lecteur_interdit), premier)
+    etat = os.stat(source)
+    os.utime(source, ns=(etat.st_atime_ns, etat.st_mtime_ns + 10 ** 9))
+    pd.testing.assert_frame_equal(charger_avec_instantane(str(source), cache, lecteur=_lecteur_interdit), premier)
+
+
+def test_lecture_projetee_et_filtree_par_groupes(source, tmp_path):
+    cache = str(tmp_path / 'cache')
+    df = charger_avec_instantane(str(source), cache, lecteur=pd.read_csv, colonnes=['Country', 'Year'],
+                                 filtres=[('Year', '>=', 2019)], colonne_groupes='Year')
+    attendu = pd.read_csv(source)
+    attendu = attendu.loc[attendu['Year'] >= 2019, ['Country', 'Year']].reset_index(drop=True)
+    pd.testing.assert_frame_equal(df, attendu)
+
+
+def test_cle_de_lecture_distingue_les_instantanes(source, tmp_path):
+    cache = str(tmp_path / 'cache')
+    brut = charger_avec_instantane(str(source), cache, lecteur=pd.read_csv)
+
+    # Un autre lecteur (projection différente) ne réutilise pas l'instantané du premier
+    projete = charger_avec_instantane(str(source), cache, lecteur=lambda chemin: pd.read_csv(chemin, usecols=['Year']),
+                                      cle_lecture='annees')
+    assert list(projete.columns) == ['Year']
+    assert lire_manifeste(str(source), cache)['cle_lecture'] == 'annees'
+    assert len([nom for nom in os.listdir(cache) if nom.endswith('.parquet')]) == 1
+    pd.testing.assert_frame_equal(charger_avec_instantane(str(source), cache, lecteur=pd.read_csv), brut)
+
+
+def test_groupes_decoupes_par_pays_au_sein_d_une_annee(df_brut, tmp_path):
+    chemin = str(tmp_path / 'instantane.parquet')
+    ecrire_instantane(df_brut, chemin, colonne_groupes='Year', colonnes_tri=['Code'], lignes_max_par_groupe=2)
+
+    # Deux pays par groupe, triés par code : les groupes d'une même année ne se chevauchent pas
+    metadonnees = pq.ParquetFile(chemin).metadata
+    noms = pq.read_schema(chemin).names
+    index_annee, index_code = noms.index('Year'), noms.index('Code')
+    plages = {}
+    for i in range(metadonnees.num_row_groups):
+        groupe = metadonnees.row_group(i)
+        assert groupe.num_rows <= 2
+        statistiques = groupe.column(index_code).statistics
+        if not statistiques.has_min_max:
+            continue  # groupe des seuls agrégats sans code, en fin d'année
+        plages.setdefault(groupe.column(index_annee).statistics.min, []).append((statistiques.min, statistiques.max))
+    for bornes in plages.values():
+        assert all(fin < debut for (_, fin), (debut, _) in zip(bornes[:-1], bornes[1:]))
+
+    # Lecture filtrée par pays, lignes dans l'ordre d'origine
+    attendu = df_brut[df_brut['Code'] == 'FRA'].reset_index(drop=True)
+    pd.testing.assert_frame_equal(lire_instantane(chemin, filtres=[('Code', 'in', ['FRA'])]), attendu)
+    pd.testing.assert_frame_equal(lire_instantane(chemin), df_brut.reset_index(drop=True))
+
+
+def test_sources_de_meme_nom_ont_chacune_leur_instantane(df_brut, tmp_path):
+    cache = str(tmp_path / 'cache')
+    chemins = [tmp_path / 'a' / 'data.csv', tmp_path / 'b' / 'data.csv']
+    for i, chemin in enumerate(chemins):
+        chemin.parent.mkdir()
+        df_brut[df_brut['Year'] == 2015 + i].to_csv(chemin, index=False)
+    premiers = [charger_avec_instantane(str(chemin), cache, lecteur=pd.read_csv) for chemin in chemins]
+
+    # Aucune des deux sources n'a évincé l'instantané de l'autre
+    for chemin, premier in zip(chemins, premiers):
+        assert lire_manifeste(str(chemin), cache) is not None
+        pd.testing.assert_frame_equal(charger_avec_instantane(str(chemin), cache, lecteur=_lecteur_interdit), premier)
+    assert len([nom for nom in os.listdir(cache) if nom.endswith('.parquet')]) == 2
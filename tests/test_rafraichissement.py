@@ -0,0 +1,61 @@
+"""Actualisation en arrière-plan : republication quand une source ou la table des régions change."""
+import os
+
+import pytest
+
+from tableau_energie.configuration import Configuration
+from tableau_energie.rafraichissement import RafraichisseurDonnees
+from tableau_energie.registre import RegistreAgregats
+from conftest import PAYS
+
+
+@pytest.fixture
+def configuration(df_brut, tmp_path):
+    df_brut.to_csv(tmp_path / 'energie.csv', index=False)
+    _ecrire_regions(tmp_path / 'regions.csv', {'Continent': ['Amérique du Sud', 'Europe', 'Europe', 'Asie']})
+    return Configuration(sources=[str(tmp_path / 'energie.csv')], dossier_instantanes=str(tmp_path / 'instantanes'),
+                         chemin_regions=str(tmp_path / 'regions.csv'), intervalle_actualisation=0)
+
+
+def _ecrire_regions(chemin, niveaux):
+    lignes = ['code_iso,' + ','.join(niveaux)]
+    for i, code in enumerate(PAYS.values()):
+        lignes.append(','.join([code] + [regions[i] for regions in niveaux.values()]))
+    chemin.write_text('\n'.join(lignes) + '\n', encoding='utf-8')
+
+
+def _rafraichisseur(configuration):
+    registre = RegistreAgregats(configuration.construire_jeu_donnees(configuration.lire_sources()))
+    return registre, RafraichisseurDonnees(registre, configuration.fichiers_surveilles,
+                                           lambda: configuration.construire_jeu_donnees(configuration.lire_sources()))
+
+
+def test_modification_des_regions_seules_republie(configuration, tmp_path):
+    registre, rafraichisseur = _rafraichisseur(configuration)
+    assert registre.jeu.niveaux() == ['Pays', 'Continent']
+
+    _ecrire_regions(tmp_path / 'regions.csv', {'Continent': ['Amérique du Sud', 'Europe', 'Europe', 'Asie'],
+                                               'Groupe': ['BRICS', 'UE', 'UE', 'BRICS']})
+    # Le changement doit être observé deux fois à l'identique avant d'être publié
+    assert rafraichisseur.verifier() is None
+    vue = rafraichisseur.verifier()
+    assert vue is not None and vue.numero == 2
+    assert registre.jeu.niveaux() == ['Pays', 'Continent', 'Groupe']
+    assert list(registre.jeu.cube_niveau('Groupe').pays) == ['BRICS', 'UE']
+
+
+def test_source_touchee_sans_changement_ne_republie_pas(configuration, tmp_path):
+    registre, rafraichisseur = _rafraichisseur(configuration)
+    chemin = tmp_path / 'energie.csv'
+    etat = os.stat(chemin)
+    os.utime(chemin, ns=(etat.st_atime_ns, etat.st_mtime_ns + 10 ** 9))
+    assert rafraichisseur.verifier() is None
+    assert rafraichisseur.verifier() is None
+    assert registre.numero == 1
+
+    # Contenu modifié : nouvelle version publiée
+    with open(chemin, 'a', encoding='utf-8') as fichier:
+        fichier.write('Spain,ESP,2020,30.0,15.0,60.0\n')
+    rafraichisseur.verifier()
+    vue = rafraichisseur.verifier()
+    assert vue is not None and 'Spain' in vue.cube.index_pays
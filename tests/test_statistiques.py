@@ -0,0 +1,71 @@
+"""Statistiques de période précalculées, comparées aux réductions de pandas (sommes à une tolérance près)."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tableau_energie.cube import COLONNE_TOTAL, COLONNES_SOURCES, construire_cube
+from tableau_energie.statistiques import StatistiquesPeriode, sommes_prefixes_compensees
+
+ANNEES = np.arange(1850, 2051)
+
+
+@pytest.fixture(scope='module')
+def df_long():
+    """Format long aléatoire : années manquantes, valeurs manquantes et pays de plus de 128 années présentes."""
+    rng = np.random.default_rng(7)
+    tableaux = []
+    for i in range(40):
+        nb_annees = len(ANNEES) if i < 5 else rng.integers(1, 130)
+        annees = np.sort(rng.choice(ANNEES, size=nb_annees, replace=False))
+        valeurs = rng.lognormal(0.0, 3.0, size=(nb_annees, len(COLONNES_SOURCES)))
+        valeurs[rng.random(valeurs.shape) < 0.15] = np.nan
+        df = pd.DataFrame(valeurs, columns=COLONNES_SOURCES)
+        df.insert(0, 'annee', annees)
+        df.insert(0, 'code_iso', f"P{i:02d}")
+        df.insert(0, 'pays', f"Pays {i:02d}")
+        df[COLONNE_TOTAL] = df[COLONNES_SOURCES].sum(axis=1)
+        tableaux.append(df)
+    return pd.concat(tableaux, ignore_index=True)
+
+
+def _tirages(df_long, nombre=600, graine=1):
+    rng = np.random.default_rng(graine)
+    pays = df_long['pays'].unique()
+    colonnes = COLONNES_SOURCES + [COLONNE_TOTAL]
+    for _ in range(nombre):
+        debut, fin = np.sort(rng.choice(ANNEES, size=2))
+        yield str(rng.choice(pays)), int(debut), int(fin), str(rng.choice(colonnes))
+
+
+def _verifier(statistiques_periode, df_long):
+    for pays, debut, fin, colonne in _tirages(df_long):
+        periode = df_long[(df_long['pays'] == pays) & df_long['annee'].between(debut, fin)].set_index('annee')[colonne]
+        obtenu = statistiques_periode.statistiques(pays, debut, fin, colonne=colonne)
+        if periode.empty:
+            assert obtenu is None
+            continue
+        # L'ordre d'addition diffère de celui de pandas : sommes et moyennes à une tolérance près
+        assert obtenu['total'] == pytest.approx(math.fsum(periode.dropna()), rel=1e-12), (pays, debut, fin, colonne)
+        np.testing.assert_allclose(obtenu['moyenne'], periode.mean(), rtol=1e-12)
+        np.testing.assert_equal(obtenu['max'], periode.max())
+        np.testing.assert_equal(obtenu['min'], periode.min())
+        if periode.notna().any():
+            assert (obtenu['annee_max'], obtenu['annee_min']) == (periode.idxmax(), periode.idxmin())
+        else:
+            assert obtenu['annee_max'] is None and obtenu['annee_min'] is None
+
+
+def test_identiques_a_pandas(df_long):
+    _verifier(StatistiquesPeriode(construire_cube(df_long)), df_long)
+
+
+def test_somme_apres_un_long_prefixe_de_grandes_valeurs():
+    rng = np.random.default_rng(3)
+    matrice = np.concatenate([np.full((2, 150), 1e12), rng.random((2, 50))], axis=1)
+    matrice[1, 160] = np.nan
+    sommes, compensations = sommes_prefixes_compensees(matrice)
+    for ligne in range(2):
+        total = (sommes[ligne, 200] - sommes[ligne, 150]) - (compensations[ligne, 200] - compensations[ligne, 150])
+        assert total == pytest.approx(math.fsum(np.nan_to_num(matrice[ligne, 150:])), rel=1e-12)